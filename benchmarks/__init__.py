@@ -0,0 +1,19 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Benchmarks of tlab-pptx.
+
+Run the stage benchmark of `Presentation.save` and store the results:
+
+    $ python -m benchmarks --output baseline.json
+
+Compare a later run against the stored baseline:
+
+    $ python -m benchmarks --compare baseline.json
+
+Time the per-build overhead of loading the template:
+
+    $ python -m benchmarks.templates --builds 1000
+
+Measure the throughput of the batched decay fitting in curves per second:
+
+    $ python -m benchmarks.fitting --curves 2000 --irf
+"""
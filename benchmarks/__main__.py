@@ -0,0 +1,66 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import sys
+import argparse
+
+from benchmarks import build
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the stages of building and saving presentations."
+    )
+    parser.add_argument(
+        "--trace-sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000]
+    )
+    parser.add_argument("--slides", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 4.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="compare with a stored report"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown flagged as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    report = build.run(
+        args.trace_sizes,
+        args.slides,
+        args.scales,
+        repeat=args.repeat,
+        log=lambda message: print(message, file=sys.stderr)
+    )
+    print(build.format_report(report))
+    if args.output:
+        build.dump(report, args.output)
+    if args.compare:
+        regressions = build.compare(
+            report,
+            build.load(args.compare),
+            args.threshold
+        )
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.case} {regression.stage}: "
+                f"{regression.baseline * 1000:.1f} ms -> "
+                f"{regression.current * 1000:.1f} ms "
+                f"({regression.ratio:.2f}x)"
+            )
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import io
+import sys
+import time
+import json
+import platform
+import datetime
+import contextlib
+import dataclasses
+import itertools
+import typing as t
+
+import numpy as np
+import plotly
+import plotly.graph_objects as go
+
+import tlab_pptx
+from tlab_pptx import (
+    common,
+    deck,
+    photo_luminescence as pl,
+    profiles,
+    sessions
+)
+
+
+# The functions of `tlab_pptx.common` timed as the stages of a build.
+STAGES = {
+    "style": ("get_styled_figure",),
+    "render": ("render_figure",),
+    "add_picture": ("add_picture",),
+    "text": ("add_title", "add_text"),
+}
+ALL_STAGES = [*STAGES, "serialize", "total"]
+
+
+@dataclasses.dataclass(frozen=True)
+class Case:
+    """Parameters of a benchmark case.
+
+    Attributes
+    ----------
+        trace_size : int
+            The number of points of each trace.
+        slides : int
+            The number of slides in the deck.
+        scale : float
+            The render scale relative to the figure layout.
+    """
+    trace_size: int
+    slides: int
+    scale: float
+
+    @property
+    def name(self) -> str:
+        """The name identifying the case in a report."""
+        return (
+            f"points={self.trace_size},slides={self.slides},"
+            f"scale={self.scale:g}"
+        )
+
+
+def _presentation(trace_size: int, seed: int) -> pl.Presentation:
+    rng = np.random.default_rng(seed)
+    time_ = np.linspace(0.0, 10.0, trace_size)
+    decay = 60 * np.exp(-time_ / 1.2) + 40 * np.exp(-time_ / 3.6)
+    wavelength = np.linspace(400.0, 560.0, trace_size)
+    spectrum = np.exp(-((wavelength - 480.0) / 24.0) ** 2)
+    return pl.Presentation(
+        title=f"Sample {seed}",
+        excitation_wavelength=400,
+        excitation_power=1,
+        time_range=10,
+        center_wavelength=480,
+        FWHM=48,
+        frame=10000,
+        date=datetime.date(2022, 1, 1),
+        h_fig=go.Figure(go.Scatter(
+            x=time_,
+            y=decay + rng.normal(0.0, 0.5, trace_size),
+            mode="lines"
+        )),
+        v_fig=go.Figure(go.Scatter(
+            x=wavelength,
+            y=spectrum + rng.normal(0.0, 0.01, trace_size),
+            mode="lines"
+        )),
+        a=60,
+        b=40,
+        tau1=1.2,
+        tau2=3.6
+    )
+
+
+def _wrap(
+    func: t.Callable[..., t.Any],
+    stage: str,
+    timings: dict[str, float]
+) -> t.Callable[..., t.Any]:
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[stage] += time.perf_counter() - start
+    return wrapper
+
+
+@contextlib.contextmanager
+def timed(timings: dict[str, float]) -> t.Iterator[None]:
+    """Accumulate the seconds spent in each stage of `STAGES` into a dict."""
+    originals = {
+        name: getattr(common, name)
+        for names in STAGES.values()
+        for name in names
+    }
+    for stage, names in STAGES.items():
+        for name in names:
+            setattr(common, name, _wrap(originals[name], stage, timings))
+    try:
+        yield
+    finally:
+        for name, func in originals.items():
+            setattr(common, name, func)
+
+
+def run_case(
+    case: Case,
+    session: sessions.RendererSession,
+    repeat: int = 1
+) -> dict[str, float]:
+    """Time the stages of saving a deck.
+
+    Parameters
+    ----------
+        case : Case
+            The parameters of the deck.
+        session : tlab_pptx.sessions.RendererSession
+            A warm renderer session shared by the cases.
+        repeat : int
+            The number of runs. The fastest run of each stage is reported.
+
+    Returns
+    -------
+    dict of str to float
+        The seconds spent in each stage of `ALL_STAGES`.
+    """
+    presentations = [
+        _presentation(case.trace_size, i) for i in range(case.slides)
+    ]
+    profile = profiles.RenderProfile(f"scale{case.scale:g}", scale=case.scale)
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        timings = dict.fromkeys(ALL_STAGES, 0.0)
+        start = time.perf_counter()
+        with timed(timings):
+            prs = deck.Deck(presentations).build(
+                profile=profile,
+                session=session
+            )
+        serialize_start = time.perf_counter()
+        with io.BytesIO() as f:
+            prs.save(f)
+        end = time.perf_counter()
+        timings["serialize"] = end - serialize_start
+        timings["total"] = end - start
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    return best
+
+
+def run(
+    trace_sizes: t.Sequence[int],
+    slides: t.Sequence[int],
+    scales: t.Sequence[float],
+    repeat: int = 1,
+    log: t.Callable[[str], t.Any] | None = None
+) -> dict[str, t.Any]:
+    """Run the benchmark over the product of the parameters.
+
+    Returns
+    -------
+    dict
+        The machine-readable report with the environment in "meta" and the
+        stage timings of every case in "results".
+    """
+    results = []
+    with sessions.RendererSession() as session:
+        for trace_size, n_slides, scale in itertools.product(
+            trace_sizes,
+            slides,
+            scales
+        ):
+            case = Case(trace_size, n_slides, scale)
+            stages = run_case(case, session, repeat)
+            results.append(
+                dict(dataclasses.asdict(case), name=case.name, stages=stages)
+            )
+            if log is not None:
+                log(f"{case.name}: {stages['total']:.3f} s")
+    return dict(
+        meta=dict(
+            created=datetime.datetime.now().isoformat(timespec="seconds"),
+            python=sys.version.split()[0],
+            platform=platform.platform(),
+            tlab_pptx=tlab_pptx.__version__,
+            plotly=plotly.__version__,
+            repeat=repeat
+        ),
+        results=results
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class Regression:
+    """A stage slower than in the baseline."""
+    case: str
+    stage: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """The factor by which the stage got slower."""
+        return self.current / self.baseline
+
+
+def compare(
+    report: dict[str, t.Any],
+    baseline: dict[str, t.Any],
+    threshold: float = 0.2,
+    min_seconds: float = 0.005
+) -> list[Regression]:
+    """Find the stages slower than in a baseline report.
+
+    Parameters
+    ----------
+        report : dict
+            A report returned by `run`.
+        baseline : dict
+            A stored report to compare with. Cases missing from either
+            report are ignored.
+        threshold : float
+            The relative slowdown flagged as a regression.
+        min_seconds : float
+            The absolute slowdown below which timings are regarded as noise.
+
+    Returns
+    -------
+    list of Regression
+        The regressed stages.
+
+    Examples
+    --------
+    >>> baseline = dict(results=[dict(name="a", stages=dict(render=1.0))])
+    >>> report = dict(results=[dict(name="a", stages=dict(render=1.5))])
+    >>> compare(report, baseline)
+    [Regression(case='a', stage='render', baseline=1.0, current=1.5)]
+    """
+    baseline_results = {
+        result["name"]: result["stages"] for result in baseline["results"]
+    }
+    regressions = []
+    for result in report["results"]:
+        stages = baseline_results.get(result["name"])
+        if stages is None:
+            continue
+        for stage, current in result["stages"].items():
+            previous = stages.get(stage)
+            if previous is None:
+                continue
+            if current > previous * (1 + threshold) \
+                    and current - previous > min_seconds:
+                regressions.append(
+                    Regression(result["name"], stage, previous, current)
+                )
+    return regressions
+
+
+def format_report(report: dict[str, t.Any]) -> str:
+    """Format the stage timings of a report as a table in milliseconds."""
+    width = max([
+        len("case"),
+        *(len(result["name"]) for result in report["results"])
+    ])
+    lines = [" ".join([
+        f"{'case':<{width}}",
+        *(f"{stage:>11}" for stage in ALL_STAGES)
+    ])]
+    for result in report["results"]:
+        lines.append(" ".join([
+            f"{result['name']:<{width}}",
+            *(
+                f"{result['stages'][stage] * 1000:11.1f}"
+                for stage in ALL_STAGES
+            )
+        ]))
+    return "\n".join(lines)
+
+
+def load(path: str) -> dict[str, t.Any]:
+    """Load a report written by `dump`."""
+    with open(path) as f:
+        report: dict[str, t.Any] = json.load(f)
+        return report
+
+
+def dump(report: dict[str, t.Any], path: str) -> None:
+    """Write a report as JSON."""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,93 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Benchmark of the throughput of the batched decay fitting.
+
+    $ python -m benchmarks.fitting --curves 2000 --irf
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from tlab_pptx import fitting
+
+
+def _curves(
+    curves: int,
+    points: int,
+    irf: bool,
+    seed: int = 0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """Simulate noisy decay curves with random lifetimes."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(-2.0 if irf else 0.0, 20.0, points)
+    response = np.exp(-0.5 * (t / 0.15) ** 2) if irf else None
+    a = rng.uniform(20.0, 80.0, curves)
+    truth = fitting.DecayFit(
+        time=t,
+        amplitudes=np.stack([a, 100.0 - a], axis=1),
+        tau1=rng.uniform(0.3, 1.5, curves),
+        tau2=rng.uniform(2.5, 8.0, curves),
+        offset=np.full(curves, 2.0),
+        rss=np.zeros(curves),
+        success=np.ones(curves, dtype=bool),
+        irf=response
+    ).curves()
+    return t, rng.poisson(np.maximum(truth, 0.0) * 50.0) / 50.0, response
+
+
+def run(
+    curves: int = 2000,
+    points: int = 512,
+    irf: bool = False,
+    repeat: int = 3
+) -> dict[str, float]:
+    """Time fitting simulated curves in one batch.
+
+    Returns
+    -------
+    dict of str to float
+        The best "seconds" of a batch, the "curves_per_second" and the
+        fraction of the fits which converged ("success").
+    """
+    t, y, response = _curves(curves, points, irf)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fit = fitting.fit_biexponential(t, y, irf=response)
+        best = min(best, time.perf_counter() - start)
+    return dict(
+        seconds=best,
+        curves_per_second=curves / best,
+        success=float(fit.success.mean())
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.fitting",
+        description="Time the batched bi-exponential fitting of decay curves."
+    )
+    parser.add_argument("--curves", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=512)
+    parser.add_argument(
+        "--irf",
+        action="store_true",
+        help="convolve the decays with a Gaussian IRF"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    result = run(args.curves, args.points, args.irf, args.repeat)
+    print(
+        f"{args.curves} curves x {args.points} points "
+        f"in {result['seconds']:.3f} s"
+    )
+    print(
+        f"{result['curves_per_second']:.0f} curves/s, "
+        f"{result['success']:.1%} converged"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
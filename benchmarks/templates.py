@@ -0,0 +1,107 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Benchmark of the per-build overhead of loading the template.
+
+    $ python -m benchmarks.templates --builds 1000
+"""
+import io
+import sys
+import time
+import argparse
+import typing as t
+
+import PIL.Image
+import pptx
+
+from benchmarks import build
+from tlab_pptx import common, templates
+
+
+def _png() -> bytes:
+    with io.BytesIO() as f:
+        PIL.Image.new("RGB", (8, 8)).save(f, "png")
+        return f.getvalue()
+
+
+def _best(func: t.Callable[[], t.Any], builds: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(builds):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / builds
+
+
+def run(
+    builds: int = 1000,
+    repeat: int = 3,
+    template: common.FilePathOrBuffer | None = None
+) -> dict[str, float]:
+    """Time the template loading and one-slide builds without rendering.
+
+    The figures are given as already rendered images so that only the
+    template and the slide assembly are timed.
+
+    Returns
+    -------
+    dict of str to float
+        The seconds per build of parsing the template ("parse"), copying the
+        cached template ("cached"), and building a slide on each of them
+        ("parse_build" and "cached_build"). "uncompiled_build" draws every
+        shape through python-pptx instead of filling the compiled slide.
+    """
+    presentation = build._presentation(10, 0)
+    images = [_png()] * len(presentation.figures())
+    templates.open_template(template)
+
+    def parse_build() -> None:
+        presentation.add_slide(
+            pptx.Presentation(template),
+            images=images,
+            compiled=True
+        )
+
+    def cached_build(compiled: bool = True) -> None:
+        presentation.add_slide(
+            templates.open_template(template),
+            images=images,
+            compiled=compiled
+        )
+
+    return dict(
+        parse=_best(lambda: pptx.Presentation(template), builds, repeat),
+        cached=_best(
+            lambda: templates.open_template(template),
+            builds,
+            repeat
+        ),
+        parse_build=_best(parse_build, builds, repeat),
+        cached_build=_best(cached_build, builds, repeat),
+        uncompiled_build=_best(
+            lambda: cached_build(compiled=False),
+            builds,
+            repeat
+        ),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.templates",
+        description="Time the per-build overhead of loading the template."
+    )
+    parser.add_argument("--builds", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--template",
+        help="a pptx file used instead of the default template"
+    )
+    args = parser.parse_args(argv)
+    timings = run(args.builds, args.repeat, args.template)
+    for name, seconds in timings.items():
+        print(f"{name:<18}{seconds * 1000:>10.3f} ms/build")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Factories shared by the tests."""
+import datetime
+import io
+import typing as t
+
+import PIL.Image
+import plotly.graph_objects as go
+
+from tlab_pptx import photo_luminescence as pl
+
+
+def png(color: int = 0, size: tuple[int, int] = (8, 8)) -> bytes:
+    """Encode a PNG image of one color, a different one for each `color`."""
+    with io.BytesIO() as f:
+        PIL.Image.new("RGB", size, (color, 0, 0)).save(f, "png")
+        return f.getvalue()
+
+
+def render_figure(*args: t.Any, **kwargs: t.Any) -> bytes:
+    """Stand in for `tlab_pptx.common.render_figure` without kaleido."""
+    return png()
+
+
+def presentation(title: str = "title", **fields: t.Any) -> pl.Presentation:
+    """Make a photo luminescence presentation with empty figures.
+
+    The default fields are replaced by `fields`.
+    """
+    return pl.Presentation(**{
+        "title": title,
+        "excitation_wavelength": 400,
+        "excitation_power": 1,
+        "time_range": 10,
+        "center_wavelength": 480,
+        "FWHM": 48,
+        "frame": 10000,
+        "date": datetime.date(2022, 1, 1),
+        "h_fig": go.Figure(),
+        "v_fig": go.Figure(),
+        "a": 60,
+        "b": 40,
+        "tau1": 1.0,
+        "tau2": 3.0,
+        **fields
+    })
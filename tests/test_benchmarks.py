@@ -0,0 +1,66 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+
+from benchmarks import build, fitting, templates
+from tlab_pptx import common
+
+
+def _report(**stages: float) -> dict[str, object]:
+    return dict(results=[dict(name="case", stages=stages)])
+
+
+class Test_timed(TestCase):
+
+    def test_timed(self) -> None:
+        add_text = common.add_text
+        timings = dict.fromkeys(build.ALL_STAGES, 0.0)
+        with build.timed(timings):
+            self.assertIsNot(common.add_text, add_text)
+            common.get_styled_figure(dict(data=[]))
+        self.assertIs(common.add_text, add_text)
+        self.assertGreater(timings["style"], 0.0)
+        self.assertEqual(timings["render"], 0.0)
+
+
+class Test_compare(TestCase):
+
+    def test_compare(self) -> None:
+        baseline = _report(render=1.0, text=0.001, total=2.0)
+        cases = [
+            (_report(render=1.1, text=0.001, total=2.0), []),
+            (_report(render=1.5, text=0.001, total=2.0), ["render"]),
+            (_report(render=1.0, text=0.003, total=2.0), []),
+            (_report(render=1.0, text=0.001, total=3.0, serialize=1.0), ["total"]),
+        ]
+        for report, stages in cases:
+            with self.subTest(report=report):
+                regressions = build.compare(report, baseline)
+                self.assertEqual([r.stage for r in regressions], stages)
+
+    def test_missing_case(self) -> None:
+        baseline = dict(results=[dict(name="other", stages=dict(render=1.0))])
+        self.assertEqual(build.compare(_report(render=9.0), baseline), [])
+
+
+class Test_templates_run(TestCase):
+
+    def test_run(self) -> None:
+        timings = templates.run(builds=2, repeat=1)
+        self.assertEqual(list(timings), ["parse", "cached", "parse_build", "cached_build", "uncompiled_build"])
+        self.assertTrue(all(seconds > 0.0 for seconds in timings.values()))
+
+
+class Test_fitting_run(TestCase):
+
+    def test_run(self) -> None:
+        for irf in [False, True]:
+            with self.subTest(irf=irf):
+                result = fitting.run(curves=20, points=64, irf=irf, repeat=1)
+                self.assertEqual(list(result), ["seconds", "curves_per_second", "success"])
+                self.assertGreater(result["curves_per_second"], 0.0)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(build))
+    return tests
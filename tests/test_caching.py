@@ -0,0 +1,100 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import os
+import tempfile
+import pathlib
+import concurrent.futures
+
+from tlab_pptx import caching
+
+
+class TestRenderCache(TestCase):
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.directory = pathlib.Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_get_put(self) -> None:
+        cache = caching.RenderCache(self.directory)
+        key = cache.make_key("{}", format="png", scale=10)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, b"png_image")
+        self.assertEqual(cache.get(key), b"png_image")
+        stats = cache.stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.entries, 1)
+        self.assertEqual(stats.size, len(b"png_image"))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_persistence(self) -> None:
+        key = caching.RenderCache.make_key("{}", scale=10)
+        caching.RenderCache(self.directory).put(key, b"png_image")
+        self.assertEqual(
+            caching.RenderCache(self.directory).get(key),
+            b"png_image"
+        )
+
+    def test_make_key(self) -> None:
+        make_key = caching.RenderCache.make_key
+        self.assertEqual(
+            make_key("{}", format="png", scale=10),
+            make_key("{}", scale=10, format="png")
+        )
+        self.assertNotEqual(make_key("{}", scale=10), make_key("{}", scale=5))
+        self.assertNotEqual(make_key("{}", scale=10), make_key("[]", scale=10))
+
+    def test_evict(self) -> None:
+        cache = caching.RenderCache(self.directory, max_size=20)
+        keys = [cache.make_key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, b"0123456789")
+            os.utime(cache._path(key), ns=(i * 10**9, i * 10**9))
+            if i == 1:
+                cache.get(keys[0])
+                os.utime(cache._path(keys[0]), ns=(2 * 10**9, 2 * 10**9))
+        self.assertEqual(cache.get(keys[0]), b"0123456789")
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[2]), b"0123456789")
+        stats = cache.stats()
+        self.assertEqual(stats.evictions, 1)
+        self.assertEqual(stats.size, 20)
+
+    def test_put_without_scan(self) -> None:
+        cache = caching.RenderCache(self.directory, max_size=1000)
+        with mock.patch.object(
+            cache,
+            "_entries",
+            wraps=cache._entries
+        ) as entries_mock:
+            for i in range(50):
+                cache.put(cache.make_key(str(i % 40)), b"0123456789")
+            self.assertEqual(entries_mock.call_count, 1)
+            cache.put(cache.make_key("large"), bytes(700))
+            self.assertEqual(entries_mock.call_count, 2)
+        stats = cache.stats()
+        self.assertEqual((stats.size, stats.evictions), (1000, 10))
+
+    def test_clear(self) -> None:
+        cache = caching.RenderCache(self.directory)
+        cache.put(cache.make_key("{}"), b"png_image")
+        cache.clear()
+        self.assertEqual(cache.stats().entries, 0)
+
+    def test_concurrent_put(self) -> None:
+        cache = caching.RenderCache(self.directory)
+        key = cache.make_key("{}")
+        images = [bytes([i]) * (1 << 20) for i in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda image: cache.put(key, image), images))
+        self.assertIn(cache.get(key), images)
+        self.assertEqual(sorted(os.listdir(self.directory)), [key + cache.suffix])
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(caching))
+    return tests
@@ -0,0 +1,128 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import datetime
+
+import numpy as np
+import pptx
+import pptx.slide
+import pptx.util
+import pptx.enum.chart
+import pptx.oxml.ns
+import plotly.graph_objects as go
+
+from tlab_pptx import charts, common
+
+
+class Test_is_supported(TestCase):
+
+    def test_supported(self) -> None:
+        figs = [
+            go.Figure(go.Scatter(x=[0, 1], y=[1, 0])),
+            go.Figure(go.Scatter(y=[1, 0], mode="markers")),
+            go.Figure([
+                go.Scatter(x=[0, 1], y=[1, 0], mode="lines"),
+                go.Scatter(x=[0, 1], y=[0, 1], mode="lines")
+            ]),
+        ]
+        for fig in figs:
+            with self.subTest(fig=fig):
+                self.assertTrue(charts.is_supported(fig))
+
+    def test_unsupported(self) -> None:
+        figs = [
+            go.Figure(),
+            go.Figure(go.Bar(x=[0, 1], y=[1, 0])),
+            go.Figure(go.Scatter(x=["a", "b"], y=[1, 0])),
+            go.Figure(go.Scatter(x=[0, 1], y=[1, 0], fill="tozeroy")),
+            go.Figure([
+                go.Scatter(x=[0, 1], y=[1, 0], mode="lines"),
+                go.Scatter(x=[0, 1], y=[0, 1], mode="markers")
+            ]),
+            go.Figure(go.Scatter(x=[0, 1], y=[1, 0], yaxis="y2")),
+            go.Figure(
+                go.Scatter(x=[0, 1], y=[1, 0]),
+                layout=dict(annotations=[dict(text="note")])
+            ),
+        ]
+        for fig in figs:
+            with self.subTest(fig=fig):
+                self.assertFalse(charts.is_supported(fig))
+
+
+class Test_add_chart(TestCase):
+
+    def _add_chart(self, fig: go.Figure) -> pptx.slide.Slide:
+        prs = pptx.Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        charts.add_chart(
+            slide,
+            fig,
+            1.0,
+            2.0,
+            annotations=[common.get_date_annotation(datetime.date(2022, 1, 1))]
+        )
+        return slide
+
+    def test_chart(self) -> None:
+        fig = go.Figure(go.Scatter(
+            x=[0.0, 1.0, 2.0, float("nan")],
+            y=[1.0, 0.5, 0.25, 0.125],
+            mode="lines",
+            line=dict(color="#ff3300")
+        ))
+        fig.update_xaxes(title="Time (ns)", range=[0, 2])
+        fig.update_yaxes(title="Intensity", type="log", range=[-1, 0])
+        fig_json = fig.to_json()
+        slide = self._add_chart(fig)
+        self.assertEqual(fig.to_json(), fig_json)
+        graphic_frame, textbox = slide.shapes
+        self.assertEqual(graphic_frame.left, pptx.util.Cm(1.0))
+        self.assertEqual(graphic_frame.top, pptx.util.Cm(2.0))
+        chart = graphic_frame.chart
+        self.assertEqual(
+            chart.chart_type,
+            pptx.enum.chart.XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS
+        )
+        self.assertFalse(chart.has_legend)
+        series, = chart.plots[0].series
+        self.assertEqual(series.values, (1.0, 0.5, 0.25))
+        x_axis, y_axis = chart.category_axis, chart.value_axis
+        self.assertEqual(x_axis.axis_title.text_frame.text, "Time (ns)")
+        self.assertEqual(y_axis.axis_title.text_frame.text, "Intensity")
+        self.assertEqual(
+            (x_axis.minimum_scale, x_axis.maximum_scale),
+            (0.0, 2.0)
+        )
+        self.assertEqual(
+            (y_axis.minimum_scale, y_axis.maximum_scale),
+            (0.1, 1.0)
+        )
+        self.assertIsNone(
+            x_axis._element.scaling.find(pptx.oxml.ns.qn("c:logBase"))
+        )
+        self.assertIsNotNone(
+            y_axis._element.scaling.find(pptx.oxml.ns.qn("c:logBase"))
+        )
+        for axis in (x_axis, y_axis):
+            self.assertEqual(
+                axis.major_tick_mark,
+                pptx.enum.chart.XL_TICK_MARK.INSIDE
+            )
+            self.assertFalse(axis.has_major_gridlines)
+        self.assertEqual(textbox.text_frame.text, "2022.01.01")
+
+    def test_max_points(self) -> None:
+        x = np.arange(10_000, dtype=float)
+        fig = go.Figure(go.Scatter(x=x, y=np.exp(-x / 1000), mode="lines"))
+        prs = pptx.Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        charts.add_chart(slide, fig, 1.0, 2.0, max_points=100)
+        series, = slide.shapes[0].chart.plots[0].series
+        self.assertLessEqual(len(series.values), 102)
+        self.assertEqual(series.values[0], 1.0)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(charts))
+    return tests
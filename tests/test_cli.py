@@ -0,0 +1,157 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import contextlib
+import doctest
+import io
+import json
+import os
+import tempfile
+import typing as t
+
+import plotly.graph_objects as go
+import pptx
+
+from tlab_pptx import cli, metadata
+from tests import helpers
+
+
+_HEADER = (
+    "title,excitation_wavelength,excitation_power,time_range,"
+    "center_wavelength,FWHM,frame,date,h_fig,v_fig,a,b,tau1,tau2"
+)
+
+
+class Test_main(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+        with open(os.path.join(self.directory, "h.json"), "w") as f:
+            f.write(go.Figure(go.Scatter(y=[0, 1])).to_json())
+        with open(os.path.join(self.directory, "v.csv"), "w") as f:
+            f.write("time,decay\n0,1\n1,0.5\n")
+        patcher = mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure)
+        self.render_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _manifest(self, *rows: str) -> str:
+        path = os.path.join(self.directory, "manifest.csv")
+        with open(path, "w") as f:
+            f.write("\n".join([_HEADER, *rows]))
+        return path
+
+    def _main(self, *argv: str) -> tuple[int, str, str]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = cli.main(list(argv))
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    @staticmethod
+    def _row(title: str, tau1: str = "1.2", h_fig: str = "h.json") -> str:
+        return f"{title},400,1,10,480,50,10000,2022-01-01,{h_fig},v.csv,63,37,{tau1},3.6"
+
+    def test_combined(self) -> None:
+        manifest = self._manifest(self._row("Sample 1"), self._row("Sample 2"))
+        output = os.path.join(self.directory, "report.pptx")
+        status, stdout, stderr = self._main(manifest, output, "--profile", "draft")
+        self.assertEqual(status, 0)
+        self.assertIn("2/2 rows built", stdout)
+        self.assertIn("[2/2] Sample 2", stderr)
+        prs = pptx.Presentation(output)
+        self.assertEqual([slide.shapes.title.text for slide in prs.slides], ["Sample 1", "Sample 2"])
+        self.assertEqual(self.render_mock.call_count, 4)
+
+    def test_overview(self) -> None:
+        manifest = self._manifest(self._row("Sample 1"), self._row("Sample 2"))
+        output = os.path.join(self.directory, "report.pptx")
+        status, _, _ = self._main(manifest, output, "--overview", "--quiet")
+        self.assertEqual(status, 0)
+        prs = pptx.Presentation(output)
+        self.assertEqual(
+            [slide.shapes.title.text for slide in prs.slides],
+            ["Overview", "Sample 1", "Sample 2"]
+        )
+
+    def test_split(self) -> None:
+        manifest = self._manifest(self._row("Sample 1"), self._row("Sample/1"), self._row("Sample 1"))
+        output = os.path.join(self.directory, "slides")
+        status, _, _ = self._main(manifest, output, "--split", "--quiet")
+        self.assertEqual(status, 0)
+        self.assertEqual(
+            sorted(os.listdir(output)),
+            ["Sample_1.pptx", "Sample_1_2.pptx", "Sample_1_3.pptx"]
+        )
+
+    def test_embed_spec(self) -> None:
+        manifest = self._manifest(self._row("Sample 1"), self._row("Sample 2", tau1="2.5"))
+        output = os.path.join(self.directory, "report.pptx")
+        status, _, _ = self._main(manifest, output, "--overview", "--embed-spec", "--quiet")
+        self.assertEqual(status, 0)
+        records = metadata.read(output)
+        assert records is not None
+        self.assertEqual(
+            [(record["slide"], record["tau1"]) for record in records],
+            [("2", "1.2"), ("3", "2.5")]
+        )
+        output = os.path.join(self.directory, "slides")
+        status, _, _ = self._main(manifest, output, "--split", "--embed-spec", "--quiet")
+        self.assertEqual(status, 0)
+        records = metadata.read(os.path.join(output, "Sample_2.pptx"))
+        assert records is not None
+        self.assertEqual([(record["slide"], record["tau1"]) for record in records], [("1", "2.5")])
+
+    def test_failed_rows(self) -> None:
+        manifest = self._manifest(
+            self._row("Sample 1"),
+            self._row("Sample 2", tau1="n/a"),
+            self._row("Sample 3", h_fig="missing.json")
+        )
+        output = os.path.join(self.directory, "report.pptx")
+        status, stdout, stderr = self._main(manifest, output, "--quiet")
+        self.assertEqual(status, 1)
+        self.assertIn("1/3 rows built", stdout)
+        self.assertIn("2 rows failed:\n  row 2: invalid tau1: 'n/a'\n  row 3: invalid h_fig: 'missing.json': ", stderr)
+        self.assertEqual(len(pptx.Presentation(output).slides), 1)
+
+    def test_mixed_rows(self) -> None:
+        with open(os.path.join(self.directory, "broken.json"), "w") as f:
+            f.write("{")
+        with open(os.path.join(self.directory, "bad.json"), "w") as f:
+            f.write(go.Figure(layout=dict(title=dict(text="bad"))).to_json())
+
+        def render_figure(fig: dict[str, t.Any], *args: t.Any, **kwargs: t.Any) -> bytes:
+            if fig.get("layout", {}).get("title", {}).get("text") == "bad":
+                raise ValueError("bad figure")
+            return helpers.png()
+
+        self.render_mock.side_effect = render_figure
+        manifest = self._manifest(
+            self._row("Sample 1"),
+            self._row("Sample 2", h_fig="broken.json"),
+            self._row("Sample 3", h_fig="bad.json"),
+            self._row("Sample 4")
+        )
+        output = os.path.join(self.directory, "report.pptx")
+        status, stdout, stderr = self._main(manifest, output, "--overview", "--quiet")
+        self.assertEqual(status, 1)
+        self.assertIn("2/4 rows built", stdout)
+        self.assertIn("2 rows failed:\n  row 2: invalid h_fig: 'broken.json': ", stderr)
+        self.assertIn("\n  row 3: ValueError: bad figure\n", stderr)
+        self.assertEqual(
+            [slide.shapes.title.text for slide in pptx.Presentation(output).slides],
+            ["Overview", "Sample 1", "Sample 4"]
+        )
+
+    def test_invalid_manifest(self) -> None:
+        path = os.path.join(self.directory, "manifest.json")
+        with open(path, "w") as f:
+            json.dump([dict(title="Sample 1")], f)
+        status, _, stderr = self._main(path, os.path.join(self.directory, "report.pptx"))
+        self.assertEqual(status, 2)
+        self.assertIn("Missing columns: excitation_wavelength", stderr)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(cli))
+    return tests
@@ -1,15 +1,19 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 from unittest import TestCase, mock
 import doctest
+import json
 import datetime
+import tempfile
 
+import numpy as np
 import pptx
 import pptx.slide
 import pptx.util
 import pptx.text.text
+import plotly.io
 import plotly.graph_objects as go
 
-from tlab_pptx import common
+from tlab_pptx import caching, common, profiles, sessions
 
 
 class Test_get_date_annotation(TestCase):
@@ -147,16 +151,18 @@ class Test_add_figure(TestCase):
         height: float = 12.0
     ) -> None:
         slide_mock = mock.Mock(spec_set=pptx.slide.Slide)
-        fig_mock = mock.Mock(spec_set=go.Figure)
-        fig_mock.to_image.return_value = b"png_image"
-        common.add_figure(
-            slide_mock,
-            fig_mock,
-            left,
-            top,
-            width,
-            height
-        )
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        fig_json = fig.to_json()
+        with mock.patch("plotly.io.to_image") as to_image_mock:
+            to_image_mock.return_value = b"png_image"
+            common.add_figure(
+                slide_mock,
+                fig,
+                left,
+                top,
+                width,
+                height
+            )
         slide_mock.shapes.add_picture.assert_called_once_with(
             mock.ANY,
             left=pptx.util.Cm(left),
@@ -164,21 +170,13 @@ class Test_add_figure(TestCase):
             width=pptx.util.Cm(width),
             height=pptx.util.Cm(height)
         )
-        fig_mock.update_layout.assert_called_once_with(
-            height=500,
-            width=500,
-            margin=dict(l=10, r=10, t=40, b=20),
-            font=dict(size=18),
-            showlegend=False,
-            template="simple_white"
-        )
-        fig_mock.update_xaxes.assert_called_once_with(
-            ticks="inside", mirror=True, showline=True
-        )
-        fig_mock.update_yaxes.assert_called_once_with(
-            ticks="inside", mirror=True, showline=True
+        to_image_mock.assert_called_once_with(
+            common.get_styled_figure(fig),
+            "png",
+            scale=10,
+            validate=False
         )
-        fig_mock.to_image.assert_called_once_with("png", scale=10)
+        self.assertEqual(fig.to_json(), fig_json)
 
     def test_left(self) -> None:
         lefts = [0, 2.5, 5]
@@ -204,6 +202,162 @@ class Test_add_figure(TestCase):
             with self.subTest(height=height):
                 self._test(height=height)
 
+    def test_chart(self) -> None:
+        slide_mock = mock.Mock(spec_set=pptx.slide.Slide)
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        with mock.patch("tlab_pptx.charts.add_chart") as add_chart_mock:
+            common.add_figure(slide_mock, fig, 1.0, 2.0, profile=profiles.NATIVE)
+        add_chart_mock.assert_called_once_with(
+            slide_mock, fig, 1.0, 2.0, 12.0, 12.0, (), max_points=3780
+        )
+        slide_mock.shapes.add_picture.assert_not_called()
+
+    def test_chart_spec(self) -> None:
+        slide_mock = mock.Mock(spec_set=pptx.slide.Slide)
+        spec = dict(data=[dict(type="scatter", x=[0, 1], y=[1, 0])])
+        with mock.patch("tlab_pptx.charts.add_chart") as add_chart_mock, \
+                mock.patch(
+                    "tlab_pptx.common.to_figure",
+                    wraps=common.to_figure
+                ) as to_figure_mock:
+            common.add_figure(slide_mock, spec, 1.0, 2.0, profile=profiles.NATIVE)
+        to_figure_mock.assert_called_once()
+        fig = add_chart_mock.call_args.args[1]
+        self.assertIsInstance(fig, go.Figure)
+        self.assertEqual(fig.data[0].y, (1, 0))
+
+    def test_chart_fallback(self) -> None:
+        slide_mock = mock.Mock(spec_set=pptx.slide.Slide)
+        fig = go.Figure(go.Heatmap(z=[[0, 1]]))
+        profile = profiles.RenderProfile("test", dpi=200, backend="chart")
+        with mock.patch("tlab_pptx.charts.add_chart") as add_chart_mock, \
+                mock.patch("plotly.io.to_image") as to_image_mock:
+            to_image_mock.return_value = b"png_image"
+            common.add_figure(slide_mock, fig, 1.0, 2.0, profile=profile)
+        add_chart_mock.assert_not_called()
+        slide_mock.shapes.add_picture.assert_called_once()
+        to_image_mock.assert_called_once_with(
+            mock.ANY, "png", scale=1.889764, validate=False
+        )
+
+
+class Test_get_styled_figure(TestCase):
+
+    def test_style(self) -> None:
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        fig.update_layout(margin=dict(pad=4), xaxis2=dict(title="x2"))
+        annotations = [common.get_date_annotation(datetime.date(2022, 1, 1))]
+        styled = common.get_styled_figure(fig, annotations)
+        expected = go.Figure(fig)
+        common.style_figure(expected, annotations)
+        self.assertEqual(
+            json.loads(plotly.io.to_json(styled, validate=False)),
+            json.loads(expected.to_json())
+        )
+
+    def test_not_modified(self) -> None:
+        x = np.arange(1000.0)
+        fig = go.Figure([
+            go.Scatter(x=x, y=x ** 2),
+            go.Heatmap(z=[[0, 1], [1, 0]])
+        ])
+        fig_json = fig.to_json()
+        for _ in range(2):
+            styled = common.get_styled_figure(
+                fig,
+                [dict(text="annotation")]
+            )
+            self.assertEqual(len(styled["layout"]["annotations"]), 1)
+            self.assertNotIn("line", styled["data"][1])
+        self.assertIs(styled["data"][0]["x"], fig.data[0].x)
+        self.assertEqual(fig.to_json(), fig_json)
+
+
+class Test_render_figure(TestCase):
+
+    def test_default(self) -> None:
+        fig_mock = mock.Mock(spec_set=go.Figure)
+        fig_mock.to_image.return_value = b"png_image"
+        self.assertEqual(common.render_figure(fig_mock), b"png_image")
+        fig_mock.to_image.assert_called_once_with("png", scale=10)
+
+    def test_cache(self) -> None:
+        fig_mock = mock.Mock(spec_set=go.Figure)
+        fig_mock.to_image.return_value = b"png_image"
+        fig_mock.to_json.return_value = "{}"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = caching.RenderCache(tmpdir)
+            for _ in range(3):
+                self.assertEqual(
+                    common.render_figure(fig_mock, cache=cache),
+                    b"png_image"
+                )
+            fig_mock.to_image.assert_called_once_with("png", scale=10)
+            stats = cache.stats()
+            self.assertEqual((stats.hits, stats.misses), (2, 1))
+            common.render_figure(
+                fig_mock,
+                profiles.RenderProfile("test", scale=5),
+                cache=cache
+            )
+            self.assertEqual(fig_mock.to_image.call_count, 2)
+            fig_mock.to_image.assert_called_with("png", scale=5)
+
+    def test_session(self) -> None:
+        fig_mock = mock.Mock(spec_set=go.Figure)
+        session_mock = mock.Mock(spec_set=sessions.RendererSession)
+        session_mock.render.return_value = b"png_image"
+        self.assertEqual(
+            common.render_figure(fig_mock, session=session_mock),
+            b"png_image"
+        )
+        session_mock.render.assert_called_once_with(fig_mock, "png", 10)
+        fig_mock.to_image.assert_not_called()
+
+    def test_profile(self) -> None:
+        fig_mock = mock.Mock(spec_set=go.Figure)
+        fig_mock.to_image.return_value = b"png_image"
+        profile = profiles.RenderProfile("test", dpi=254)
+        with mock.patch.object(
+            profiles.RenderProfile,
+            "encode",
+            return_value=b"encoded_image"
+        ) as encode_mock:
+            self.assertEqual(
+                common.render_figure(fig_mock, profile, 12.0, 6.0),
+                b"encoded_image"
+            )
+        fig_mock.to_image.assert_called_once_with("png", scale=2.4)
+        encode_mock.assert_called_once_with(b"png_image")
+
+    def test_decimation(self) -> None:
+        x = np.arange(100_000, dtype=float)
+        fig = go.Figure(go.Scatter(x=x, y=np.sin(x / 1000), mode="lines"))
+        profile = profiles.RenderProfile("test", scale=2, points_per_pixel=1)
+        with mock.patch("plotly.io.to_image") as to_image_mock:
+            to_image_mock.return_value = b"png_image"
+            self.assertEqual(
+                common.render_figure(fig, profile),
+                b"png_image"
+            )
+        fig_dict = to_image_mock.call_args.args[0]
+        self.assertLessEqual(len(fig_dict["data"][0]["x"]), 1002)
+        self.assertEqual(len(fig.data[0].x), 100_000)
+        to_image_mock.assert_called_once_with(
+            fig_dict, "png", scale=2, validate=False
+        )
+
+
+class Test_decimate_figure(TestCase):
+
+    def test_without_data(self) -> None:
+        profile = profiles.RenderProfile("test", scale=2, points_per_pixel=1)
+        fig = dict(layout=dict(title=dict(text="title")))
+        self.assertEqual(
+            common.decimate_figure(fig, profile),
+            dict(fig, data=[])
+        )
+
 
 class Test_add_text(TestCase):
 
@@ -0,0 +1,75 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import typing as t
+
+import pptx
+import pptx.slide
+
+from tlab_pptx import common, compiled, templates
+
+
+def _draw(
+    slide: pptx.slide.Slide,
+    texts: t.Sequence[str],
+    images: t.Sequence[bytes]
+) -> None:
+    common.add_title(slide, texts[0])
+    common.add_text(slide, texts[1], 1.0, 1.0, font_name="Cambria Math")
+
+
+class TestCompiledSlide(TestCase):
+
+    def test_images(self) -> None:
+        prs = templates.open_template()
+        with self.assertRaises(ValueError):
+            compiled.CompiledSlide(prs.slide_layouts[5], _draw, texts=2, images=1)
+
+    def test_matches(self) -> None:
+        prs = templates.open_template()
+        compiled_slide = compiled.CompiledSlide(prs.slide_layouts[5], _draw, texts=2, images=0)
+        self.assertTrue(compiled_slide.matches(prs.slides.add_slide(prs.slide_layouts[5])))
+        self.assertFalse(compiled_slide.matches(prs.slides.add_slide(prs.slide_layouts[6])))
+        self.assertEqual(len(prs.slides), 2)
+
+    def test_fill(self) -> None:
+        prs = templates.open_template()
+        compiled_slide = compiled.CompiledSlide(prs.slide_layouts[5], _draw, texts=2, images=0)
+        for texts in [["a", "b"], ["c\nd", ""]]:
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            compiled_slide.fill(slide, texts, [])
+            self.assertEqual(slide.shapes.title.text_frame.text, texts[0])
+            textbox = slide.shapes[-1]
+            self.assertEqual(textbox.text_frame.text, texts[1])
+            for paragraph in textbox.text_frame.paragraphs:
+                self.assertEqual(paragraph.font.name, "Cambria Math")
+
+
+class Test_get_compiled(TestCase):
+
+    def test_cache(self) -> None:
+        prs = templates.open_template()
+        slides = [prs.slides.add_slide(prs.slide_layouts[i]) for i in [5, 5, 0]]
+        first, second, other = [
+            compiled.get_compiled("test", slide, _draw, 2, 0) for slide in slides
+        ]
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertTrue(other.matches(slides[2]))
+
+    def test_max_compiled(self) -> None:
+        prs = templates.open_template()
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        first = compiled.get_compiled("first", slide, _draw, 2, 0)
+        for i in range(compiled.MAX_COMPILED):
+            compiled.get_compiled(i, slide, _draw, 2, 0)
+        self.assertLessEqual(len(compiled._compiled), compiled.MAX_COMPILED)
+        self.assertIsNot(
+            compiled.get_compiled("first", slide, _draw, 2, 0),
+            first
+        )
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(compiled))
+    return tests
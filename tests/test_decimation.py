@@ -0,0 +1,79 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import typing as t
+
+import numpy as np
+
+from tlab_pptx import decimation
+
+
+class Test_lttb(TestCase):
+
+    def test_short(self) -> None:
+        x = np.arange(10.0)
+        for n_out in [2, 10, 20]:
+            with self.subTest(n_out=n_out):
+                np.testing.assert_array_equal(
+                    decimation.lttb(x, x, n_out),
+                    np.arange(10)
+                )
+
+    def test_decay(self) -> None:
+        rng = np.random.default_rng(0)
+        x = np.linspace(0.0, 100.0, 1_000_001)
+        y = np.exp(-x / 10) + rng.normal(0.0, 1e-3, len(x))
+        y[123_457] = 2.0
+        selected = decimation.lttb(x, y, 2000)
+        self.assertLessEqual(len(selected), 2002)
+        self.assertTrue(np.all(np.diff(selected) > 0))
+        self.assertEqual(selected[0], 0)
+        self.assertEqual(selected[-1], len(x) - 1)
+        self.assertIn(123_457, selected)
+        self.assertIn(np.argmin(y), selected)
+        segment = slice(300_000, 1_000_001)
+        interpolated = np.interp(x[segment], x[selected], y[selected])
+        self.assertLess(np.max(np.abs(interpolated - y[segment])), 0.01)
+
+
+class Test_decimate(TestCase):
+
+    def test_decimate(self) -> None:
+        x = np.arange(100_000, dtype=float)
+        fig_dict: dict[str, t.Any] = dict(data=[
+            dict(type="scatter", x=x, y=np.sin(x / 100), mode="lines"),
+            dict(type="scatter", x=x, y=x, mode="markers"),
+            dict(type="scatter", x=x[::-1], y=x),
+            dict(type="scatter", y=[0.0, 1.0]),
+        ])
+        stats = decimation.decimate(fig_dict, 1000)
+        self.assertLessEqual(len(fig_dict["data"][0]["x"]), 1002)
+        self.assertEqual(len(fig_dict["data"][1]["x"]), 100_000)
+        self.assertEqual(len(fig_dict["data"][2]["x"]), 100_000)
+        self.assertEqual(stats.points_in, 300_002)
+        self.assertEqual(
+            stats.points_out,
+            len(fig_dict["data"][0]["x"]) + 200_002
+        )
+        self.assertAlmostEqual(
+            stats.ratio,
+            stats.points_in / stats.points_out
+        )
+
+    def test_unsupported(self) -> None:
+        traces: list[dict[str, t.Any]] = [
+            dict(type="heatmap", z=[[0.0]]),
+            dict(type="scatter", y=["a"] * 10),
+            dict(type="scatter", y=[0.0] * 10, error_y=dict(array=[1] * 10)),
+            dict(type="scatter", y=[0.0] * 9 + [float("nan")]),
+        ]
+        for trace in traces:
+            with self.subTest(trace=trace):
+                fig_dict: dict[str, t.Any] = dict(data=[dict(trace)])
+                decimation.decimate(fig_dict, 3)
+                self.assertEqual(fig_dict["data"][0], trace)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(decimation))
+    return tests
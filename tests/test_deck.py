@@ -0,0 +1,461 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import asyncio
+import doctest
+import io
+import os
+import tempfile
+import zipfile
+import tracemalloc
+import concurrent.futures
+import dataclasses
+import typing as t
+
+import PIL.Image
+import pptx
+import pptx.presentation
+import pptx.shapes.picture
+import pptx.slide
+import plotly.graph_objects as go
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    deck,
+    incremental,
+    metadata,
+    photo_luminescence as pl,
+    common,
+    profiles,
+    rendering,
+    sessions,
+    templates
+)
+from tests import helpers
+
+
+class _SingleSlidePresentation(abstract.AbstractPresentation):
+
+    def build(self) -> pptx.presentation.Presentation:
+        raise NotImplementedError
+
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        assert isinstance(slide, pptx.slide.Slide)
+        return slide
+
+    def save(self, filepath_or_buffer: common.FilePathOrBuffer) -> None:
+        raise NotImplementedError
+
+
+class TestDeck_build(TestCase):
+
+    def _build(
+        self,
+        presentations: list[abstract.AbstractPresentation],
+        images: list[bytes]
+    ) -> pptx.presentation.Presentation:
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            side_effect=images
+        ):
+            return deck.Deck(presentations).build()
+
+    def test_slides(self) -> None:
+        titles = [f"title{i}" for i in range(3)]
+        prs = self._build(
+            [helpers.presentation(title) for title in titles],
+            [helpers.png(i) for i in range(2 * len(titles))]
+        )
+        self.assertEqual(len(prs.slides), len(titles))
+        for slide, title in zip(prs.slides, titles):
+            self.assertEqual(slide.shapes.title.text, title)
+        with io.BytesIO() as f:
+            prs.save(f)
+            reloaded = pptx.Presentation(f)
+        blobs = [
+            shape.image.blob
+            for slide in reloaded.slides
+            for shape in slide.shapes
+            if isinstance(shape, pptx.shapes.picture.Picture)
+        ]
+        self.assertEqual(blobs, [helpers.png(i) for i in range(2 * len(titles))])
+
+    def test_shared_image(self) -> None:
+        prs = self._build(
+            [helpers.presentation(), helpers.presentation()],
+            [helpers.png(0)] * 4
+        )
+        partnames = {
+            part.partname
+            for part in prs.part.package.iter_parts()
+            if part.partname.startswith("/ppt/media/")
+        }
+        self.assertEqual(len(partnames), 1)
+
+    def test_template(self) -> None:
+        with mock.patch(
+            "tlab_pptx.templates.open_template",
+            wraps=templates.open_template
+        ) as presentation_mock:
+            self._build(
+                [helpers.presentation() for _ in range(3)],
+                [helpers.png(i) for i in range(6)]
+            )
+        presentation_mock.assert_called_once_with(None)
+
+    def test_workers(self) -> None:
+        images = iter([helpers.png(i) for i in range(6)])
+
+        def submit(
+            figure: common.PlacedFigure,
+            profile: profiles.RenderProfile
+        ) -> concurrent.futures.Future[bytes]:
+            future: concurrent.futures.Future[bytes] = concurrent.futures.Future()
+            future.set_result(next(images))
+            return future
+
+        with mock.patch("tlab_pptx.rendering.RenderPool") as pool_mock:
+            pool = pool_mock.return_value.__enter__.return_value
+            pool.submit.side_effect = submit
+            prs = deck.Deck([helpers.presentation() for _ in range(3)]).build(
+                workers=2
+            )
+        pool_mock.assert_called_once_with(2, cache=None)
+        self.assertEqual(pool.submit.call_count, 6)
+        blobs = [
+            shape.image.blob
+            for slide in prs.slides
+            for shape in slide.shapes
+            if isinstance(shape, pptx.shapes.picture.Picture)
+        ]
+        self.assertEqual(blobs, [helpers.png(i) for i in range(6)])
+
+    def test_nested(self) -> None:
+        inner = deck.Deck([_SingleSlidePresentation()] * 2)
+        prs = deck.Deck([_SingleSlidePresentation(), inner]).build()
+        self.assertEqual(len(prs.slides), 3)
+        with self.assertRaises(ValueError):
+            deck.Deck([deck.Deck([])]).build()
+
+    def test_abstract(self) -> None:
+        class NoSlide(abstract.AbstractPresentation):
+
+            def build(self) -> pptx.presentation.Presentation:
+                raise NotImplementedError
+
+            def save(self, filepath_or_buffer: common.FilePathOrBuffer) -> None:
+                raise NotImplementedError
+
+        with self.assertRaises(TypeError):
+            NoSlide()  # type: ignore[abstract]
+
+
+class TestDeck_build_async(TestCase):
+
+    def test_slides(self) -> None:
+        presentations = [helpers.presentation(f"title{i}") for i in range(5)]
+        figures = [
+            figure.fig for p in presentations for figure in p.figures()
+        ]
+
+        def submit(
+            figure: common.PlacedFigure,
+            profile: profiles.RenderProfile
+        ) -> concurrent.futures.Future[bytes]:
+            future: concurrent.futures.Future[bytes] = concurrent.futures.Future()
+            future.set_result(helpers.png(next(
+                i for i, fig in enumerate(figures) if fig is figure.fig
+            )))
+            return future
+
+        pool = mock.Mock(spec=rendering.RenderPool, workers=1)
+        pool.submit.side_effect = submit
+        prs = asyncio.run(deck.Deck(presentations).build_async(pool=pool))
+        self.assertEqual(
+            [slide.shapes.title.text for slide in prs.slides],
+            [p.title for p in presentations]
+        )
+        blobs = [
+            shape.image.blob
+            for slide in prs.slides
+            for shape in slide.shapes
+            if isinstance(shape, pptx.shapes.picture.Picture)
+        ]
+        self.assertEqual(blobs, [helpers.png(i) for i in range(len(figures))])
+        pool.shutdown.assert_not_called()
+
+    def test_nested(self) -> None:
+        pool = mock.Mock(spec=rendering.RenderPool, workers=1)
+        inner = deck.Deck([_SingleSlidePresentation()] * 2)
+        prs = asyncio.run(deck.Deck([inner]).build_async(pool=pool))
+        self.assertEqual(len(prs.slides), 2)
+
+
+class TestDeck_save(TestCase):
+
+    def test_filepath_or_buffer(self) -> None:
+        deck_ = deck.Deck([helpers.presentation()])
+        with mock.patch("tlab_pptx.deck.Deck.build") as build_mock:
+            with io.BytesIO() as f:
+                deck_.save(f)
+                build_mock.return_value.save.assert_called_once_with(f)
+
+    def test_embed_spec(self) -> None:
+        presentations = [_SingleSlidePresentation(), helpers.presentation("title1"), helpers.presentation("title2")]
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming), mock.patch(
+                "tlab_pptx.common.render_figure",
+                side_effect=lambda *args, **kwargs: helpers.png(0)
+            ), io.BytesIO() as f:
+                deck.Deck(presentations).save(f, streaming=streaming, embed_spec=True)
+                records = metadata.read(f)
+            assert records is not None
+            self.assertEqual(
+                [(record["slide"], record["title"]) for record in records],
+                [("2", "title1"), ("3", "title2")]
+            )
+
+    def test_embed_spec_generator(self) -> None:
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming), mock.patch(
+                "tlab_pptx.common.render_figure",
+                side_effect=lambda *args, **kwargs: helpers.png(0)
+            ), io.BytesIO() as f:
+                deck.Deck(
+                    helpers.presentation(f"title{i}") for i in range(2)
+                ).save(f, streaming=streaming, embed_spec=True)
+                records = metadata.read(f)
+                self.assertEqual(len(pptx.Presentation(f).slides), 2)
+            assert records is not None
+            self.assertEqual(
+                [(record["slide"], record["title"]) for record in records],
+                [("1", "title0"), ("2", "title1")]
+            )
+
+
+class TestDeck_update(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "deck.pptx")
+
+    def _update(
+        self,
+        presentations: list[abstract.AbstractPresentation]
+    ) -> tuple[incremental.UpdateStats, int]:
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            side_effect=lambda fig, *args, **kwargs: helpers.png(len(fig["data"]))
+        ) as render_mock:
+            stats = deck.Deck(presentations).update(self.path)
+        return stats, render_mock.call_count
+
+    def _members(self) -> dict[str, bytes]:
+        with zipfile.ZipFile(self.path) as f:
+            return {name: f.read(name) for name in f.namelist()}
+
+    def test_unchanged(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [
+            helpers.presentation(f"title{i}") for i in range(3)
+        ]
+        self.assertEqual(
+            self._update(presentations),
+            (incremental.UpdateStats(reused=0, rebuilt=3, removed=0), 6)
+        )
+        expected = self._members()
+        self.assertEqual(
+            self._update(presentations),
+            (incremental.UpdateStats(reused=3, rebuilt=0, removed=0), 0)
+        )
+        self.assertEqual(self._members(), expected)
+
+    def test_changed(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [
+            helpers.presentation(f"title{i}") for i in range(3)
+        ]
+        self._update(presentations)
+        expected = self._members()
+        presentations[1] = dataclasses.replace(
+            helpers.presentation("title1"),
+            tau1=2.0,
+            h_fig=go.Figure(go.Scatter(y=[0, 1]))
+        )
+        self.assertEqual(
+            self._update(presentations[::-1] + [helpers.presentation("title3")]),
+            (incremental.UpdateStats(reused=2, rebuilt=2, removed=1), 4)
+        )
+        prs = pptx.Presentation(self.path)
+        self.assertEqual(
+            [slide.shapes.title.text for slide in prs.slides],
+            ["title2", "title1", "title0", "title3"]
+        )
+        self.assertIn("τ₁ = 2 ns", [
+            shape.text_frame.text.split("\n")[0]
+            for shape in prs.slides[1].shapes if shape.has_text_frame
+        ])
+        actual = self._members()
+        self.assertEqual(actual["ppt/slides/slide1.xml"], expected["ppt/slides/slide3.xml"])
+        for name in expected:
+            if name.startswith("ppt/media/"):
+                self.assertEqual(actual[name], expected[name])
+
+    def test_embed_spec(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [
+            helpers.presentation(f"title{i}") for i in range(2)
+        ]
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            side_effect=lambda *args, **kwargs: helpers.png(0)
+        ):
+            deck.Deck(presentations).update(self.path, embed_spec=True)
+            deck.Deck(presentations[::-1]).update(self.path, embed_spec=True)
+            records = metadata.read(self.path)
+            assert records is not None
+            self.assertEqual(
+                [(record["slide"], record["title"]) for record in records],
+                [("1", "title1"), ("2", "title0")]
+            )
+            deck.Deck(presentations).update(self.path)
+        self.assertIsNone(metadata.read(self.path))
+
+    def test_keys(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [helpers.presentation()]
+        keys = [presentations[0].get_spec_key(profiles.ORIGINAL)]
+        self._update(presentations)
+        with mock.patch.object(pl.Presentation, "get_spec_key") as get_spec_key_mock:
+            self.assertEqual(
+                deck.Deck(presentations).update(self.path, keys=keys),
+                incremental.UpdateStats(reused=1, rebuilt=0, removed=0)
+            )
+            get_spec_key_mock.assert_not_called()
+        with self.assertRaises(ValueError):
+            deck.Deck(presentations).update(self.path, keys=keys * 2)
+
+    def test_unkeyed(self) -> None:
+        presentations = [helpers.presentation(), _SingleSlidePresentation()]
+        self._update(presentations)
+        self.assertEqual(
+            self._update(presentations)[0],
+            incremental.UpdateStats(reused=1, rebuilt=1, removed=1)
+        )
+
+    def test_concurrent(self) -> None:
+        presentations = [helpers.presentation(f"title{i}") for i in range(4)]
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            side_effect=helpers.render_figure
+        ), concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(
+                lambda i: deck.Deck(presentations[:i]).update(self.path),
+                range(1, 5)
+            ))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["deck.pptx"])
+        self.assertIn(len(pptx.Presentation(self.path).slides), range(1, 5))
+
+
+class TestDeckWriter(TestCase):
+
+    def _save(
+        self,
+        presentations: list[abstract.AbstractPresentation],
+        images: list[bytes],
+        streaming: bool,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL
+    ) -> dict[str, bytes]:
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            side_effect=images
+        ), io.BytesIO() as f:
+            deck.Deck(presentations).save(f, profile=profile, streaming=streaming)
+            with zipfile.ZipFile(f) as zf:
+                return {name: zf.read(name) for name in zf.namelist()}
+
+    def test_equivalent(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [
+            helpers.presentation(f"title{i}") for i in range(3)
+        ]
+        images = [helpers.png(0), helpers.png(1), helpers.png(0), helpers.png(2), helpers.png(3), helpers.png(1)]
+        expected = self._save(presentations, images, streaming=False)
+        actual = self._save(presentations, images, streaming=True)
+        self.assertEqual(sorted(actual), sorted(expected))
+        for name, blob in expected.items():
+            self.assertEqual(actual[name], blob, name)
+
+    def test_chart(self) -> None:
+        presentations: list[abstract.AbstractPresentation] = [
+            pl.Presentation(
+                **{
+                    **helpers.presentation(f"title{i}").__dict__,
+                    "h_fig": go.Figure(go.Scatter(x=[0, 1, 2], y=[i, 1, 0])),
+                }
+            )
+            for i in range(2)
+        ]
+        images = [helpers.png(i) for i in range(2)]
+        expected = self._save(presentations, images, False, profiles.NATIVE)
+        actual = self._save(presentations, images, True, profiles.NATIVE)
+        self.assertEqual(sorted(actual), sorted(expected))
+        for name, blob in expected.items():
+            # The embedded workbooks carry their creation time.
+            if not name.startswith("ppt/embeddings/"):
+                self.assertEqual(actual[name], blob, name)
+        self.assertTrue(any(name.startswith("ppt/charts/") for name in actual))
+
+    def test_shared_image(self) -> None:
+        with io.BytesIO() as f:
+            with deck.DeckWriter(f) as writer:
+                for i in range(3):
+                    helpers.presentation(f"title{i}").add_slide(writer.prs, images=[helpers.png(0), helpers.png(0)])
+                    writer.flush()
+            f.seek(0)
+            prs = pptx.Presentation(f)
+        blobs = [
+            shape.image.blob
+            for slide in prs.slides
+            for shape in slide.shapes
+            if isinstance(shape, pptx.shapes.picture.Picture)
+        ]
+        self.assertEqual(blobs, [helpers.png(0)] * 6)
+
+    def test_memory(self) -> None:
+        def peak(slides: int) -> int:
+            images = (
+                PIL.Image.effect_noise((256, 256), 64).tobytes() + bytes([i % 256, i // 256])
+                for i in range(2 * slides)
+            )
+
+            def render_figure(*args: object, **kwargs: object) -> bytes:
+                with io.BytesIO() as f:
+                    PIL.Image.frombytes("L", (256, 256), next(images)).save(f, "png")
+                    return f.getvalue()
+
+            with mock.patch("tlab_pptx.common.render_figure", new=render_figure), \
+                    tempfile.TemporaryDirectory() as tmpdir:
+                tracemalloc.start()
+                try:
+                    deck.Deck(
+                        helpers.presentation() for _ in range(slides)
+                    ).save(os.path.join(tmpdir, "deck.pptx"), streaming=True)
+                    return tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+        peak(2)
+        small, large = peak(8), peak(32)
+        # Keeping the 48 additional images in memory would take 3 MB.
+        self.assertLess(large - small, 0.5 * 48 * 256 * 256)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(deck))
+    return tests
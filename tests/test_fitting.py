@@ -0,0 +1,142 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import datetime
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+
+from tlab_pptx import fitting, photo_luminescence as pl
+
+
+def _truth(
+    t: np.ndarray,
+    irf: np.ndarray | None = None,
+    curves: int = 50
+) -> fitting.DecayFit:
+    rng = np.random.default_rng(0)
+    a = rng.uniform(20.0, 80.0, curves)
+    return fitting.DecayFit(
+        time=t,
+        amplitudes=np.stack([a, 100.0 - a], axis=1),
+        tau1=rng.uniform(0.3, 1.5, curves),
+        tau2=rng.uniform(2.5, 8.0, curves),
+        offset=rng.uniform(0.0, 5.0, curves),
+        rss=np.zeros(curves),
+        success=np.ones(curves, dtype=bool),
+        irf=irf
+    )
+
+
+class Test_fit_biexponential(TestCase):
+
+    def _assert_fit(self, fit: fitting.DecayFit, truth: fitting.DecayFit) -> None:
+        self.assertTrue(fit.success.all())
+        np.testing.assert_allclose(fit.tau1, truth.tau1, rtol=1e-6)
+        np.testing.assert_allclose(fit.tau2, truth.tau2, rtol=1e-6)
+        np.testing.assert_allclose(fit.amplitudes, truth.amplitudes, rtol=1e-6)
+        np.testing.assert_allclose(fit.offset, truth.offset, atol=1e-6)
+        np.testing.assert_array_equal(fit.a, truth.a)
+        np.testing.assert_array_equal(fit.a + fit.b, 100)
+
+    def test_exact(self) -> None:
+        truth = _truth(np.linspace(0.0, 20.0, 256))
+        self._assert_fit(fitting.fit_biexponential(truth.time, truth.curves()), truth)
+
+    def test_irf(self) -> None:
+        t = np.linspace(-2.0, 20.0, 256)
+        truth = _truth(t, np.exp(-0.5 * (t / 0.15) ** 2))
+        fit = fitting.fit_biexponential(t, truth.curves(), irf=truth.irf)
+        self._assert_fit(fit, truth)
+        np.testing.assert_allclose(fit.curves(), truth.curves(), atol=1e-6)
+
+    def test_chunks(self) -> None:
+        truth = _truth(np.linspace(0.0, 20.0, 128), curves=5)
+        fit = fitting.fit_biexponential(truth.time, truth.curves())
+        chunk_size = fitting.CHUNK_SIZE
+        try:
+            fitting.CHUNK_SIZE = 2
+            chunked = fitting.fit_biexponential(truth.time, truth.curves())
+        finally:
+            fitting.CHUNK_SIZE = chunk_size
+        np.testing.assert_allclose(chunked.tau1, fit.tau1)
+        np.testing.assert_allclose(chunked.tau2, fit.tau2)
+
+    def test_noise(self) -> None:
+        truth = _truth(np.linspace(0.0, 20.0, 512), curves=200)
+        rng = np.random.default_rng(1)
+        curves = rng.poisson(truth.curves() * 50.0) / 50.0
+        fit = fitting.fit_biexponential(truth.time, curves)
+        self.assertGreater(fit.success.mean(), 0.95)
+        self.assertLess(np.median(np.abs(fit.tau2 / truth.tau2 - 1.0)), 0.05)
+        self.assertLess(np.median(np.abs(fit.a - truth.a)), 5)
+
+    def test_single(self) -> None:
+        t = np.linspace(0.0, 10.0, 100)
+        fit = fitting.fit_biexponential(t, np.exp(-t) + np.exp(-t / 5.0), offset=False)
+        self.assertEqual(fit.amplitudes.shape, (1, 2))
+        np.testing.assert_allclose([fit.tau1[0], fit.tau2[0]], [1.0, 5.0])
+
+    def test_invalid(self) -> None:
+        t = np.linspace(0.0, 10.0, 100)
+        cases = [
+            (t[:3], np.zeros((1, 3)), None),
+            (t, np.zeros((1, 99)), None),
+            (t[::-1], np.zeros((1, 100)), None),
+            (t ** 2, np.zeros((1, 100)), np.ones(100)),
+            (t, np.zeros((1, 100)), np.ones(99)),
+            (t, np.zeros((1, 100)), np.zeros(100)),
+        ]
+        for t_, curves, irf in cases:
+            with self.subTest(t=t_.shape, curves=curves.shape), self.assertRaises(ValueError):
+                fitting.fit_biexponential(t_, curves, irf=irf)
+
+
+class TestDecayFit_to_frame(TestCase):
+
+    def test_presentations(self) -> None:
+        truth = _truth(np.linspace(0.0, 20.0, 128), curves=2)
+        fit = fitting.fit_biexponential(truth.time, truth.curves())
+        frame = fit.to_frame(index=["x", "y"])
+        self.assertEqual(frame.columns.tolist(), ["a", "b", "tau1", "tau2"])
+        self.assertEqual(frame.index.tolist(), ["x", "y"])
+        frame["title"] = ["x", "y"]
+        for name, value in dict(
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=20,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=go.Figure(),
+        ).items():
+            frame[name] = [value] * 2
+        frame["v_fig"] = [
+            fitting.overlay_fit(go.Figure(go.Scatter(x=truth.time, y=curve)), truth.time, fitted)
+            for curve, fitted in zip(truth.curves(), fit.curves())
+        ]
+        presentations = pl.Presentation.from_frame(frame)
+        self.assertEqual(
+            [(p.a, p.b, p.tau1) for p in presentations],
+            [(a, b, tau1) for a, b, tau1 in zip(fit.a, fit.b, fit.tau1)]
+        )
+
+
+class Test_overlay_fit(TestCase):
+
+    def test_specs(self) -> None:
+        spec = dict(data=[dict(type="scatter", y=[3, 2, 1])], layout=dict(title="decay"))
+        for fig in [go.Figure(spec), spec, json.dumps(spec).encode()]:
+            with self.subTest(fig=type(fig)):
+                overlaid = fitting.overlay_fit(fig, [0, 1, 2], [3.0, 2.0, 1.0])
+                self.assertEqual(len(overlaid["data"]), 2)
+                np.testing.assert_array_equal(overlaid["data"][1]["y"], [3.0, 2.0, 1.0])
+                go.Figure(overlaid)
+        self.assertEqual(len(spec["data"]), 1)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(fitting))
+    return tests
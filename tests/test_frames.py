@@ -0,0 +1,87 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from tlab_pptx import frames
+
+
+class Test_converters(TestCase):
+
+    def test_to_int(self) -> None:
+        series = frames.to_int(pd.Series([1.9, "2", -3.5, "x", None, float("inf")]))
+        self.assertEqual(series.tolist()[:3], [1, 2, -3])
+        self.assertEqual(series.isna().tolist(), [False] * 3 + [True] * 3)
+
+    def test_to_float(self) -> None:
+        series = frames.to_float(pd.Series([0.5, "1e-3", "x"]))
+        self.assertEqual(series.tolist()[:2], [0.5, 0.001])
+        self.assertTrue(series.isna()[2])
+
+    def test_to_str(self) -> None:
+        series = frames.to_str(pd.Series(["a", 1, None]))
+        self.assertEqual(series.tolist()[:2], ["a", "1"])
+        self.assertTrue(series.isna()[2])
+
+    def test_to_date(self) -> None:
+        series = frames.to_date(pd.Series([
+            datetime.date(2022, 1, 1),
+            "2022-02-03",
+            pd.Timestamp("2022-03-04"),
+            "x"
+        ]))
+        self.assertEqual(series.tolist()[:3], [
+            datetime.date(2022, 1, 1),
+            datetime.date(2022, 2, 3),
+            datetime.date(2022, 3, 4)
+        ])
+        self.assertTrue(series.isna()[3])
+
+    def test_to_date_mixed(self) -> None:
+        series = frames.to_date(pd.Series(["2022-01-01", "02/03/2022", "2022.03.04"]))
+        self.assertEqual(series.tolist(), [
+            datetime.date(2022, 1, 1),
+            datetime.date(2022, 2, 3),
+            datetime.date(2022, 3, 4)
+        ])
+
+    def test_to_figure(self) -> None:
+        fig = go.Figure()
+        series = frames.to_figure(pd.Series([fig, {"data": []}, b"{}", "{}", None]))
+        self.assertIs(series[0], fig)
+        self.assertEqual(series.isna().tolist(), [False] * 3 + [True] * 2)
+
+
+class Test_coerce(TestCase):
+
+    def test_missing(self) -> None:
+        frame = pd.DataFrame(dict(x=[1]))
+        with self.assertRaisesRegex(ValueError, "Missing columns: y, z"):
+            frames.coerce(frame, dict(x=frames.to_int, y=frames.to_int, z=frames.to_str))
+
+    def test_invalid(self) -> None:
+        frame = pd.DataFrame(
+            dict(x=["a", 1, 2, None], y=["b", "c", "d", None]),
+            index=["p", "q", "r", "q"]
+        )
+        with self.assertRaises(frames.InvalidRowsError) as cm:
+            frames.coerce(frame, dict(x=frames.to_int, y=frames.to_str))
+        self.assertEqual(cm.exception.errors, {
+            "p": ["invalid x: 'a'"],
+            "q": ["invalid x: None", "invalid y: None"],
+        })
+
+    def test_index(self) -> None:
+        frame = pd.DataFrame(dict(x=["1", 2.5], y=[0, 1]), index=[3, 3])
+        coerced = frames.coerce(frame, dict(x=frames.to_int))
+        self.assertEqual(coerced.index.tolist(), [3, 3])
+        self.assertEqual(coerced.columns.tolist(), ["x"])
+        self.assertEqual(coerced["x"].tolist(), [1, 2])
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(frames))
+    return tests
@@ -0,0 +1,94 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import io
+
+import pptx
+import plotly.graph_objects as go
+
+from tlab_pptx import common, incremental, profiles, templates
+
+
+class Test_make_spec_key(TestCase):
+
+    def test_inputs(self) -> None:
+        fig = go.Figure(go.Scatter(y=[0, 1]))
+        figure = common.PlacedFigure(fig, 0.0, 0.0)
+        key = incremental.make_spec_key("slide", ["a"], [figure], profiles.SCREEN)
+        for other in [
+            incremental.make_spec_key("other", ["a"], [figure], profiles.SCREEN),
+            incremental.make_spec_key("slide", ["b"], [figure], profiles.SCREEN),
+            incremental.make_spec_key("slide", ["a"], [], profiles.SCREEN),
+            incremental.make_spec_key(
+                "slide",
+                ["a"],
+                [common.PlacedFigure(go.Figure(go.Scatter(y=[0, 2])), 0.0, 0.0)],
+                profiles.SCREEN
+            ),
+            incremental.make_spec_key(
+                "slide",
+                ["a"],
+                [common.PlacedFigure(fig, 1.0, 0.0)],
+                profiles.SCREEN
+            ),
+        ]:
+            self.assertNotEqual(other, key)
+        self.assertEqual(
+            incremental.make_spec_key(
+                "slide",
+                ["a"],
+                [common.PlacedFigure(fig.to_dict(), 0.0, 0.0)],
+                profiles.SCREEN
+            ),
+            key
+        )
+
+
+class Test_set_slide_key(TestCase):
+
+    def test_saved(self) -> None:
+        prs = templates.open_template()
+        slides = [prs.slides.add_slide(prs.slide_layouts[6]) for _ in range(2)]
+        incremental.set_slide_key(slides[1], "key")
+        with io.BytesIO() as f:
+            prs.save(f)
+            loaded = pptx.Presentation(f)
+        self.assertEqual(
+            [incremental.get_slide_key(slide) for slide in loaded.slides],
+            [None, "key"]
+        )
+
+
+class Test_renumber_slides(TestCase):
+
+    def test_partnames(self) -> None:
+        prs = templates.open_template()
+        slides = [prs.slides.add_slide(prs.slide_layouts[6]) for _ in range(3)]
+        for i, slide in enumerate(slides):
+            incremental.set_slide_key(slide, str(i))
+        sld_id_lst = prs.slides._sldIdLst
+        sld_id_lst[:] = list(reversed(sld_id_lst.sldId_lst))
+        incremental.renumber_slides(prs)
+        self.assertEqual(
+            [
+                (slide.part.partname, incremental.get_slide_key(slide))
+                for slide in prs.slides
+            ],
+            [
+                ("/ppt/slides/slide1.xml", "2"),
+                ("/ppt/slides/slide2.xml", "1"),
+                ("/ppt/slides/slide3.xml", "0"),
+            ]
+        )
+        self.assertEqual(
+            sorted(
+                part.partname for part in prs.part.package.iter_parts()
+                if part.partname.startswith("/ppt/tags/")
+            ),
+            [f"/ppt/tags/spec{i}.xml" for i in range(1, 4)]
+        )
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(incremental))
+    return tests
@@ -0,0 +1,112 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import contextlib
+import doctest
+import io
+import os
+import tempfile
+
+import pptx
+
+from tlab_pptx import index, metadata, photo_luminescence as pl
+from tests import helpers
+
+
+class TestIndex(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = os.path.join(tmpdir.name, "decks")
+        os.makedirs(os.path.join(self.directory, "2022"))
+        self.index = index.Index(os.path.join(tmpdir.name, "index.sqlite"))
+        self.addCleanup(self.index.close)
+
+    def _save(self, name: str, *presentations: pl.Presentation) -> str:
+        path = os.path.join(self.directory, name)
+        prs = pptx.Presentation()
+        for _ in presentations:
+            prs.slides.add_slide(prs.slide_layouts[6])
+        metadata.embed(prs, metadata.make_records(presentations))
+        prs.save(path)
+        return path
+
+    def _titles(self, where: str = "1", parameters: tuple[object, ...] = ()) -> list[str]:
+        return [slide["title"] for slide in self.index.select(where, parameters)]
+
+    def test_scan(self) -> None:
+        self._save("a.pptx", helpers.presentation("a1", tau1=2.5), helpers.presentation("a2"))
+        self._save("2022/b.pptx", helpers.presentation("b1", excitation_wavelength=480, tau1=3.0))
+        pptx.Presentation().save(os.path.join(self.directory, "plain.pptx"))
+        with open(os.path.join(self.directory, "broken.pptx"), "wb") as f:
+            f.write(b"not a zip file")
+        with self.assertLogs("tlab_pptx.index", "WARNING"):
+            stats = self.index.scan(self.directory)
+        self.assertEqual(stats, index.ScanStats(added=3, updated=0, unchanged=0, removed=0, failed=1))
+        self.assertEqual(self._titles(), ["b1", "a1", "a2"])
+        self.assertEqual(self._titles("tau1 > ? AND excitation_wavelength = ?", (2, 400)), ["a1"])
+        [slide] = self.index.select("title = 'a2'")
+        self.assertEqual(slide["path"], os.path.join(self.directory, "a.pptx"))
+        self.assertEqual(slide["slide"], 2)
+        self.assertEqual(slide["kind"], "tlab_pptx.photo_luminescence.Presentation")
+        self.assertEqual((slide["excitation_wavelength"], slide["tau1"]), (400, 1.0))
+        self.assertEqual((slide["FWHM"], slide["date"]), (48.0, "2022-01-01"))
+
+    def test_rescan(self) -> None:
+        path = self._save("a.pptx", helpers.presentation("a1", tau1=2.5))
+        self._save("2022/b.pptx", helpers.presentation("b1", excitation_wavelength=480, tau1=3.0))
+        self.index.scan(self.directory)
+        with mock.patch("tlab_pptx.metadata.parse", wraps=metadata.parse) as parse_mock:
+            self.assertEqual(
+                self.index.scan(self.directory),
+                index.ScanStats(added=0, updated=0, unchanged=2, removed=0, failed=0)
+            )
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(
+                self.index.scan(self.directory),
+                index.ScanStats(added=0, updated=0, unchanged=2, removed=0, failed=0)
+            )
+            parse_mock.assert_not_called()
+            self._save("a.pptx", helpers.presentation("a1", tau1=1.5))
+            os.remove(os.path.join(self.directory, "2022", "b.pptx"))
+            self.assertEqual(
+                self.index.scan(self.directory),
+                index.ScanStats(added=0, updated=1, unchanged=0, removed=1, failed=0)
+            )
+            parse_mock.assert_called_once()
+        self.assertEqual([slide["tau1"] for slide in self.index.select()], [1.5])
+
+    def test_other_directory(self) -> None:
+        self._save("a.pptx", helpers.presentation("a1", tau1=2.5))
+        self._save("2022/b.pptx", helpers.presentation("b1", excitation_wavelength=480, tau1=3.0))
+        self.index.scan(self.directory)
+        self.index.scan(os.path.join(self.directory, "2022"))
+        self.assertEqual(sorted(self._titles()), ["a1", "b1"])
+
+
+class Test_main(TestCase):
+
+    def test_query(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            prs = pptx.Presentation()
+            prs.slides.add_slide(prs.slide_layouts[6])
+            metadata.embed(prs, metadata.make_records([helpers.presentation("a1", tau1=2.5)]))
+            prs.save(os.path.join(directory, "a.pptx"))
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), \
+                    self.assertLogs("tlab_pptx.index"):
+                status = index.main([
+                    os.path.join(directory, "index.sqlite"),
+                    "--scan", directory,
+                    "--where", "tau1 > 2"
+                ])
+        self.assertEqual(status, 0)
+        header, row = stdout.getvalue().splitlines()
+        self.assertEqual(header.split("\t")[:3], ["path", "slide", "title"])
+        self.assertEqual(row.split("\t")[1:3], ["1", "a1"])
+        self.assertIn("1 slides in", stderr.getvalue())
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(index))
+    return tests
@@ -0,0 +1,92 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import os
+import re
+import sys
+import subprocess
+
+import tlab_pptx
+from tlab_pptx import abstract, photo_luminescence
+
+
+# The budget of `import tlab_pptx` in microseconds as reported by
+# `python -X importtime`. Eager imports of pptx or numpy alone exceed it.
+IMPORT_TIME_BUDGET = 50_000
+HEAVY_MODULES = ["pptx", "plotly", "numpy", "PIL", "kaleido", "pandas"]
+
+
+def _run(
+    code: str,
+    *options: str,
+    prewarm: bool = False
+) -> subprocess.CompletedProcess[str]:
+    env = dict(os.environ)
+    env.pop("TLAB_PPTX_PREWARM", None)
+    if prewarm:
+        env["TLAB_PPTX_PREWARM"] = "1"
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env
+    )
+
+
+class Test_import(TestCase):
+
+    def test_heavy_modules(self) -> None:
+        result = _run(
+            "import sys, tlab_pptx\n"
+            f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+        )
+        self.assertEqual(result.stdout.split(), [])
+
+    def test_presentation_modules(self) -> None:
+        result = _run(
+            "import sys, tlab_pptx\n"
+            "tlab_pptx.PhotoLuminescencePresentation\n"
+            "print('pandas' in sys.modules)"
+        )
+        self.assertEqual(result.stdout.split(), ["False"])
+
+    def test_import_time(self) -> None:
+        result = _run("import tlab_pptx", "-X", "importtime")
+        match = re.search(
+            r"^import time: +\d+ \| +(\d+) \| tlab_pptx$",
+            result.stderr,
+            re.MULTILINE
+        )
+        assert match is not None, result.stderr
+        self.assertLess(int(match.group(1)), IMPORT_TIME_BUDGET)
+
+    def test_prewarm(self) -> None:
+        result = _run(
+            "import sys, tlab_pptx\n"
+            "print('tlab_pptx.sessions' in sys.modules)\n"
+            "from tlab_pptx import common, profiles, sessions\n"
+            "common.render_figure({}, profiles.DRAFT, 1.0, 1.0)\n"
+            "print(sessions.get_default().stats().renders)",
+            prewarm=True
+        )
+        self.assertEqual(result.stdout.split(), ["True", "1"])
+
+    def test_public_names(self) -> None:
+        self.assertIs(
+            tlab_pptx.AbstractPresentation,
+            abstract.AbstractPresentation
+        )
+        self.assertIs(
+            tlab_pptx.PhotoLuminescencePresentation,
+            photo_luminescence.Presentation
+        )
+        for name in tlab_pptx.__all__:
+            self.assertIn(name, dir(tlab_pptx))
+        with self.assertRaises(AttributeError):
+            getattr(tlab_pptx, "Unknown")
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(tlab_pptx))
+    return tests
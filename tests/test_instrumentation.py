@@ -0,0 +1,118 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import datetime
+import io
+import json
+
+import plotly.graph_objects as go
+
+from tlab_pptx import instrumentation, photo_luminescence as pl, templates
+from tests import helpers
+
+
+class _Recorder(instrumentation.Hook):
+
+    def __init__(self) -> None:
+        self.events: list[tuple[str, str, dict[str, object]]] = []
+
+    def on_start(self, span: instrumentation.Span) -> None:
+        self.events.append(("start", span.stage, dict(span.attributes)))
+
+    def on_end(self, span: instrumentation.Span) -> None:
+        self.events.append(("end", span.stage, dict(span.attributes)))
+
+
+class Test_span(TestCase):
+
+    def test_disabled(self) -> None:
+        self.assertFalse(instrumentation.enabled())
+        self.assertIs(
+            instrumentation.span("render"),
+            instrumentation.span("save", size=1)
+        )
+
+    def test_nested(self) -> None:
+        recorder = _Recorder()
+        with instrumentation.instrument(recorder):
+            self.assertTrue(instrumentation.enabled())
+            with instrumentation.span("slide", slide=0):
+                with instrumentation.span("render", figure=1) as span:
+                    span.set(size=10)
+        self.assertFalse(instrumentation.enabled())
+        self.assertEqual(recorder.events, [
+            ("start", "slide", dict(slide=0)),
+            ("start", "render", dict(slide=0, figure=1)),
+            ("end", "render", dict(slide=0, figure=1, size=10)),
+            ("end", "slide", dict(slide=0)),
+        ])
+
+    def test_error(self) -> None:
+        recorder = _Recorder()
+        with instrumentation.instrument(recorder), self.assertRaises(ValueError):
+            with instrumentation.span("render"):
+                raise ValueError
+        self.assertEqual(recorder.events[-1], ("end", "render", dict(error="ValueError")))
+
+
+class Test_collectors(TestCase):
+
+    def test_presentation(self) -> None:
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=go.Figure(go.Scatter(x=[0, 1, 2], y=[2, 1, 0])),
+            v_fig=go.Figure(go.Scatter(x=[0, 1, 2], y=[0, 1, 2])),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+        summary = instrumentation.Summary()
+        trace = instrumentation.ChromeTrace()
+        image = helpers.png()
+        # The slide is compiled beforehand, which draws every shape once.
+        prs.add_slide(templates.open_template(), images=[image] * 2, compiled=True)
+        with instrumentation.instrument(summary, trace), \
+                mock.patch("plotly.io.to_image", return_value=image), \
+                io.BytesIO() as f:
+            prs.save(f, compiled=True)
+            size = len(f.getvalue())
+        stats = summary.stats()
+        self.assertEqual(
+            {stage: s.count for stage, s in stats.items()},
+            dict(
+                build=1,
+                template=1,
+                slide=1,
+                figure=2,
+                render=2,
+                fill=1,
+                save=1
+            )
+        )
+        self.assertEqual(stats["render"].size, 2 * len(image))
+        self.assertEqual(stats["save"].size, size)
+        with io.StringIO() as f:
+            trace.dump(f)
+            events = json.loads(f.getvalue())["traceEvents"]
+        renders = [event for event in events if event["name"] == "render"]
+        self.assertEqual(
+            [(event["args"]["figure"], event["args"]["title"]) for event in renders],
+            [(0, "title"), (1, "title")]
+        )
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0.0)
+        self.assertIn("render", summary.format())
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(instrumentation))
+    return tests
@@ -0,0 +1,121 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import datetime
+import doctest
+import io
+import zipfile
+import typing as t
+
+import pptx
+import pptx.presentation
+import pptx.slide
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    metadata,
+    profiles,
+    sessions
+)
+from tests import helpers
+
+
+class _UnindexedPresentation(abstract.AbstractPresentation):
+
+    def build(self) -> pptx.presentation.Presentation:
+        raise NotImplementedError
+
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        raise NotImplementedError
+
+    def save(self, filepath_or_buffer: common.FilePathOrBuffer) -> None:
+        raise NotImplementedError
+
+
+def _save(prs: pptx.presentation.Presentation) -> bytes:
+    with io.BytesIO() as f:
+        prs.save(f)
+        return f.getvalue()
+
+
+class Test_make_records(TestCase):
+
+    def test_records(self) -> None:
+        records = metadata.make_records(
+            [_UnindexedPresentation(), helpers.presentation(
+                "a&<b>\"",
+                FWHM=48.5,
+                date=datetime.date(2022, 1, 2),
+                tau1=0.1
+            )],
+            start=3
+        )
+        self.assertEqual(records, [dict(
+            slide="4",
+            kind="tlab_pptx.photo_luminescence.Presentation",
+            title="a&<b>\"",
+            excitation_wavelength="400",
+            excitation_power="1",
+            time_range="10",
+            center_wavelength="480",
+            FWHM="48.5",
+            frame="10000",
+            date="2022-01-02",
+            a="60",
+            b="40",
+            tau1="0.1",
+            tau2="3.0"
+        )])
+
+
+class Test_embed(TestCase):
+
+    def test_replace(self) -> None:
+        prs = pptx.Presentation()
+        metadata.embed(prs, metadata.make_records([helpers.presentation("first")]))
+        metadata.embed(prs, metadata.make_records([helpers.presentation("second")]))
+        data = _save(prs)
+        with zipfile.ZipFile(io.BytesIO(data)) as f:
+            self.assertEqual(f.namelist().count(metadata.MEMBER), 1)
+        records = metadata.read(io.BytesIO(data))
+        assert records is not None
+        self.assertEqual([record["title"] for record in records], ["second"])
+        loaded = pptx.Presentation(io.BytesIO(data))
+        metadata.embed(loaded, None)
+        self.assertIsNone(metadata.read(io.BytesIO(_save(loaded))))
+
+    def test_save(self) -> None:
+        with io.BytesIO() as f:
+            prs = helpers.presentation(tau1=0.1)
+            prs.save(f, embed_spec=True)
+            records = metadata.read(f)
+        assert records is not None
+        self.assertEqual(records[0]["slide"], "1")
+        self.assertEqual(records[0]["tau1"], "0.1")
+
+
+class Test_read(TestCase):
+
+    def test_not_embedded(self) -> None:
+        self.assertIsNone(metadata.read(io.BytesIO(_save(pptx.Presentation()))))
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            metadata.read(io.BytesIO(b"not a zip file"))
+        for data in [b"<specs", b"<other/>", f'<specs xmlns="{metadata.NAMESPACE}" version="2"/>'.encode()]:
+            with self.assertRaises(ValueError):
+                metadata.parse(data)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(metadata))
+    return tests
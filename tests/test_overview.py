@@ -0,0 +1,118 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import io
+
+import numpy as np
+import plotly.graph_objects as go
+import pptx
+
+from tlab_pptx import deck, overview, photo_luminescence as pl, profiles
+from tests import helpers
+
+
+def _presentation(i: int, points: int = 1000) -> pl.Presentation:
+    x = np.linspace(0.0, 10.0, points)
+    return helpers.presentation(
+        f"Sample {i} <&>",
+        v_fig=go.Figure(
+            [go.Scatter(x=x, y=np.exp(-x / (i + 1))), go.Scatter(x=x, y=np.exp(-x), line=dict(dash="dash"))],
+            layout=dict(yaxis=dict(type="log"))
+        ),
+        a=60 + i,
+        b=40 - i,
+        tau1=1.0 + i / 8
+    )
+
+
+class Test_compose_grid(TestCase):
+
+    def test_compose_grid(self) -> None:
+        presentations = [_presentation(i) for i in range(5)]
+        fig = overview.compose_grid(
+            [p.v_fig for p in presentations],
+            [p.title for p in presentations],
+            max_points=50
+        )
+        self.assertEqual(len(fig["data"]), 4)
+        curves, fits, frames, titles = fig["data"]
+        self.assertEqual(fits["line"], dict(dash="dash"))
+        for trace in (curves, fits):
+            self.assertLessEqual(np.isnan(trace["x"]).sum(), 5)
+            self.assertLessEqual(len(trace["x"]), 5 * 53)
+            finite = trace["y"][np.isfinite(trace["y"])]
+            self.assertTrue(np.all((finite >= 0.0) & (finite <= 1.0)))
+        self.assertEqual(len(frames["x"]), 5 * 6)
+        self.assertEqual(titles["text"], [p.title for p in presentations])
+        # A decay on a log axis is a straight line filling its cell.
+        end = np.argmax(np.isnan(curves["y"]))
+        x, y = curves["x"][:end], curves["y"][:end]
+        self.assertEqual((y.max(), y.min()), (y[0], y[-1]))
+        np.testing.assert_allclose(y, y[0] + (y[-1] - y[0]) * (x - x[0]) / (x[-1] - x[0]), atol=1e-5)
+
+
+class Test_format_table(TestCase):
+
+    def test_format_table(self) -> None:
+        columns = overview.format_table([_presentation(i) for i in range(3)])
+        self.assertEqual(columns[1:], [["60", "61", "62"], ["40", "39", "38"], ["1", "1.1", "1.2"], ["3"] * 3])
+
+
+class TestOverview_add_slide(TestCase):
+
+    def test_add_slide(self) -> None:
+        presentations = [_presentation(i, points=100) for i in range(30)]
+        with mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure) as render_mock:
+            prs = deck.Deck([overview.Overview(presentations), *presentations[:1]]).build()
+        self.assertEqual(render_mock.call_count, 3)
+        (_, profile, width, height), _ = render_mock.call_args_list[0]
+        self.assertEqual(profile, overview.get_thumbnail_profile(profiles.ORIGINAL))
+        self.assertEqual((width, height), (15.8, 15.8))
+        slide = prs.slides[0]
+        self.assertEqual(slide.shapes.title.text, "Overview")
+        [table] = [shape.table for shape in slide.shapes if shape.has_table]
+        rows = [[cell.text for cell in row.cells] for row in table.rows]
+        self.assertEqual(len(rows), 31)
+        self.assertEqual(rows[0], ["Sample", "a", "b", "τ₁ (ns)", "τ₂ (ns)"])
+        self.assertEqual(rows[2], ["Sample 1 <&>", "61", "39", "1.1", "3"])
+        with io.BytesIO() as f:
+            prs.save(f)
+            self.assertEqual(len(pptx.Presentation(f).slides), 2)
+
+    def test_fits_slide(self) -> None:
+        for n in [0, 1, 62, 100, 300]:
+            with self.subTest(n=n):
+                presentations = [_presentation(i, points=2) for i in range(n)]
+                with mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure):
+                    prs = overview.Overview(presentations).build()
+                shapes = [shape for shape in prs.slides[0].shapes if shape.has_table]
+                self.assertEqual(sum(len(shape.table.rows) - 1 for shape in shapes), n)
+                for shape in shapes:
+                    height = sum(row.height for row in shape.table.rows)
+                    self.assertEqual(shape.height, height)
+                    self.assertLessEqual(shape.top + height, prs.slide_height)
+                    self.assertLessEqual(shape.left + shape.width, prs.slide_width)
+
+    def test_spec_key(self) -> None:
+        presentations = [_presentation(i, points=100) for i in range(3)]
+        key = overview.Overview(presentations).get_spec_key(profiles.DRAFT)
+        self.assertEqual(overview.Overview(presentations).get_spec_key(profiles.DRAFT), key)
+        self.assertNotEqual(overview.Overview(presentations[:2]).get_spec_key(profiles.DRAFT), key)
+
+    def test_grid_composed_once(self) -> None:
+        presentations = [_presentation(i, points=100) for i in range(3)]
+        ov = overview.Overview(presentations)
+        with mock.patch("tlab_pptx.overview.compose_grid", wraps=overview.compose_grid) as compose_mock, \
+                mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure) as render_mock:
+            key = ov.get_spec_key(profiles.DRAFT)
+            ov.render(profile=profiles.DRAFT)
+            ov.render(profile=profiles.DRAFT)
+        self.assertEqual(compose_mock.call_count, 1)
+        self.assertEqual(render_mock.call_args_list[0], render_mock.call_args_list[1])
+        self.assertEqual(ov, overview.Overview(presentations))
+        self.assertEqual(overview.Overview(presentations).get_spec_key(profiles.DRAFT), key)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(overview))
+    return tests
@@ -1,20 +1,359 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 from unittest import TestCase, mock
+import asyncio
+import dataclasses
 import doctest
 import datetime
 import tempfile
 import pathlib
+import io
+import json
 
+import lxml.etree
+import pandas as pd
+import PIL.Image
+import pptx
+import pptx.slide
 import plotly.graph_objects as go
 
 from tlab_pptx import (
     photo_luminescence as pl,
-    common
+    common,
+    deck,
+    frames,
+    profiles,
+    templates
 )
+from tests import helpers
+
+
+def _image(color: int, format: str) -> bytes:
+    with io.BytesIO() as f:
+        PIL.Image.new("RGB", (4, 4), (color, 0, 0)).save(f, format)
+        return f.getvalue()
+
+
+def _shapes(slide: pptx.slide.Slide) -> list[dict[str, object]]:
+    shapes: list[dict[str, object]] = []
+    for shape in slide.shapes:
+        properties: dict[str, object] = dict(
+            shape_id=shape.shape_id,
+            name=shape.name,
+            shape_type=shape.shape_type,
+            box=(shape.left, shape.top, shape.width, shape.height)
+        )
+        if shape.has_text_frame:
+            properties["paragraphs"] = [
+                (
+                    paragraph.text,
+                    paragraph.font.name,
+                    paragraph.font.size,
+                    paragraph.font.bold,
+                    paragraph.font.italic
+                )
+                for paragraph in shape.text_frame.paragraphs
+            ]
+        if shape.shape_type == pptx.enum.shapes.MSO_SHAPE_TYPE.PICTURE:
+            properties["image"] = (shape.image.sha1, shape.image.content_type)
+            properties["descr"] = shape._element.nvPicPr.cNvPr.get("descr")
+        shapes.append(properties)
+    return shapes
 
 
 class TestPresentation_build(TestCase):  # TODO: Implement unittests
-    pass
+
+    def test_idempotent(self) -> None:
+        h_fig = go.Figure(go.Scatter(x=[0, 1, 2], y=[2, 1, 0]))
+        v_fig = go.Figure(go.Scatter(x=[0, 1, 2], y=[0, 1, 2]))
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=h_fig,
+            v_fig=v_fig,
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+        h_json, v_json = h_fig.to_json(), v_fig.to_json()
+        with mock.patch("plotly.io.to_image", return_value=helpers.png()) as to_image_mock:
+            prs.build()
+            prs.build()
+        self.assertEqual(h_fig.to_json(), h_json)
+        self.assertEqual(v_fig.to_json(), v_json)
+        first, second = (
+            to_image_mock.call_args_list[:2],
+            to_image_mock.call_args_list[2:]
+        )
+        self.assertEqual(first, second)
+        for call in first:
+            annotations = call.args[0]["layout"]["annotations"]
+            self.assertEqual(
+                [annotation["text"] for annotation in annotations],
+                ["2022.01.01"]
+            )
+
+    def test_spec(self) -> None:
+        h_spec = dict(data=[dict(type="scatter", x=[0, 1, 2], y=[2, 1, 0])])
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=h_spec,
+            v_fig=json.dumps(h_spec).encode(),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+        with mock.patch("plotly.io.to_image", return_value=helpers.png()) as to_image_mock:
+            prs.build()
+        h_call, v_call = to_image_mock.call_args_list
+        self.assertEqual(h_call, v_call)
+        styled = h_call.args[0]
+        self.assertEqual(styled["data"][0]["line"], dict(width=0.85))
+        self.assertEqual(styled["layout"]["width"], 500)
+        self.assertEqual(h_spec, dict(data=[dict(type="scatter", x=[0, 1, 2], y=[2, 1, 0])]))
+
+
+class TestPresentation_from_frame(TestCase):
+
+    def _frame(self) -> pd.DataFrame:
+        fig = go.Figure()
+        return pd.DataFrame(dict(
+            title=["a", "b", "c"],
+            excitation_wavelength=[400, 400.9, "405"],
+            excitation_power=[1, 2, 3],
+            time_range=[10, 10, 20],
+            center_wavelength=[480, 500, 520],
+            FWHM=[48, 0.000012, 123.456],
+            frame=[10000, 20000, 30000],
+            date=[datetime.date(2022, 1, 1), "2022-01-02", pd.Timestamp("2022-01-03")],
+            h_fig=[fig, fig.to_dict(), fig.to_json().encode()],
+            v_fig=[fig] * 3,
+            a=[60, 70, 80],
+            b=[40, 30, 20],
+            tau1=[1.0, 0.25, 12.5],
+            tau2=[3.0, 1e5, -2.0]
+        ), index=[10, 20, 30])
+
+    def test_texts(self) -> None:
+        presentations = pl.Presentation.from_frame(self._frame())
+        self.assertEqual(len(presentations), 3)
+        for presentation in presentations:
+            direct = dataclasses.replace(presentation)
+            self.assertEqual(presentation, direct)
+            self.assertEqual(presentation._texts(), direct._texts())
+        self.assertEqual(
+            [(p.excitation_wavelength, p.date) for p in presentations],
+            [
+                (400, datetime.date(2022, 1, 1)),
+                (400, datetime.date(2022, 1, 2)),
+                (405, datetime.date(2022, 1, 3))
+            ]
+        )
+
+    def test_invalid(self) -> None:
+        frame = self._frame()
+        frame["a"] = [60, "x", 80]
+        frame["date"] = ["2022-01-01", "2022-01-02", "not a date"]
+        frame["v_fig"] = [go.Figure(), None, None]
+        with self.assertRaises(frames.InvalidRowsError) as cm:
+            pl.Presentation.from_frame(frame)
+        self.assertEqual(cm.exception.errors, {
+            20: ["invalid v_fig: None", "invalid a: 'x'"],
+            30: ["invalid date: 'not a date'", "invalid v_fig: None"],
+        })
+        with self.assertRaisesRegex(ValueError, "Missing columns: tau2"):
+            pl.Presentation.from_frame(frame.drop(columns="tau2"))
+
+    def test_deck(self) -> None:
+        presentations = pl.Presentation.from_frame(self._frame())
+        with mock.patch("plotly.io.to_image", return_value=helpers.png()):
+            prs = deck.Deck(presentations).build()
+        self.assertEqual(
+            [slide.shapes.title.text for slide in prs.slides],
+            ["a", "b", "c"]
+        )
+
+
+class TestPresentation_build_async(TestCase):
+
+    def test_build(self) -> None:
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=go.Figure(go.Scatter(x=[0, 1, 2], y=[2, 1, 0])),
+            v_fig=go.Figure(go.Scatter(x=[0, 1, 2], y=[0, 1, 2])),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+        with mock.patch("plotly.io.to_image", return_value=helpers.png()) as to_image_mock:
+            expected = prs.build()
+            calls = sorted(to_image_mock.call_args_list, key=str)
+            to_image_mock.reset_mock()
+            actual = asyncio.run(prs.build_async())
+        self.assertEqual(sorted(to_image_mock.call_args_list, key=str), calls)
+        self.assertEqual(
+            [
+                (shape.shape_type, shape.left, shape.top, shape.width, shape.height)
+                for shape in actual.slides[0].shapes
+            ],
+            [
+                (shape.shape_type, shape.left, shape.top, shape.width, shape.height)
+                for shape in expected.slides[0].shapes
+            ]
+        )
+
+    def test_save(self) -> None:
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=go.Figure(),
+            v_fig=go.Figure(),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+
+        async def save(files: list[io.BytesIO]) -> None:
+            semaphore = asyncio.Semaphore(1)
+            await asyncio.gather(*[
+                prs.save_async(f, semaphore=semaphore) for f in files
+            ])
+
+        files = [io.BytesIO(), io.BytesIO()]
+        with mock.patch("plotly.io.to_image", return_value=helpers.png()):
+            asyncio.run(save(files))
+        for f in files:
+            f.seek(0)
+            self.assertEqual(pptx.Presentation(f).slides[0].shapes.title.text, "title")
+
+
+class TestPresentation_add_slide(TestCase):
+
+    def test_images(self) -> None:
+        h_fig_mock = mock.Mock(spec_set=go.Figure)
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            center_wavelength=480,
+            FWHM=48,
+            frame=10000,
+            date=datetime.date(2022, 1, 1),
+            h_fig=h_fig_mock,
+            v_fig=mock.Mock(spec_set=go.Figure),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0
+        )
+        pptx_prs = pptx.Presentation()
+        with mock.patch("tlab_pptx.common.render_figure") as render_mock, \
+                mock.patch("tlab_pptx.common.add_picture") as add_picture_mock:
+            prs.add_slide(pptx_prs, images=[b"h_image", b"v_image"])
+        render_mock.assert_not_called()
+        h_fig_mock.add_annotation.assert_not_called()
+        self.assertEqual(
+            add_picture_mock.call_args_list,
+            [
+                mock.call(mock.ANY, b"h_image", 0.33, 5.0, 12.0, 12.0),
+                mock.call(mock.ANY, b"v_image", 12.33, 5.0, 12.0, 12.0)
+            ]
+        )
+        self.assertEqual(len(pptx_prs.slides), 1)
+
+    def test_chart_specs(self) -> None:
+        spec = dict(data=[dict(type="scatter", x=[0, 1], y=[1, 0])])
+        pptx_prs = pptx.Presentation()
+        with mock.patch(
+            "tlab_pptx.common.to_figure",
+            wraps=common.to_figure
+        ) as to_figure_mock:
+            helpers.presentation(h_fig=spec, v_fig=spec).add_slide(
+                pptx_prs,
+                profile=profiles.NATIVE
+            )
+        # The specs are built into figures once, which are then passed on.
+        self.assertEqual(
+            [call.args[0] for call in to_figure_mock.call_args_list
+             if not isinstance(call.args[0], go.Figure)],
+            [spec, spec]
+        )
+        self.assertEqual(
+            sum(shape.has_chart for shape in pptx_prs.slides[0].shapes),
+            2
+        )
+
+    def test_compiled(self) -> None:
+        cases = [
+            ("title", [_image(0, "png"), _image(1, "png")]),
+            ("two\nlines \x1b<&>", [_image(2, "jpeg"), _image(3, "png")]),
+            ("", [_image(4, "png")] * 2),
+        ]
+        for title, images in cases:
+            with self.subTest(title=title):
+                prs = pl.Presentation(
+                    title=title,
+                    excitation_wavelength=400,
+                    excitation_power=1,
+                    time_range=10,
+                    center_wavelength=480,
+                    FWHM=48.5,
+                    frame=10000,
+                    date=datetime.date(2022, 1, 1),
+                    h_fig=go.Figure(),
+                    v_fig=go.Figure(),
+                    a=60,
+                    b=40,
+                    tau1=1.25,
+                    tau2=3.0
+                )
+                slides = []
+                for compiled in [False, True]:
+                    pptx_prs = templates.open_template()
+                    prs.add_slide(pptx_prs, images=images, compiled=compiled)
+                    slides.append(
+                        prs.add_slide(pptx_prs, images=images, compiled=compiled)
+                    )
+                expected, actual = slides
+                self.assertEqual(_shapes(actual), _shapes(expected))
+                self.assertEqual(
+                    lxml.etree.tostring(actual.shapes._spTree),
+                    lxml.etree.tostring(expected.shapes._spTree)
+                )
+                self.assertEqual(
+                    {rel.rId: rel.target_partname for rel in actual.part.rels},
+                    {rel.rId: rel.target_partname for rel in expected.part.rels}
+                )
 
 
 class TestPresentation_save(TestCase):
@@ -0,0 +1,85 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import doctest
+import io
+
+import PIL.Image
+
+from tlab_pptx import profiles
+from tests import helpers
+
+
+class TestRenderProfile(TestCase):
+
+    def test_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            profiles.RenderProfile("test")
+        with self.assertRaises(ValueError):
+            profiles.RenderProfile("test", dpi=96, format="webp")
+        with self.assertRaises(ValueError):
+            profiles.RenderProfile("test", dpi=96, points_per_pixel=0)
+
+    def test_get_scale(self) -> None:
+        cases = [
+            (profiles.RenderProfile("test", scale=10), 12.0, 12.0, 10),
+            (profiles.RenderProfile("test", dpi=254), 12.0, 12.0, 2.4),
+            (profiles.RenderProfile("test", dpi=254), 12.0, 24.0, 4.8),
+            (profiles.RenderProfile("test", dpi=127), 5.0, 5.0, 0.5),
+        ]
+        for profile, width, height, scale in cases:
+            with self.subTest(profile=profile, width=width, height=height):
+                self.assertAlmostEqual(
+                    profile.get_scale(width, height),
+                    scale
+                )
+
+    def test_get_max_points(self) -> None:
+        cases = [
+            (profiles.RenderProfile("test", scale=10), None),
+            (profiles.RenderProfile("test", scale=2, points_per_pixel=4), 4000),
+            (profiles.RenderProfile("test", dpi=254, points_per_pixel=1), 1200),
+        ]
+        for profile, max_points in cases:
+            with self.subTest(profile=profile):
+                self.assertEqual(profile.get_max_points(12.0, 12.0), max_points)
+
+    def test_original(self) -> None:
+        profile = profiles.ORIGINAL
+        self.assertEqual(profile.get_scale(12.0, 12.0), 10)
+        self.assertEqual(profile.render_format, "png")
+        self.assertEqual(profile.encode(b"png_image"), b"png_image")
+
+    def test_encode_jpeg(self) -> None:
+        profile = profiles.RenderProfile("test", dpi=96, format="jpeg", quality=50)
+        self.assertEqual(profile.render_format, "png")
+        with PIL.Image.open(io.BytesIO(profile.encode(helpers.png(size=(16, 16))))) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (16, 16))
+
+    def test_encode_png(self) -> None:
+        profile = profiles.RenderProfile("test", dpi=96, compress_level=9)
+        self.assertEqual(profile.render_format, "png")
+        with PIL.Image.open(io.BytesIO(profile.encode(helpers.png(size=(16, 16))))) as image:
+            self.assertEqual(image.format, "PNG")
+            self.assertEqual(image.size, (16, 16))
+
+
+class Test_get_profile(TestCase):
+
+    def test_name(self) -> None:
+        for name, profile in profiles.PROFILES.items():
+            with self.subTest(name=name):
+                self.assertIs(profiles.get_profile(name), profile)
+
+    def test_profile(self) -> None:
+        profile = profiles.RenderProfile("test", dpi=96)
+        self.assertIs(profiles.get_profile(profile), profile)
+
+    def test_unknown(self) -> None:
+        with self.assertRaises(ValueError):
+            profiles.get_profile("unknown")
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(profiles))
+    return tests
@@ -0,0 +1,157 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import asyncio
+import doctest
+import tempfile
+import concurrent.futures
+
+import plotly.io
+import plotly.graph_objects as go
+
+from tlab_pptx import caching, common, profiles, rendering
+
+
+class TestRenderPool(TestCase):
+
+    def test_single_worker(self) -> None:
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        fig_json = fig.to_json()
+        profile = profiles.RenderProfile("test", scale=5)
+        with mock.patch(
+            "tlab_pptx.common.render_figure",
+            return_value=b"png_image"
+        ) as render_mock:
+            with rendering.RenderPool(workers=1) as pool:
+                future = pool.submit(
+                    common.PlacedFigure(fig, 0.0, 0.0, 6.0, 4.0),
+                    profile
+                )
+            self.assertEqual(future.result(), b"png_image")
+            render_mock.assert_called_once_with(
+                common.get_styled_figure(fig), profile, 6.0, 4.0, cache=None
+            )
+        self.assertEqual(fig.to_json(), fig_json)
+
+    def test_workers(self) -> None:
+        figures = [
+            common.PlacedFigure(
+                go.Figure(go.Scatter(x=[0, 1, 2], y=[i, 1, 0])),
+                0.0,
+                0.0,
+                annotations=(dict(text=str(i)),)
+            )
+            for i in range(3)
+        ]
+        profile = profiles.RenderProfile("test", scale=1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = caching.RenderCache(tmpdir)
+            with rendering.RenderPool(workers=2, cache=cache) as pool:
+                futures = [pool.submit(f, profile) for f in figures]
+                images = [future.result() for future in futures]
+            self.assertEqual(
+                images,
+                [
+                    plotly.io.to_image(
+                        common.get_styled_figure(f.fig, f.annotations),
+                        "png",
+                        scale=1,
+                        validate=False
+                    )
+                    for f in figures
+                ]
+            )
+            self.assertEqual(cache.stats().entries, len(figures))
+            with rendering.RenderPool(workers=2, cache=cache) as pool:
+                futures = [pool.submit(f, profile) for f in figures]
+                self.assertTrue(all(future.done() for future in futures))
+                self.assertEqual([f.result() for f in futures], images)
+            self.assertEqual(cache.stats().hits, len(figures))
+
+
+class Test_render_async(TestCase):
+
+    def _pool(
+        self,
+        futures: list[concurrent.futures.Future[bytes]]
+    ) -> mock.Mock:
+        pool = mock.Mock(spec=rendering.RenderPool)
+        pool.submit.side_effect = futures
+        return pool
+
+    def test_order(self) -> None:
+        figures = [
+            common.PlacedFigure(go.Figure(), 0.0, 0.0, annotations=(dict(text=str(i)),))
+            for i in range(3)
+        ]
+
+        def render_figure(fig: dict[str, object], *args: object, **kwargs: object) -> bytes:
+            return str(figures.index(
+                next(f for f in figures if common.get_styled_figure(f.fig, f.annotations) == fig)
+            )).encode()
+
+        with mock.patch("tlab_pptx.common.render_figure", side_effect=render_figure):
+            with rendering.RenderPool(workers=1) as pool:
+                images = asyncio.run(rendering.render_async(figures, pool))
+        self.assertEqual(images, [b"0", b"1", b"2"])
+
+    def test_chart(self) -> None:
+        figure = common.PlacedFigure(go.Figure(go.Scatter(x=[0, 1], y=[1, 0])), 0.0, 0.0)
+        pool = self._pool([])
+        images = asyncio.run(rendering.render_async([figure], pool, profiles.NATIVE))
+        self.assertEqual(images, [None])
+        pool.submit.assert_not_called()
+
+    def test_semaphore(self) -> None:
+        futures: list[concurrent.futures.Future[bytes]] = [
+            concurrent.futures.Future() for _ in range(3)
+        ]
+        pool = self._pool(futures)
+        figures = [common.PlacedFigure(go.Figure(), 0.0, 0.0) for _ in futures]
+
+        async def run() -> list[bytes | None]:
+            semaphore = asyncio.Semaphore(1)
+            task = asyncio.ensure_future(rendering.render_async(figures, pool, semaphore=semaphore))
+            for i, future in enumerate(futures):
+                while pool.submit.call_count <= i:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+                self.assertEqual(pool.submit.call_count, i + 1)
+                future.set_result(str(i).encode())
+            return await task
+
+        self.assertEqual(asyncio.run(run()), [b"0", b"1", b"2"])
+
+    def test_cancel(self) -> None:
+        futures: list[concurrent.futures.Future[bytes]] = [
+            concurrent.futures.Future() for _ in range(2)
+        ]
+        pool = self._pool(futures)
+        figures = [common.PlacedFigure(go.Figure(), 0.0, 0.0) for _ in futures]
+
+        async def run() -> None:
+            task = asyncio.ensure_future(rendering.render_async(figures, pool))
+            while pool.submit.call_count < len(futures):
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertTrue(all(future.cancelled() for future in futures))
+
+    def test_error(self) -> None:
+        futures: list[concurrent.futures.Future[bytes]] = [
+            concurrent.futures.Future() for _ in range(2)
+        ]
+        futures[0].set_exception(RuntimeError("kaleido"))
+        pool = self._pool(futures)
+        figures = [common.PlacedFigure(go.Figure(), 0.0, 0.0) for _ in futures]
+        with self.assertRaises(RuntimeError):
+            asyncio.run(rendering.render_async(figures, pool))
+        self.assertTrue(futures[1].cancelled())
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(rendering))
+    return tests
@@ -0,0 +1,101 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+
+import plotly.graph_objects as go
+
+from tlab_pptx import sessions
+
+
+class TestRendererSession(TestCase):
+
+    def test_start(self) -> None:
+        with sessions.RendererSession() as session:
+            self.assertTrue(session.alive)
+            self.assertEqual(session.start(), 0.0)
+            stats = session.stats()
+            self.assertIsNotNone(stats.cold_start)
+            self.assertEqual(stats.renders, 0)
+            self.assertIsNone(stats.warm_render)
+        self.assertFalse(session.alive)
+
+    def test_render(self) -> None:
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        with sessions.RendererSession() as session:
+            image = session.render(fig, "png", 1)
+            self.assertEqual(image, fig.to_image("png", scale=1))
+            self.assertEqual(
+                session.render(fig.to_dict(), "png", 1),
+                image
+            )
+            stats = session.stats()
+        self.assertEqual(stats.renders, 2)
+        self.assertGreater(stats.render_time, 0.0)
+
+    def test_restart(self) -> None:
+        fig = go.Figure()
+        with sessions.RendererSession() as session:
+            session._scope._proc.kill()
+            session._scope._proc.wait()
+            self.assertFalse(session.alive)
+            session.render(fig, "png", 1)
+            self.assertTrue(session.alive)
+            self.assertEqual(session.stats().restarts, 1)
+
+    def test_retry(self) -> None:
+        with sessions.RendererSession() as session:
+            calls = []
+
+            def transform(*args: object, **kwargs: object) -> bytes:
+                calls.append(args)
+                if len(calls) == 1:
+                    session._scope._proc.kill()
+                    session._scope._proc.wait()
+                    raise ValueError("Transform failed")
+                return b"png_image"
+
+            with mock.patch.object(
+                session._scope,
+                "transform",
+                side_effect=transform
+            ):
+                self.assertEqual(session.render(go.Figure()), b"png_image")
+            # The failed render, the restart and the retried render.
+            self.assertEqual(len(calls), 3)
+            self.assertEqual(session.stats().restarts, 1)
+
+    def test_error(self) -> None:
+        with sessions.RendererSession() as session:
+            with mock.patch.object(
+                session._scope,
+                "transform",
+                side_effect=ValueError("invalid figure")
+            ) as transform_mock:
+                with self.assertRaises(ValueError):
+                    session.render(go.Figure())
+                transform_mock.assert_called_once()
+
+    def test_independent(self) -> None:
+        fig = go.Figure()
+        with sessions.RendererSession() as session:
+            with sessions.RendererSession() as other:
+                self.assertIsNot(other._scope._proc, session._scope._proc)
+            self.assertFalse(other.alive)
+            self.assertTrue(session.alive)
+            session.render(fig, "png", 1)
+            self.assertEqual(session.stats().restarts, 0)
+
+
+class Test_prewarm(TestCase):
+
+    def test_prewarm(self) -> None:
+        with sessions.prewarm() as session:
+            session.render(go.Figure(), "png", 1)
+            stats = session.stats()
+        self.assertEqual((stats.renders, stats.restarts), (1, 0))
+        self.assertIsNotNone(stats.cold_start)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(sessions))
+    return tests
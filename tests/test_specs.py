@@ -0,0 +1,90 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase
+import dataclasses
+import doctest
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from tlab_pptx import photo_luminescence as pl, profiles, specs
+from tests import helpers
+
+
+def _presentation(title: str = "title") -> pl.Presentation:
+    x = np.linspace(0.0, 10.0, 10000)
+    return helpers.presentation(
+        title,
+        FWHM=48.5,
+        h_fig=go.Figure(go.Scatter(x=x, y=np.exp(-x), name="decay")),
+        v_fig=dict(
+            data=[dict(type="heatmap", z=[[1, 2], [3, 4]], text=["a", "b"])],
+            layout=dict(xaxis=dict(range=[0, 1]))
+        ),
+        tau1=1.25
+    )
+
+
+class Test_dumps(TestCase):
+
+    def test_roundtrip(self) -> None:
+        presentations = [_presentation("sample 1"), _presentation("サンプル 2")]
+        loaded = specs.loads(specs.dumps(presentations))
+        self.assertEqual(len(loaded), 2)
+        for expected, actual in zip(presentations, loaded):
+            fields = {
+                field.name for field in dataclasses.fields(pl.Presentation)
+                if field.compare
+            } - {"h_fig", "v_fig"}
+            for name in fields:
+                self.assertEqual(getattr(actual, name), getattr(expected, name), name)
+            self.assertEqual(
+                json.loads(pio.to_json(go.Figure(actual.h_fig))),
+                json.loads(pio.to_json(expected.h_fig))
+            )
+            assert isinstance(actual.v_fig, dict)
+            [heatmap] = actual.v_fig["data"]
+            self.assertEqual(heatmap["text"], ["a", "b"])
+            np.testing.assert_array_equal(heatmap["z"], [[1, 2], [3, 4]])
+            self.assertEqual(
+                actual.get_spec_key(profiles.ORIGINAL),
+                expected.get_spec_key(profiles.ORIGINAL)
+            )
+
+    def test_compact(self) -> None:
+        presentation = _presentation()
+        data = specs.dumps([presentation])
+        assert isinstance(presentation.h_fig, go.Figure)
+        self.assertLess(len(data), len(presentation.h_fig.to_json()) / 2)
+
+    def test_invalid(self) -> None:
+        data = specs.dumps([_presentation()])
+        for invalid in [b"", b"XXXX" + data[4:], data[:-1], data + b"\0"]:
+            with self.subTest(invalid=invalid[:8]):
+                with self.assertRaises(ValueError):
+                    specs.loads(invalid)
+        with self.assertRaises(ValueError):
+            specs.loads(data.replace(b"<f8", b"<Z8", 1))
+
+    def test_number_types(self) -> None:
+        presentation = helpers.presentation(
+            excitation_wavelength=400.0,
+            a=np.int64(63),
+            tau1=np.float32(1.25)
+        )
+        [loaded] = specs.loads(specs.dumps([presentation]))
+        self.assertEqual(
+            (loaded.excitation_wavelength, loaded.a, loaded.tau1),
+            (400, 63, 1.25)
+        )
+        self.assertIs(type(loaded.excitation_wavelength), int)
+        with self.assertRaises(ValueError):
+            specs.dumps([helpers.presentation(frame="many")])
+        with self.assertRaises(ValueError):
+            specs.dumps([helpers.presentation(a=1 << 64)])
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(specs))
+    return tests
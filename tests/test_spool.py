@@ -0,0 +1,135 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import os
+import queue
+import struct
+import tempfile
+import threading
+
+import pptx
+
+from tlab_pptx import spool
+from tests import helpers
+
+
+class TestSpool(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.spool = spool.Spool(tmpdir.name, max_pending=2, interval=0.01)
+
+    def test_submit_claim(self) -> None:
+        first = self.spool.submit([helpers.presentation()], job_id="first")
+        second = self.spool.submit([helpers.presentation()])
+        self.assertEqual(self.spool.pending(), 2)
+        self.assertEqual(self.spool.claim(1), [first])
+        self.assertEqual(self.spool.claim(5), [second])
+        self.assertEqual(self.spool.claim(5), [])
+        self.assertEqual(sorted(self.spool.recover()), sorted([first, second]))
+        self.assertEqual(self.spool.pending(), 2)
+
+    def test_backpressure(self) -> None:
+        for _ in range(2):
+            self.spool.submit([helpers.presentation()])
+        with self.assertRaises(queue.Full):
+            self.spool.submit([helpers.presentation()], block=False)
+        with self.assertRaises(queue.Full):
+            self.spool.submit([helpers.presentation()], timeout=0.05)
+        timer = threading.Timer(0.05, self.spool.claim, (1,))
+        timer.start()
+        self.spool.submit([helpers.presentation()], timeout=5.0)
+        timer.join()
+        self.assertEqual(self.spool.pending(), 2)
+
+    def test_result_timeout(self) -> None:
+        with self.assertRaises(TimeoutError):
+            self.spool.result("missing", timeout=0.0)
+
+
+class TestRenderWorker_process(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.spool = spool.Spool(tmpdir.name)
+        self.worker = spool.RenderWorker(self.spool, batch_size=2, retries=1)
+        patcher = mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure)
+        self.render_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch(self) -> None:
+        job_ids = [
+            self.spool.submit([helpers.presentation(f"{i}-{j}") for j in range(i + 1)])
+            for i in range(3)
+        ]
+        batches = [self.worker.process(), self.worker.process(), self.worker.process()]
+        self.assertEqual([len(batch) for batch in batches], [2, 1, 0])
+        for i, job_id in enumerate(job_ids):
+            metrics = self.spool.result(job_id, timeout=0.0)
+            self.assertIsNone(metrics.error)
+            self.assertEqual((metrics.slides, metrics.attempts), (i + 1, 1))
+            self.assertGreater(metrics.slides_per_second, 0.0)
+            prs = pptx.Presentation(self.spool.output_path(job_id))
+            self.assertEqual(
+                [slide.shapes.title.text for slide in prs.slides],
+                [f"{i}-{j}" for j in range(i + 1)]
+            )
+        self.assertEqual(self.spool.pending(), 0)
+        self.assertEqual(os.listdir(os.path.join(self.spool.directory, "working")), [])
+
+    def test_retry(self) -> None:
+        self.render_mock.side_effect = [RuntimeError("crashed"), helpers.png(), helpers.png()]
+        job_id = self.spool.submit([helpers.presentation()])
+        with self.assertLogs(spool.logger, "WARNING"):
+            self.worker.process()
+        metrics = self.spool.result(job_id, timeout=0.0)
+        self.assertIsNone(metrics.error)
+        self.assertEqual(metrics.attempts, 2)
+        self.assertTrue(os.path.exists(self.spool.output_path(job_id)))
+
+    def test_failed(self) -> None:
+        self.render_mock.side_effect = RuntimeError("crashed")
+        job_id = self.spool.submit([helpers.presentation()])
+        with self.assertLogs(spool.logger, "WARNING"):
+            self.worker.process()
+        metrics = self.spool.result(job_id, timeout=0.0)
+        self.assertEqual(metrics.error, "RuntimeError: crashed")
+        self.assertEqual(metrics.attempts, 2)
+        self.assertFalse(os.path.exists(self.spool.output_path(job_id)))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.spool.directory, "failed"))),
+            [f"{job_id}.json", f"{job_id}.tlps"]
+        )
+
+    def test_invalid_spec(self) -> None:
+        with open(os.path.join(self.spool.directory, "incoming", "bad.tlps"), "wb") as f:
+            f.write(b"bad")
+        self.worker.process()
+        metrics = self.spool.result("bad", timeout=0.0)
+        self.assertEqual((metrics.error, metrics.attempts), ("ValueError: Not a presentation spec", 0))
+
+    def test_unexpected_error(self) -> None:
+        job_ids = [self.spool.submit([helpers.presentation(str(i))]) for i in range(3)]
+        render = self.worker._render
+
+        def fail_first(job_id: str) -> spool.JobMetrics:
+            if job_id == job_ids[0]:
+                raise OSError("disk error")
+            return render(job_id)
+
+        with mock.patch(
+            "tlab_pptx.specs.loads",
+            side_effect=[struct.error("bad"), [helpers.presentation("2")]]
+        ), mock.patch.object(self.worker, "_render", side_effect=fail_first):
+            self.worker.process()
+            self.worker.process()
+        errors = [self.spool.result(job_id, timeout=0.0).error for job_id in job_ids]
+        self.assertEqual(errors, ["OSError: disk error", "error: bad", None])
+        self.assertEqual(os.listdir(os.path.join(self.spool.directory, "working")), [])
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(spool))
+    return tests
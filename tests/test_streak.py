@@ -0,0 +1,153 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import dataclasses
+import doctest
+import datetime
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from tlab_pptx import photo_luminescence as pl, streak
+
+
+class TestStreakImage_project(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "streak.raw")
+        rng = np.random.default_rng(0)
+        self.images = rng.integers(0, 4096, size=(3, 40, 24), dtype="<u2")
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 100)
+            f.write(self.images.tobytes())
+        self.image = streak.StreakImage(self.path, width=24, height=40, offset=100)
+
+    def test_windows(self) -> None:
+        times = np.linspace(-1.0, 10.0, 40)
+        wavelengths = np.linspace(400.0, 600.0, 24)
+        total = self.images.sum(axis=0, dtype=np.float64)
+        for time_window, wavelength_window in [
+            (None, None),
+            ((0.0, 5.0), (450.0, 500.0)),
+            ((5.0, 0.0), (600.0, 599.0)),
+        ]:
+            rows = np.ones(40, dtype=bool) if time_window is None \
+                else (times >= min(time_window)) & (times <= max(time_window))
+            columns = np.ones(24, dtype=bool) if wavelength_window is None \
+                else (wavelengths >= min(wavelength_window)) & (wavelengths <= max(wavelength_window))
+            for chunk_bytes in [1, 100, 1 << 24]:
+                with self.subTest(window=time_window, chunk_bytes=chunk_bytes):
+                    projections = self.image.project(
+                        time_window,
+                        wavelength_window,
+                        times=times,
+                        wavelengths=wavelengths,
+                        chunk_bytes=chunk_bytes
+                    )
+                    np.testing.assert_array_equal(projections.spectrum, total[rows].sum(axis=0))
+                    np.testing.assert_array_equal(projections.decay, total[:, columns].sum(axis=1))
+                    np.testing.assert_array_equal(projections.times, times)
+                    self.assertEqual((projections.images, projections.frame), (3, None))
+
+    def test_bounded(self) -> None:
+        shapes = []
+        memmap = np.memmap
+
+        def record(*args: object, **kwargs: object) -> object:
+            mapped = memmap(*args, **kwargs)  # type: ignore[call-overload]
+            shapes.append(mapped.nbytes)
+            return mapped
+
+        with mock.patch("numpy.memmap", side_effect=record):
+            self.image.project(chunk_bytes=480)
+        self.assertEqual(len(shapes), 3 * 4)
+        self.assertTrue(all(size <= 480 for size in shapes))
+
+    def test_frames(self) -> None:
+        image = streak.StreakImage(self.path, width=24, height=40, offset=100, frames=1, frame=10000)
+        projections = image.project()
+        np.testing.assert_array_equal(projections.decay, self.images[0].sum(axis=1))
+        self.assertEqual((projections.images, projections.frame), (1, 10000))
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            self.image.project(time_window=(100.0, 200.0))
+        with self.assertRaises(ValueError):
+            self.image.project(times=np.arange(39))
+        with self.assertRaises(ValueError):
+            streak.StreakImage(self.path, width=240, height=400).project()
+
+
+class TestStreakImage_from_itex(TestCase):
+
+    def test_header(self) -> None:
+        image = np.arange(6 * 5, dtype="<u2").reshape(5, 6)
+        comment = b'HiPic,[Acquisition],AcqMode="Analog Integration",NrExposure=5000,NrTrigger=0'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "streak.img")
+            with open(path, "wb") as f:
+                f.write(struct.pack("<2s6h", b"IM", len(comment), 6, 5, 0, 0, 2).ljust(64, b"\0"))
+                f.write(comment)
+                f.write(image.tobytes())
+            streak_image = streak.StreakImage.from_itex(path)
+            self.assertEqual(
+                (streak_image.width, streak_image.height, streak_image.dtype, streak_image.offset),
+                (6, 5, "<u2", 64 + len(comment))
+            )
+            self.assertEqual(streak_image.frame, 5000)
+            np.testing.assert_array_equal(streak_image.project().decay, image.sum(axis=1))
+            with open(path, "r+b") as f:
+                f.write(b"XX")
+            with self.assertRaises(ValueError):
+                streak.StreakImage.from_itex(path)
+
+
+class TestProjections(TestCase):
+
+    def _projections(self) -> streak.Projections:
+        wavelengths = np.linspace(400.0, 600.0, 401)
+        return streak.Projections(
+            wavelengths=wavelengths,
+            spectrum=1000.0 * np.exp(-0.5 * ((wavelengths - 487.3) / 10.0) ** 2),
+            times=np.linspace(0.0, 10.0, 101),
+            decay=np.exp(-np.linspace(0.0, 10.0, 101)),
+            images=1,
+            frame=42
+        )
+
+    def test_half_maxima(self) -> None:
+        projections = self._projections()
+        self.assertAlmostEqual(projections.center_wavelength, 487.3, places=2)
+        self.assertAlmostEqual(projections.FWHM, 2 * np.sqrt(2 * np.log(2)) * 10.0, places=1)
+
+    def test_fields(self) -> None:
+        fields = self._projections().fields()
+        prs = pl.Presentation(
+            title="title",
+            excitation_wavelength=400,
+            excitation_power=1,
+            time_range=10,
+            date=datetime.date(2022, 1, 1),
+            a=60,
+            b=40,
+            tau1=1.0,
+            tau2=3.0,
+            **fields
+        )
+        self.assertEqual((prs.center_wavelength, prs.frame), (487, 42))
+        self.assertIs(prs.v_fig, fields["v_fig"])
+        self.assertEqual(fields["v_fig"]["data"][0]["x"][-1], 10.0)
+
+    def test_unknown_frame(self) -> None:
+        projections = dataclasses.replace(self._projections(), frame=None)
+        with self.assertRaises(ValueError):
+            projections.fields()
+        self.assertEqual(projections.fields(frame=300)["frame"], 300)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(streak))
+    return tests
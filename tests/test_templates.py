@@ -0,0 +1,71 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import io
+import os
+import tempfile
+
+import pptx
+
+from tlab_pptx import templates
+
+
+def _template(title: str) -> bytes:
+    prs = pptx.Presentation()
+    prs.core_properties.title = title
+    with io.BytesIO() as f:
+        prs.save(f)
+        return f.getvalue()
+
+
+class TestTemplateCache_open(TestCase):
+
+    def test_independent(self) -> None:
+        cache = templates.TemplateCache()
+        first = cache.open()
+        first.slides.add_slide(first.slide_layouts[5]).shapes.title.text = "title"
+        second = cache.open()
+        self.assertEqual(len(second.slides), 0)
+        self.assertEqual(cache.stats(), templates.TemplateStats(1, 1, 1))
+        with io.BytesIO() as f:
+            first.save(f)
+            f.seek(0)
+            reloaded = pptx.Presentation(f)
+        self.assertEqual(reloaded.slides[0].shapes.title.text, "title")
+
+    def test_parse_once(self) -> None:
+        cache = templates.TemplateCache()
+        with mock.patch(
+            "tlab_pptx.templates.pptx.Presentation",
+            wraps=pptx.Presentation
+        ) as presentation_mock:
+            for _ in range(3):
+                cache.open()
+        presentation_mock.assert_called_once_with(None)
+
+    def test_filepath(self) -> None:
+        cache = templates.TemplateCache()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "template.pptx")
+            with open(path, "wb") as f:
+                f.write(_template("lab"))
+            self.assertEqual(cache.open(path).core_properties.title, "lab")
+            self.assertEqual(cache.open(path).core_properties.title, "lab")
+            self.assertEqual(cache.stats().hits, 1)
+            with open(path, "wb") as f:
+                f.write(_template("lab-v2"))
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(cache.open(path).core_properties.title, "lab-v2")
+            self.assertEqual(cache.stats().misses, 2)
+
+    def test_buffer(self) -> None:
+        cache = templates.TemplateCache(max_entries=1)
+        for title in ["a", "b", "a"]:
+            with io.BytesIO(_template(title)) as f:
+                self.assertEqual(cache.open(f).core_properties.title, title)
+        self.assertEqual(cache.stats(), templates.TemplateStats(0, 3, 1))
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(templates))
+    return tests
@@ -0,0 +1,240 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+from unittest import TestCase, mock
+import doctest
+import json
+import os
+import tempfile
+import threading
+import typing as t
+
+import pptx
+
+from tlab_pptx import deck, incremental, photo_luminescence as pl, watch
+from tests import helpers
+
+
+def _record(title: str, tau1: float = 1.0) -> dict[str, t.Any]:
+    return dict(
+        title=title,
+        excitation_wavelength=400,
+        excitation_power=1,
+        time_range=10,
+        center_wavelength=480,
+        FWHM=48,
+        frame=10000,
+        date="2022-01-01",
+        h_fig=dict(data=[dict(type="scatter", y=[0, 1])]),
+        v_fig=dict(data=[]),
+        a=60,
+        b=40,
+        tau1=tau1,
+        tau2=3.0
+    )
+
+
+class _Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestWatcher_poll(TestCase):
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = os.path.join(tmpdir.name, "measurements")
+        os.mkdir(self.directory)
+        self.output = os.path.join(tmpdir.name, "deck.pptx")
+        self.clock = _Clock()
+        self.watcher = watch.Watcher(self.directory, self.output, settle=1.0, clock=self.clock)
+        patcher = mock.patch("tlab_pptx.common.render_figure", side_effect=helpers.render_figure)
+        self.render_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, name: str, content: str) -> None:
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(content)
+
+    def _poll(self, now: float) -> watch.WatchEvent | None:
+        self.clock.now = now
+        return self.watcher.poll()
+
+    def _titles(self) -> list[str]:
+        prs = pptx.Presentation(self.output)
+        return [slide.shapes.title.text for slide in prs.slides]
+
+    def test_settle(self) -> None:
+        self._write("a.json", json.dumps(_record("a"))[:10])
+        self._write("ignored.txt", "")
+        self.assertIsNone(self._poll(0.0))
+        self._write("a.json", json.dumps(_record("a")))
+        self.assertIsNone(self._poll(0.5))
+        self.assertIsNone(self._poll(1.0))
+        event = self._poll(1.5)
+        assert event is not None
+        self.assertEqual(event.paths, (os.path.join(self.directory, "a.json"),))
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=0, rebuilt=1, removed=0))
+        self.assertEqual(event.latencies, (1.5,))
+        self.assertEqual(self._titles(), ["a"])
+        self.assertIsNone(self._poll(10.0))
+
+    def test_append(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._poll(0.0)
+        self._poll(1.0)
+        self.render_mock.reset_mock()
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(2.0)
+        event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=1, rebuilt=1, removed=0))
+        self.assertEqual(self.render_mock.call_count, 2)
+        self.assertEqual(self._titles(), ["a", "b"])
+
+    def test_rewritten(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(0.0)
+        self._poll(1.0)
+        self._write("a.json", json.dumps(_record("a", tau1=2.0)))
+        self._poll(2.0)
+        event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=1, rebuilt=1, removed=1))
+        self.assertEqual(self._titles(), ["a", "b"])
+
+    def test_invalid(self) -> None:
+        self._write("a.json", "{")
+        self._poll(0.0)
+        with self.assertLogs(watch.logger, "WARNING"):
+            event = self._poll(1.0)
+        assert event is not None
+        self.assertIsNone(event.stats)
+        self.assertEqual(list(event.errors), [os.path.join(self.directory, "a.json")])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertIsNone(self._poll(2.0))
+        self.assertEqual(
+            self.watcher.stats(),
+            watch.WatchStats(events=0, measurements=0, failures=1, latency_mean=None, latency_max=None)
+        )
+
+    def test_invalid_figure(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._poll(0.0)
+        self._poll(1.0)
+        record = _record("a")
+        record["h_fig"] = dict(data="oops")
+        self._write("a.json", json.dumps(record))
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(2.0)
+        with self.assertLogs(watch.logger, "WARNING"):
+            event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(list(event.errors), [os.path.join(self.directory, "a.json")])
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=0, rebuilt=1, removed=1))
+        self.assertEqual(self._titles(), ["b"])
+
+    def test_update_failed(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._poll(0.0)
+        self.render_mock.side_effect = RuntimeError("renderer crashed")
+        with self.assertLogs(watch.logger, "WARNING"):
+            event = self._poll(1.0)
+        assert event is not None
+        self.assertIsNone(event.stats)
+        self.assertEqual(list(event.errors), [os.path.join(self.directory, "a.json")])
+        self.render_mock.side_effect = helpers.render_figure
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(2.0)
+        event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(event.errors, {})
+        self.assertEqual(self._titles(), ["b"])
+
+    def test_keys_kept(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._poll(0.0)
+        self._poll(1.0)
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(2.0)
+        with mock.patch(
+            "tlab_pptx.photo_luminescence.Presentation.get_spec_key",
+            autospec=True,
+            side_effect=pl.Presentation.get_spec_key
+        ) as get_spec_key_mock:
+            event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=1, rebuilt=1, removed=0))
+        self.assertEqual(
+            [call.args[0].title for call in get_spec_key_mock.call_args_list],
+            ["b"]
+        )
+
+    def test_deck_kept_open(self) -> None:
+        with mock.patch("tlab_pptx.deck.open_deck", wraps=deck.open_deck) as open_mock:
+            for i, name in enumerate(["a", "b", "c"]):
+                self._write(f"{name}.json", json.dumps(_record(name)))
+                self._poll(2.0 * i)
+                event = self._poll(2.0 * i + 1.0)
+                assert event is not None
+                self.assertEqual(event.stats, incremental.UpdateStats(reused=i, rebuilt=1, removed=0))
+        open_mock.assert_called_once_with(self.output, None)
+        self.assertEqual(self._titles(), ["a", "b", "c"])
+
+    def test_debounce(self) -> None:
+        self.watcher.debounce = 2.0
+        with mock.patch("tlab_pptx.deck.replace_deck", wraps=deck.replace_deck) as replace_mock:
+            self._write("a.json", json.dumps(_record("a")))
+            self._poll(0.0)
+            event = self._poll(1.0)
+            assert event is not None
+            self.assertEqual(event.latencies, ())
+            self._write("b.json", json.dumps(_record("b")))
+            self._poll(1.5)
+            self._poll(2.5)
+            self.assertFalse(os.path.exists(self.output))
+            self.assertIsNone(self._poll(4.0))
+            event = self._poll(4.5)
+        assert event is not None
+        self.assertEqual(event.latencies, (4.5, 3.0))
+        replace_mock.assert_called_once()
+        self.assertEqual(self._titles(), ["a", "b"])
+        self.assertEqual(self.watcher.stats().measurements, 2)
+
+    def test_restart(self) -> None:
+        self._write("a.json", json.dumps(_record("a")))
+        self._write("b.json", json.dumps(_record("b")))
+        self._poll(0.0)
+        self._poll(1.0)
+        self.render_mock.reset_mock()
+        os.remove(os.path.join(self.directory, "a.json"))
+        self.watcher = watch.Watcher(self.directory, self.output, settle=1.0, clock=self.clock)
+        self._poll(2.0)
+        event = self._poll(3.0)
+        assert event is not None
+        self.assertEqual(event.stats, incremental.UpdateStats(reused=1, rebuilt=0, removed=1))
+        self.render_mock.assert_not_called()
+        self.assertEqual(self._titles(), ["b"])
+
+
+class TestWatcher_run(TestCase):
+
+    def test_run(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            watcher = watch.Watcher(tmpdir, os.path.join(tmpdir, "deck.pptx"))
+            stop = threading.Event()
+            with mock.patch("tlab_pptx.sessions.RendererSession") as session_mock, \
+                    mock.patch.object(watcher, "poll", side_effect=lambda: stop.set()) as poll_mock:
+                watcher.run(interval=0.0, stop=stop)
+            poll_mock.assert_called_once_with()
+            session_mock.return_value.close.assert_called_once_with()
+            self.assertIsNone(watcher.session)
+
+
+def load_tests(loader, tests, _):  # type: ignore
+    tests.addTests(doctest.DocTestSuite(watch))
+    return tests
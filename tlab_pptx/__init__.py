@@ -1,11 +1,48 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 __version__ = "0.0.2"
 
-from .abstract import AbstractPresentation
-from .photo_luminescence import Presentation as PhotoLuminescencePresentation
+import os
+import importlib
+import typing as t
 
+if t.TYPE_CHECKING:
+    from .abstract import AbstractPresentation
+    from .photo_luminescence import (
+        Presentation as PhotoLuminescencePresentation
+    )
+
+
+# The public names are imported on first access so that `import tlab_pptx`
+# does not pull in pptx, plotly and numpy.
+_LAZY_ATTRIBUTES = {
+    "AbstractPresentation": ("abstract", "AbstractPresentation"),
+    "PhotoLuminescencePresentation": ("photo_luminescence", "Presentation"),
+}
 
 __all__ = [
     "AbstractPresentation",
     "PhotoLuminescencePresentation",
 ]
+
+
+def __getattr__(name: str) -> t.Any:
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}"
+        ) from None
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
+
+
+# Kaleido is only started on import when asked, since importing the
+# sessions module loads plotly and kaleido.
+if os.environ.get("TLAB_PPTX_PREWARM"):
+    importlib.import_module(".sessions", __name__)
@@ -0,0 +1,8 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import sys
+
+from tlab_pptx import cli
+
+
+if __name__ == "__main__":
+    sys.exit(cli.main())
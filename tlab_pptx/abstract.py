@@ -1,9 +1,20 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 import abc
+import asyncio
+import typing as t
 
 import pptx.presentation
+import pptx.slide
 
-from tlab_pptx import common
+from tlab_pptx import (
+    caching,
+    common,
+    instrumentation,
+    profiles,
+    rendering,
+    sessions,
+    templates
+)
 
 
 class AbstractPresentation(abc.ABC):
@@ -19,6 +30,90 @@ class AbstractPresentation(abc.ABC):
             A Presentation object of python-pptx
         """
 
+    def figures(self) -> list[common.PlacedFigure]:
+        """Get the figures of the slide
+
+        The figures are rendered in this order and passed to `add_slide`,
+        which lets a batch render them ahead of slide assembly.
+
+        Returns
+        -------
+        list of tlab_pptx.common.PlacedFigure
+            The figures to be rendered.
+        """
+        return []
+
+    def get_spec_key(self, profile: profiles.RenderProfile) -> str | None:
+        """Get the key identifying the content of the slide
+
+        A deck updated incrementally reuses a slide whose stored key equals
+        the key of the presentation instead of building it again.
+
+        Parameters
+        ----------
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+
+        Returns
+        -------
+        str or None
+            A key computed by `tlab_pptx.incremental.make_spec_key`, or None
+            if the slide is always built again.
+        """
+        return None
+
+    def get_spec_fields(self) -> dict[str, t.Any] | None:
+        """Get the fields of the spec to be embedded in a `pptx` file
+
+        The fields are stored by `tlab_pptx.metadata.embed` so that decks
+        can be indexed and queried without being opened.
+
+        Returns
+        -------
+        dict or None
+            The scalar fields by their names, or None if the slide has no
+            fields to be indexed.
+        """
+        return None
+
+    @abc.abstractmethod
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        """Append a slide to a Presentation object
+
+        This lets presentations be combined into a deck.
+
+        Parameters
+        ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx to be updated.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        images : sequence of bytes or None, optional
+            The images already rendered from `figures()`. The figures whose
+            images are omitted or None are added here.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with.
+        compiled : bool
+            If true, a slide of a fixed layout is filled from its slide XML
+            compiled once by `tlab_pptx.compiled` instead of drawing every
+            shape. It is ignored by the other presentations.
+
+        Returns
+        -------
+        pptx.slide.Slide
+            The added slide.
+        """
+
     @abc.abstractmethod
     def save(self, filepath_or_buffer: common.FilePathOrBuffer) -> None:
         """Save as a `pptx` file.
@@ -28,3 +123,87 @@ class AbstractPresentation(abc.ABC):
         filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
             A filepath string or buffer object.
         """
+
+    async def build_async(
+        self,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        workers: int = 1,
+        pool: rendering.RenderPool | None = None,
+        semaphore: asyncio.Semaphore | None = None
+    ) -> pptx.presentation.Presentation:
+        """Build a Presentation object without blocking the event loop
+
+        The figures of `figures()` are rendered concurrently off the event
+        loop, and the slide is assembled by `add_slide` in a thread.
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images used by a new pool.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        workers : int
+            The number of worker processes of a new pool. With 1, the
+            figures are rendered by threads sharing one kaleido process.
+        pool : tlab_pptx.rendering.RenderPool, optional
+            A pool shared by many builds, used instead of a new pool.
+        semaphore : asyncio.Semaphore, optional
+            A semaphore shared by many builds to bound the number of
+            figures rendered at once.
+
+        Returns
+        -------
+        pptx.presentaion.Presentation
+            A Presentation object of python-pptx
+        """
+        profile = profiles.get_profile(profile)
+        with instrumentation.span("build", workers=workers):
+            async with rendering.open_pool(pool, workers, cache) as pool:
+                images = await rendering.render_async(
+                    self.figures(),
+                    pool,
+                    profile,
+                    semaphore
+                )
+            with instrumentation.span("template"):
+                prs = await asyncio.to_thread(templates.open_template)
+            assert isinstance(prs, pptx.presentation.Presentation)
+            await asyncio.to_thread(
+                self.add_slide,
+                prs,
+                images=images,
+                profile=profile
+            )
+        return prs
+
+    async def save_async(
+        self,
+        filepath_or_buffer: common.FilePathOrBuffer,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        workers: int = 1,
+        pool: rendering.RenderPool | None = None,
+        semaphore: asyncio.Semaphore | None = None
+    ) -> None:
+        """Save as a `pptx` file without blocking the event loop.
+
+        Parameters
+        ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object.
+        cache, profile, workers, pool, semaphore
+            The same as `build_async`.
+        """
+        prs = await self.build_async(
+            cache=cache,
+            profile=profile,
+            workers=workers,
+            pool=pool,
+            semaphore=semaphore
+        )
+        await asyncio.to_thread(
+            common.save_presentation,
+            prs,
+            filepath_or_buffer
+        )
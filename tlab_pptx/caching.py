@@ -0,0 +1,227 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import json
+import hashlib
+import pathlib
+import tempfile
+import threading
+import dataclasses
+import typing as t
+
+import plotly
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    """Statistics of a render cache.
+
+    Attributes
+    ----------
+        hits : int
+            The number of lookups answered from the cache.
+        misses : int
+            The number of lookups not found in the cache.
+        evictions : int
+            The number of entries removed to honor the size limit.
+        entries : int
+            The number of entries currently stored.
+        size : int
+            The total size of the stored entries in bytes.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RenderCache:
+    """Content-addressed on-disk cache of rendered figure images.
+
+    Entries are keyed by a hash of the figure JSON and the render parameters,
+    so an identical figure rendered with identical parameters is never passed
+    to kaleido twice. The least recently used entries are evicted once the
+    total size exceeds `max_size`. The total size is scanned once and then
+    kept up to date by `put`, so the directory is only scanned again when
+    the limit is exceeded.
+
+    Parameters
+    ----------
+        directory : str or os.PathLike
+            The directory to store the entries in. It is created if missing.
+        max_size : int
+            The maximum total size of the entries in bytes.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmpdir:
+    ...     cache = RenderCache(tmpdir)
+    ...     key = cache.make_key("{}", format="png", scale=10)
+    ...     cache.get(key) is None
+    ...     cache.put(key, b"png_image")
+    ...     cache.get(key)
+    ...     cache.stats().hits, cache.stats().misses
+    True
+    b'png_image'
+    (1, 1)
+    """
+    suffix = ".img"
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        max_size: int = 1 << 30
+    ) -> None:
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        # The total size of the entries, or None until it is scanned.
+        self._size: int | None = None
+
+    @staticmethod
+    def make_key(figure_json: str, **params: t.Any) -> str:
+        """Compute the key of a rendered figure.
+
+        Parameters
+        ----------
+            figure_json : str
+                The JSON representation of the styled figure.
+            **params : Any
+                The render parameters, e.g. the image format and the scale.
+
+        Returns
+        -------
+        str
+            A hex digest identifying the rendered image.
+        """
+        params = dict(params, plotly=plotly.__version__)
+        digest = hashlib.sha256(figure_json.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / (key + self.suffix)
+
+    def get(self, key: str) -> bytes | None:
+        """Look up a rendered image.
+
+        Parameters
+        ----------
+            key : str
+                The key computed by `make_key`.
+
+        Returns
+        -------
+        bytes or None
+            The stored image, or None if the key is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a rendered image and evict old entries if necessary.
+
+        Parameters
+        ----------
+            key : str
+                The key computed by `make_key`.
+            data : bytes
+                The rendered image.
+        """
+        path = self._path(key)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        # Each writer has its own temporary file, so concurrent writers of
+        # the same key never replace the entry with a partial image.
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{path.name}.",
+            suffix=".tmp",
+            dir=self.directory
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_size:
+                self._evict()
+
+    def _entries(self) -> list[tuple[pathlib.Path, os.stat_result]]:
+        entries = []
+        for path in self.directory.glob("*" + self.suffix):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _evict(self) -> None:
+        # The entries written by other processes are only counted here.
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        entries.sort(key=lambda entry: entry[1].st_mtime_ns)
+        for path, stat in entries:
+            if size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            else:
+                self._evictions += 1
+            size -= stat.st_size
+        self._size = size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            for path, _ in self._entries():
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        """Get the statistics of the cache.
+
+        Returns
+        -------
+        tlab_pptx.caching.CacheStats
+            The hit/miss counts of this instance and the current disk usage.
+        """
+        entries = self._entries()
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(entries),
+            size=sum(stat.st_size for _, stat in entries)
+        )
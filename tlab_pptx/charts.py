@@ -0,0 +1,207 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import typing as t
+
+import numpy as np
+import pptx
+import pptx.util
+import pptx.slide
+import pptx.chart.data
+import pptx.dml.color
+import pptx.enum.chart
+import pptx.enum.text
+import pptx.oxml.ns
+import plotly.graph_objects as go
+
+from tlab_pptx import decimation
+
+
+CHART_TYPES = {
+    "lines": pptx.enum.chart.XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS,
+    "markers": pptx.enum.chart.XL_CHART_TYPE.XY_SCATTER,
+    "lines+markers": pptx.enum.chart.XL_CHART_TYPE.XY_SCATTER_LINES,
+}
+
+# The lab style of `tlab_pptx.common.style_figure` in layout pixels.
+LAYOUT_SIZE = 500
+FONT_SIZE = 18
+LINE_WIDTH = 0.85
+
+
+def _get_mode(trace: t.Any) -> str:
+    if trace.mode is not None:
+        return str(trace.mode)
+    if trace.y is None or len(trace.y) >= 20:
+        return "lines"
+    return "lines+markers"
+
+
+def _get_xy(trace: t.Any) -> tuple[np.ndarray, np.ndarray]:
+    y = np.asarray(trace.y, dtype=float)
+    if trace.x is None:
+        x = np.arange(len(y), dtype=float)
+    else:
+        x = np.asarray(trace.x, dtype=float)
+    mask = np.isfinite(x) & np.isfinite(y)
+    return x[mask], y[mask]
+
+
+def is_supported(fig: go.Figure) -> bool:
+    """Check if a figure can be converted into a native chart.
+
+    A figure is supported if all of its traces are numeric `Scatter` traces
+    drawn with the same mode on a single pair of axes.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure
+            A figure to be checked.
+
+    Returns
+    -------
+    bool
+        True if `add_chart` can reproduce the figure.
+
+    Examples
+    --------
+    >>> is_supported(go.Figure(go.Scatter(x=[0, 1], y=[1, 0])))
+    True
+    >>> is_supported(go.Figure(go.Heatmap(z=[[0, 1], [1, 0]])))
+    False
+    """
+    if not fig.data:
+        return False
+    modes = set()
+    for trace in fig.data:
+        if trace.type != "scatter" or trace.y is None:
+            return False
+        if trace.xaxis not in (None, "x") or trace.yaxis not in (None, "y"):
+            return False
+        if trace.fill not in (None, "none") or trace.error_y.array is not None:
+            return False
+        try:
+            _get_xy(trace)
+        except (TypeError, ValueError):
+            return False
+        modes.add(_get_mode(trace))
+    return len(modes) == 1 and modes <= CHART_TYPES.keys() \
+        and not fig.layout.annotations
+
+
+def _format_axis(
+    axis: t.Any,
+    layout_axis: t.Any,
+    font_size: pptx.util.Length
+) -> None:
+    title = layout_axis.title.text
+    axis.has_title = bool(title)
+    if title:
+        axis.axis_title.text_frame.text = title
+        axis.axis_title.text_frame.paragraphs[0].font.size = font_size
+        axis.axis_title.text_frame.paragraphs[0].font.bold = False
+    log = layout_axis.type == "log"
+    if log:
+        scaling = axis._element.scaling
+        log_base = scaling.makeelement(
+            pptx.oxml.ns.qn("c:logBase"),
+            {"val": "10"}
+        )
+        scaling.insert(0, log_base)
+    if layout_axis.range is not None:
+        low, high = layout_axis.range
+        axis.minimum_scale = 10 ** low if log else low
+        axis.maximum_scale = 10 ** high if log else high
+    axis.has_major_gridlines = False
+    axis.has_minor_gridlines = False
+    axis.major_tick_mark = pptx.enum.chart.XL_TICK_MARK.INSIDE
+    axis.minor_tick_mark = pptx.enum.chart.XL_TICK_MARK.NONE
+    axis.tick_label_position = pptx.enum.chart.XL_TICK_LABEL_POSITION.LOW
+    axis.tick_labels.font.size = font_size
+    axis.format.line.color.rgb = pptx.dml.color.RGBColor(0, 0, 0)
+
+
+def add_chart(
+    slide: pptx.slide.Slide,
+    fig: go.Figure,
+    left: float,
+    top: float,
+    width: float = 12.0,
+    height: float = 12.0,
+    annotations: t.Sequence[dict[str, t.Any]] = (),
+    max_points: int | None = None
+) -> None:
+    """Add a figure to a slide as a native XY scatter chart.
+
+    The axis titles, ranges, log axes and the tick style of the figure are
+    carried over, and the annotations are added as text boxes at the bottom
+    right of the chart. The figure itself is not modified.
+
+    Parameters
+    ----------
+        slide : pptx.slide.Slide
+            A slide to be updated.
+        fig : plotly.graph_objects.Figure
+            A figure supported by `is_supported`.
+        left : float
+            The left position of the chart in centimeter.
+        top : float
+            The top position of the chart in centimeter.
+        width : float
+            The width of the chart in centimeter.
+        height : float
+            The height of the chart in centimeter.
+        annotations : sequence of dict
+            Annotations like `tlab_pptx.common.get_date_annotation`.
+        max_points : int, optional
+            The number of points line traces with ascending x values are
+            decimated to by `tlab_pptx.decimation.lttb`.
+    """
+    chart_data = pptx.chart.data.XyChartData()
+    for i, trace in enumerate(fig.data):
+        series = chart_data.add_series(trace.name or f"trace {i}")
+        xs, ys = _get_xy(trace)
+        if (
+            max_points is not None
+            and len(xs) > max_points
+            and "markers" not in _get_mode(trace)
+            and np.all(np.diff(xs) >= 0)
+        ):
+            selected = decimation.lttb(xs, ys, max_points)
+            xs, ys = xs[selected], ys[selected]
+        for x, y in zip(xs, ys):
+            series.add_data_point(float(x), float(y))
+    graphic_frame = slide.shapes.add_chart(
+        CHART_TYPES[_get_mode(fig.data[0])],
+        pptx.util.Cm(left),
+        pptx.util.Cm(top),
+        pptx.util.Cm(width),
+        pptx.util.Cm(height),
+        chart_data
+    )
+    chart = graphic_frame.chart
+    chart.has_legend = False
+    chart.font.name = "Arial"
+    pt_per_px = pptx.util.Cm(width).pt / LAYOUT_SIZE
+    font_size = pptx.util.Pt(round(FONT_SIZE * pt_per_px, 1))
+    _format_axis(chart.category_axis, fig.layout.xaxis, font_size)
+    _format_axis(chart.value_axis, fig.layout.yaxis, font_size)
+    for trace, series in zip(fig.data, chart.plots[0].series):
+        line = series.format.line
+        line.width = pptx.util.Pt(round(LINE_WIDTH * pt_per_px, 2))
+        color = trace.line.color
+        if isinstance(color, str) and color.startswith("#") \
+                and len(color) == 7:
+            line.color.rgb = pptx.dml.color.RGBColor.from_string(color[1:])
+        series.smooth = False
+    for annotation in annotations:
+        size = annotation.get("font", {}).get("size", FONT_SIZE)
+        textbox = slide.shapes.add_textbox(
+            left=pptx.util.Cm(left),
+            top=pptx.util.Cm(top + height - 1.0),
+            width=pptx.util.Cm(width),
+            height=pptx.util.Cm(1.0)
+        )
+        textbox.text_frame.text = annotation["text"]
+        for paragraph in textbox.text_frame.paragraphs:
+            paragraph.alignment = pptx.enum.text.PP_ALIGN.RIGHT
+            paragraph.font.name = "Arial"
+            paragraph.font.size = pptx.util.Pt(round(size * pt_per_px, 1))
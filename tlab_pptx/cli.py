@@ -0,0 +1,472 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Build photo luminescence presentations from a manifest of experiments.
+
+    $ tlab-pptx experiments.csv report.pptx --jobs 4 --profile screen
+    $ tlab-pptx experiments.json slides/ --split
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import collections
+import concurrent.futures
+import typing as t
+
+import pandas as pd
+import pptx.presentation
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    deck,
+    frames,
+    instrumentation,
+    metadata,
+    overview,
+    photo_luminescence as pl,
+    profiles,
+    rendering,
+    templates
+)
+
+
+_FIGURE_COLUMNS = ("h_fig", "v_fig")
+
+Errors = dict[t.Hashable, list[str]]
+
+
+def read_manifest(path: common.FilePath) -> pd.DataFrame:
+    """Read a manifest of experiments.
+
+    The manifest is a CSV file with a header, or a JSON array of objects,
+    with the fields of `tlab_pptx.photo_luminescence.Presentation`. The rows
+    are labelled from 1.
+
+    Parameters
+    ----------
+        path : str or os.PathLike
+            The path of a `.csv` or `.json` file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The experiments as read, with the figures still given by paths.
+
+    Raises
+    ------
+    ValueError
+        If the format is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        # Keep the cells as written so that invalid ones are reported as is.
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    elif extension == ".json":
+        with open(path, "rb") as f:
+            records = json.load(f)
+        if not isinstance(records, list):
+            raise ValueError(
+                f"{os.fspath(path)!r} must hold an array of experiments"
+            )
+        frame = pd.DataFrame(records)
+    else:
+        raise ValueError(f"Unsupported manifest format: {extension!r}")
+    frame.index = pd.RangeIndex(1, len(frame) + 1)
+    return frame
+
+
+def read_figure(path: common.FilePath) -> common.FigureOrSpec:
+    """Read the data of a figure.
+
+    Parameters
+    ----------
+        path : str or os.PathLike
+            A plotly JSON file, or a CSV file whose first column is the x
+            values of a line for each of the other columns.
+
+    Returns
+    -------
+    dict
+        A figure dict.
+
+    Raises
+    ------
+    ValueError
+        If the format is not supported, or a JSON file does not hold a
+        figure, in which case it may be a `json.JSONDecodeError`.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        # The JSON is parsed here so that a broken file fails its row
+        # before any slide is built.
+        with open(path, "rb") as f:
+            fig = json.load(f)
+        if not isinstance(fig, dict):
+            raise ValueError(f"{os.fspath(path)!r} must hold a figure")
+        return fig
+    if extension == ".csv":
+        data = pd.read_csv(path)
+        x = data.iloc[:, 0].to_numpy()
+        return dict(
+            data=[
+                dict(
+                    type="scatter",
+                    x=x,
+                    y=data[name].to_numpy(),
+                    mode="lines",
+                    name=str(name)
+                )
+                for name in data.columns[1:]
+            ],
+            layout=dict(xaxis=dict(title=dict(text=str(data.columns[0]))))
+        )
+    raise ValueError(f"Unsupported figure format: {extension!r}")
+
+
+def load_presentations(
+    frame: pd.DataFrame,
+    directory: common.FilePath = "."
+) -> tuple[dict[t.Hashable, pl.Presentation], Errors]:
+    """Create the presentations of the valid rows of a manifest.
+
+    Parameters
+    ----------
+        frame : pandas.DataFrame
+            A manifest read by `read_manifest`.
+        directory : str or os.PathLike
+            The directory the paths of the figures are relative to.
+
+    Returns
+    -------
+    dict
+        The presentations by the label of their rows.
+    dict
+        The messages of the invalid rows by their labels.
+
+    Raises
+    ------
+    ValueError
+        If some columns are missing.
+    """
+    errors: Errors = {}
+    frame = frame.copy()
+    for column in _FIGURE_COLUMNS:
+        if column not in frame.columns:
+            continue
+        figures = []
+        for label, value in frame[column].items():
+            if not isinstance(value, str):
+                figures.append(value)
+                continue
+            try:
+                figures.append(read_figure(os.path.join(directory, value)))
+            except (OSError, json.JSONDecodeError, ValueError) as e:
+                errors.setdefault(label, []).append(
+                    f"invalid {column}: {value!r}: {e}"
+                )
+                figures.append(None)
+        frame[column] = figures
+    valid = frame.drop(index=list(errors))
+    try:
+        presentations = pl.Presentation.from_frame(valid)
+    except frames.InvalidRowsError as e:
+        for label, messages in e.errors.items():
+            errors.setdefault(label, []).extend(messages)
+        valid = valid.drop(index=list(e.errors))
+        presentations = pl.Presentation.from_frame(valid)
+    return dict(zip(valid.index, presentations)), errors
+
+
+def get_file_names(
+    presentations: t.Mapping[t.Hashable, pl.Presentation]
+) -> dict[t.Hashable, str]:
+    """Name a file after the title of each presentation.
+
+    The characters other than letters, digits, dots and hyphens are replaced
+    with underscores, and the label of the row is appended to a name which
+    is already taken.
+    """
+    names: dict[t.Hashable, str] = {}
+    used = set()
+    for label, presentation in presentations.items():
+        name = re.sub(r"[^\w.-]+", "_", presentation.title).strip("_.") \
+            or "slide"
+        if name.lower() in used:
+            name = f"{name}_{label}"
+        used.add(name.lower())
+        names[label] = f"{name}.pptx"
+    return names
+
+
+def _save_deck(
+    presentations: t.Mapping[t.Hashable, pl.Presentation],
+    path: str,
+    jobs: int,
+    profile: profiles.RenderProfile,
+    template: common.FilePath | None,
+    cache: caching.RenderCache | None,
+    embed_spec: bool = False,
+    compiled: bool = False,
+    with_overview: bool = False
+) -> Errors:
+    """Save the presentations in one deck, leaving out the failed ones.
+
+    If the deck fails, each presentation is built on its own to find the
+    rows to blame, and the deck is saved again without them. Every row is
+    blamed only if none of them fails on its own.
+    """
+    presentations = dict(presentations)
+    errors: Errors = {}
+    while presentations:
+        slides: list[abstract.AbstractPresentation] = \
+            list(presentations.values())
+        if with_overview:
+            slides.insert(0, overview.Overview(list(presentations.values())))
+        try:
+            deck.Deck(slides, template).save(
+                path,
+                cache=cache,
+                workers=jobs,
+                profile=profile,
+                compiled=compiled,
+                embed_spec=embed_spec
+            )
+            break
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+        failed: Errors = {}
+        for label, presentation in presentations.items():
+            try:
+                presentation.build(
+                    cache=cache,
+                    profile=profile,
+                    compiled=compiled
+                )
+            except Exception as e:
+                failed[label] = [f"{type(e).__name__}: {e}"]
+        if not failed:
+            failed = {label: [message] for label in presentations}
+        for label, messages in failed.items():
+            errors.setdefault(label, []).extend(messages)
+            del presentations[label]
+    return errors
+
+
+class _Progress(instrumentation.Hook):
+    """Hook printing a line as each slide is added."""
+
+    def __init__(self, total: int, file: t.TextIO) -> None:
+        self.total = total
+        self.file = file
+        self.count = 0
+
+    def on_end(self, span: instrumentation.Span) -> None:
+        if span.stage == "slide":
+            self.count += 1
+            print(
+                f"[{self.count}/{self.total}] {span.attributes.get('title')} "
+                f"({(span.duration or 0.0) * 1000:.0f} ms)",
+                file=self.file
+            )
+
+
+def _save_split(
+    presentations: t.Mapping[t.Hashable, pl.Presentation],
+    directory: str,
+    jobs: int,
+    profile: profiles.RenderProfile,
+    template: common.FilePath | None,
+    cache: caching.RenderCache | None,
+    embed_spec: bool = False,
+    compiled: bool = False
+) -> Errors:
+    """Save each presentation in its own file, rendering ahead in a pool."""
+    os.makedirs(directory, exist_ok=True)
+    names = get_file_names(presentations)
+    errors: Errors = {}
+
+    def save(
+        label: t.Hashable,
+        futures: list[concurrent.futures.Future[bytes] | None]
+    ) -> None:
+        try:
+            images = [
+                None if future is None else future.result()
+                for future in futures
+            ]
+            prs = templates.open_template(template)
+            assert isinstance(prs, pptx.presentation.Presentation)
+            presentations[label].add_slide(
+                prs,
+                images=images,
+                profile=profile,
+                compiled=compiled
+            )
+            if embed_spec:
+                metadata.embed(prs, metadata.make_records(
+                    [presentations[label]],
+                    len(prs.slides)
+                ))
+            common.save_presentation(
+                prs,
+                os.path.join(directory, names[label])
+            )
+        except Exception as e:
+            errors[label] = [f"{type(e).__name__}: {e}"]
+
+    with rendering.RenderPool(jobs, cache=cache) as pool:
+        pending: collections.deque[
+            tuple[t.Hashable, list[concurrent.futures.Future[bytes] | None]]
+        ] = collections.deque()
+        for label, presentation in presentations.items():
+            try:
+                futures = [
+                    None if common.is_chart(
+                        figure.fig,
+                        profile,
+                        figure.width,
+                        figure.height
+                    ) else pool.submit(figure, profile)
+                    for figure in presentation.figures()
+                ]
+            except Exception as e:
+                errors[label] = [f"{type(e).__name__}: {e}"]
+                continue
+            pending.append((label, futures))
+            if len(pending) > 2 * jobs:
+                save(*pending.popleft())
+        while pending:
+            save(*pending.popleft())
+    return errors
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tlab-pptx",
+        description="Build photo luminescence presentations from a manifest "
+                    "of experiments."
+    )
+    parser.add_argument(
+        "manifest",
+        help="a CSV or JSON file of experiments; figures are paths relative "
+             "to it"
+    )
+    parser.add_argument(
+        "output",
+        help="the pptx file, or the directory with --split"
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="save one file per row named after its title"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="the number of processes rendering figures"
+    )
+    parser.add_argument(
+        "--profile",
+        default=profiles.ORIGINAL.name,
+        choices=list(profiles.PROFILES),
+        help="the render profile"
+    )
+    parser.add_argument(
+        "--overview",
+        action="store_true",
+        help="start the combined deck with an overview of all rows"
+    )
+    parser.add_argument(
+        "--embed-spec",
+        action="store_true",
+        help="embed the fields of the rows so that the files can be "
+             "indexed by tlab_pptx.index"
+    )
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="fill the slides from their slide XML compiled once instead "
+             "of drawing every shape"
+    )
+    parser.add_argument("--template", help="a pptx file used as the template")
+    parser.add_argument(
+        "--cache",
+        metavar="DIRECTORY",
+        help="cache rendered figures in this directory"
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="do not print the progress"
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    start = time.perf_counter()
+    try:
+        frame = read_manifest(args.manifest)
+        presentations, errors = load_presentations(
+            frame,
+            os.path.dirname(os.path.abspath(args.manifest))
+        )
+    except (OSError, ValueError) as e:
+        print(f"tlab-pptx: error: {e}", file=sys.stderr)
+        return 2
+    profile = profiles.get_profile(args.profile)
+    cache = caching.RenderCache(args.cache) if args.cache else None
+    summary = instrumentation.Summary()
+    hooks: list[instrumentation.Hook] = [summary]
+    if not args.quiet:
+        total = len(presentations) + (args.overview and not args.split)
+        hooks.append(_Progress(total, sys.stderr))
+    with instrumentation.instrument(*hooks):
+        if args.split:
+            errors.update(_save_split(
+                presentations,
+                args.output,
+                args.jobs,
+                profile,
+                args.template,
+                cache,
+                args.embed_spec,
+                args.compiled
+            ))
+        else:
+            errors.update(_save_deck(
+                presentations,
+                args.output,
+                args.jobs,
+                profile,
+                args.template,
+                cache,
+                args.embed_spec,
+                args.compiled,
+                args.overview
+            ))
+    elapsed = time.perf_counter() - start
+
+    built = len(frame) - len(errors)
+    if not args.quiet:
+        print(summary.format(), file=sys.stderr)
+    print(
+        f"{built}/{len(frame)} rows built in {elapsed:.2f} s "
+        f"({built / elapsed if elapsed > 0.0 else 0.0:.1f} slides/s)"
+    )
+    if errors:
+        print(f"{len(errors)} rows failed:", file=sys.stderr)
+        for label in sorted(errors, key=frame.index.get_loc):
+            print(
+                f"  row {label}: {'; '.join(errors[label])}",
+                file=sys.stderr
+            )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
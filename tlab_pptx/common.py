@@ -1,17 +1,46 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 import io
 import os
+import re
+import json
+import functools
 import datetime
+import dataclasses
 import typing as t
 
 import pptx
 import pptx.util
 import pptx.slide
+import pptx.presentation
+import plotly.io as pio
 import plotly.graph_objects as go
 
+from tlab_pptx import (
+    caching,
+    charts,
+    decimation,
+    instrumentation,
+    profiles,
+    sessions
+)
+
 
 FilePath = str | os.PathLike[str]
 FilePathOrBuffer = FilePath | io.BufferedIOBase
+FigureOrSpec: t.TypeAlias = go.Figure | dict[str, t.Any] | bytes
+
+# The lab style applied by `style_figure` and `get_styled_figure`.
+LAYOUT_STYLE: dict[str, t.Any] = dict(
+    height=500,
+    width=500,
+    margin=dict(l=10, r=10, t=40, b=20),
+    font=dict(size=18),
+    showlegend=False,
+    template="simple_white"
+)
+LINE_STYLE: dict[str, t.Any] = dict(width=0.85)
+AXIS_STYLE: dict[str, t.Any] = dict(ticks="inside", mirror=True, showline=True)
+AXIS_PATTERN = re.compile(r"[xy]axis\d*")
 
 
 def get_date_annotation(date: datetime.date) -> dict[str, t.Any]:
@@ -63,37 +92,69 @@ def add_title(
         font_italic : bool
             If true, the text is italic style.
     """
-    title = slide.shapes.title
-    title.text = text
-    title.left = pptx.util.Cm(left)
-    title.top = pptx.util.Cm(top)
-    title.width = pptx.util.Cm(width)
-    title.height = pptx.util.Cm(height)
-    for paragraph in title.text_frame.paragraphs:
-        font = paragraph.font
-        font.name = font_name
-        font.size = pptx.util.Pt(font_size)
-        font.bold = font_bold
-        font.italic = font_italic
-    underline = slide.shapes.add_shape(
-        pptx.enum.shapes.MSO_SHAPE.LINE_INVERSE,
-        left=pptx.util.Cm(0.67),
-        top=pptx.util.Cm(2.0),
-        width=pptx.util.Cm(24.0),
-        height=pptx.util.Cm(0.0)
-    )
-    underline.shadow.inherit = False
-    underline.line.width = pptx.util.Pt(3.5)
-    underline.line.color.rgb = pptx.dml.color.RGBColor(255, 51, 0)
+    with instrumentation.span("add_title"):
+        title = slide.shapes.title
+        title.text = text
+        title.left = pptx.util.Cm(left)
+        title.top = pptx.util.Cm(top)
+        title.width = pptx.util.Cm(width)
+        title.height = pptx.util.Cm(height)
+        for paragraph in title.text_frame.paragraphs:
+            font = paragraph.font
+            font.name = font_name
+            font.size = pptx.util.Pt(font_size)
+            font.bold = font_bold
+            font.italic = font_italic
+        underline = slide.shapes.add_shape(
+            pptx.enum.shapes.MSO_SHAPE.LINE_INVERSE,
+            left=pptx.util.Cm(0.67),
+            top=pptx.util.Cm(2.0),
+            width=pptx.util.Cm(24.0),
+            height=pptx.util.Cm(0.0)
+        )
+        underline.shadow.inherit = False
+        underline.line.width = pptx.util.Pt(3.5)
+        underline.line.color.rgb = pptx.dml.color.RGBColor(255, 51, 0)
+
+
+@dataclasses.dataclass(frozen=True)
+class PlacedFigure:
+    """A figure placed on a slide.
+
+    Attributes
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON to be added.
+        left : float
+            The left position of the figure in centimeter.
+        top : float
+            The top position of the figure in centimeter.
+        width : float
+            The width of the figure in centimeter.
+        height : float
+            The height of the figure in centimeter.
+        annotations : tuple of dict
+            Annotations added to the figure when it is styled.
+    """
+    fig: FigureOrSpec
+    left: float
+    top: float
+    width: float = 12.0
+    height: float = 12.0
+    annotations: tuple[dict[str, t.Any], ...] = ()
 
 
 def add_figure(
     slide: pptx.slide.Slide,
-    fig: go.Figure,
+    fig: FigureOrSpec,
     left: float,
     top: float,
     width: float = 12.0,
-    height: float = 12.0
+    height: float = 12.0,
+    cache: caching.RenderCache | None = None,
+    profile: profiles.RenderProfile = profiles.ORIGINAL,
+    annotations: t.Sequence[dict[str, t.Any]] = (),
+    session: sessions.RendererSession | None = None
 ) -> None:
     """Add a figure to a slide.
 
@@ -101,8 +162,9 @@ def add_figure(
     ----------
         slide : pptx.slide.Slide
             A slide to be updated.
-        fig : plotly.graph_objects.Figure
-            A figure to be added.
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure to be added. A figure dict or its JSON is rendered
+            without being validated by plotly.
         left : float
             The left position of the figure in centimeter.
         top : float
@@ -111,19 +173,275 @@ def add_figure(
             The width of the figure in centimeter.
         height : float
             The height of the figure in centimeter.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache to look up the rendered image in before rendering.
+        profile : tlab_pptx.profiles.RenderProfile
+            The profile deciding the resolution and encoding of the image.
+            With the "chart" backend, supported figures are added as
+            native charts without being modified or rendered.
+        annotations : sequence of dict
+            Annotations to be added to the figure.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figure with.
     """
-    fig.update_layout(
-        height=500,
-        width=500,
-        margin=dict(l=10, r=10, t=40, b=20),
-        font=dict(size=18),
-        showlegend=False,
-        template="simple_white"
+    chart = get_chart(fig, profile, width, height)
+    if chart is not None:
+        with instrumentation.span("add_chart"):
+            charts.add_chart(
+                slide,
+                chart,
+                left,
+                top,
+                width,
+                height,
+                annotations,
+                max_points=profile.get_max_points(width, height)
+            )
+        return
+    add_picture(
+        slide,
+        render_figure(
+            get_styled_figure(fig, annotations),
+            profile,
+            width,
+            height,
+            cache=cache,
+            session=session
+        ),
+        left,
+        top,
+        width,
+        height
     )
-    fig.update_traces(line=dict(width=0.85))
-    fig.update_xaxes(ticks="inside", mirror=True, showline=True)
-    fig.update_yaxes(ticks="inside", mirror=True, showline=True)
-    with io.BytesIO(fig.to_image("png", scale=10)) as f:
+
+
+def is_chart(
+    fig: FigureOrSpec,
+    profile: profiles.RenderProfile,
+    width: float = 12.0,
+    height: float = 12.0
+) -> bool:
+    """Check if a figure is added as a native chart with a profile."""
+    return get_chart(fig, profile, width, height) is not None
+
+
+def get_chart(
+    fig: FigureOrSpec,
+    profile: profiles.RenderProfile,
+    width: float = 12.0,
+    height: float = 12.0
+) -> go.Figure | None:
+    """Get the figure to be added as a native chart with a profile.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figure.
+        width : float
+            The width of the figure on the slide in centimeter.
+        height : float
+            The height of the figure on the slide in centimeter.
+
+    Returns
+    -------
+    plotly.graph_objects.Figure or None
+        The figure built by `to_figure`, which can be passed on to
+        `add_figure` without being built again, or None if the figure is
+        rendered as an image.
+    """
+    if profile.backend != "chart":
+        return None
+    chart = to_figure(fig, profile, width, height)
+    return chart if charts.is_supported(chart) else None
+
+
+def to_figure(
+    fig: FigureOrSpec,
+    profile: profiles.RenderProfile = profiles.ORIGINAL,
+    width: float = 12.0,
+    height: float = 12.0
+) -> go.Figure:
+    """Build a figure from a figure dict or its JSON.
+
+    The line traces are decimated with the profile before the figure is
+    validated by plotly.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON.
+        profile : tlab_pptx.profiles.RenderProfile
+            The profile deciding the number of points kept.
+        width : float
+            The width of the figure on the slide in centimeter.
+        height : float
+            The height of the figure on the slide in centimeter.
+
+    Returns
+    -------
+    plotly.graph_objects.Figure
+        The figure itself if it is already a figure, otherwise a new figure.
+    """
+    if isinstance(fig, go.Figure):
+        return fig
+    return go.Figure(
+        decimate_figure(get_figure_dict(fig), profile, width, height)
+    )
+
+
+def get_figure_dict(fig: FigureOrSpec) -> dict[str, t.Any]:
+    """Get a figure dict without copying or validating the data.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON.
+
+    Returns
+    -------
+    dict
+        A figure dict sharing the data arrays with `fig`. It must not be
+        modified.
+
+    Examples
+    --------
+    >>> get_figure_dict(b'{"data": [{"type": "scatter", "y": [0, 1]}]}')
+    {'data': [{'type': 'scatter', 'y': [0, 1]}]}
+    """
+    if isinstance(fig, go.Figure):
+        return dict(data=fig._data, layout=fig._layout)
+    if isinstance(fig, bytes):
+        fig_dict: dict[str, t.Any] = json.loads(fig)
+        return fig_dict
+    return fig
+
+
+def style_figure(
+    fig: go.Figure,
+    annotations: t.Sequence[dict[str, t.Any]] = ()
+) -> None:
+    """Apply the lab style to a figure in place.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure
+            A figure to be updated.
+        annotations : sequence of dict
+            Annotations to be added to the figure.
+    """
+    for annotation in annotations:
+        fig.add_annotation(annotation)
+    fig.update_layout(**LAYOUT_STYLE)
+    fig.update_traces(line=LINE_STYLE)
+    fig.update_xaxes(**AXIS_STYLE)
+    fig.update_yaxes(**AXIS_STYLE)
+
+
+def get_styled_figure(
+    fig: FigureOrSpec,
+    annotations: t.Sequence[dict[str, t.Any]] = ()
+) -> dict[str, t.Any]:
+    """Apply the lab style to an overlay of a figure.
+
+    Only the dicts on the way to a styled property are copied, so the
+    returned figure dict shares the data arrays with `fig`, and `fig` itself
+    is not modified.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON to be styled.
+        annotations : sequence of dict
+            Annotations to be added to the overlay.
+
+    Returns
+    -------
+    dict
+        The styled figure dict like `plotly.graph_objects.Figure.to_dict`.
+
+    Examples
+    --------
+    >>> fig = go.Figure(go.Scatter(y=[0, 1]))
+    >>> styled = get_styled_figure(fig)
+    >>> styled["data"][0]["line"], styled["layout"]["xaxis"]["ticks"]
+    ({'width': 0.85}, 'inside')
+    >>> fig.data[0].line.width, fig.layout.xaxis.ticks
+    (None, None)
+    """
+    fig_dict = get_figure_dict(fig)
+    data = [
+        _merge(trace, dict(line=LINE_STYLE))
+        if _has_line(trace.get("type", "scatter")) else trace
+        for trace in fig_dict.get("data", ())
+    ]
+    style = dict(LAYOUT_STYLE)
+    template = _get_template(style.pop("template"))
+    layout = _merge(fig_dict.get("layout", {}), style)
+    layout["template"] = template
+    axes = {"xaxis", "yaxis"} | set(filter(AXIS_PATTERN.fullmatch, layout))
+    for name in axes:
+        layout[name] = _merge(layout.get(name, {}), AXIS_STYLE)
+    if annotations:
+        layout["annotations"] = [
+            *layout.get("annotations", ()),
+            *map(dict, annotations)
+        ]
+    return dict(data=data, layout=layout)
+
+
+def _merge(
+    base: dict[str, t.Any],
+    patch: dict[str, t.Any]
+) -> dict[str, t.Any]:
+    merged = dict(base)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = _merge(base[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@functools.cache
+def _has_line(trace_type: str) -> bool:
+    return "line" in go.Figure(dict(type=trace_type)).data[0]
+
+
+@functools.cache
+def _get_template(name: str) -> dict[str, t.Any]:
+    template: dict[str, t.Any] = pio.templates[name].to_plotly_json()
+    return template
+
+
+def add_picture(
+    slide: pptx.slide.Slide,
+    image: bytes,
+    left: float,
+    top: float,
+    width: float = 12.0,
+    height: float = 12.0
+) -> None:
+    """Add a rendered image to a slide.
+
+    Parameters
+    ----------
+        slide : pptx.slide.Slide
+            A slide to be updated.
+        image : bytes
+            An image to be added.
+        left : float
+            The left position of the image in centimeter.
+        top : float
+            The top position of the image in centimeter.
+        width : float
+            The width of the image in centimeter.
+        height : float
+            The height of the image in centimeter.
+    """
+    with instrumentation.span("add_picture", size=len(image)), \
+            io.BytesIO(image) as f:
         slide.shapes.add_picture(
             f,
             left=pptx.util.Cm(left),
@@ -133,6 +451,172 @@ def add_figure(
         )
 
 
+def render_figure(
+    fig: go.Figure | dict[str, t.Any],
+    profile: profiles.RenderProfile = profiles.ORIGINAL,
+    width: float = 12.0,
+    height: float = 12.0,
+    cache: caching.RenderCache | None = None,
+    session: sessions.RendererSession | None = None
+) -> bytes:
+    """Render a styled figure into an image.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure or dict
+            A figure to be rendered. A figure dict like `get_styled_figure`
+            is rendered without validation.
+        profile : tlab_pptx.profiles.RenderProfile
+            The profile deciding the resolution and encoding of the image.
+        width : float
+            The width of the figure on the slide in centimeter.
+        height : float
+            The height of the figure on the slide in centimeter.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache to look up the image in. A missing image is rendered
+            and stored.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figure with. If omitted, the
+            session prewarmed on import is used if any, otherwise the
+            figure is rendered by `plotly.graph_objects.Figure.to_image`.
+
+    Returns
+    -------
+    bytes
+        The rendered image.
+    """
+    scale = profile.get_scale(width, height)
+    with instrumentation.span(
+        "render",
+        scale=scale,
+        format=profile.format
+    ) as span:
+        source = decimate_figure(fig, profile, width, height)
+        if cache is None:
+            image = _to_image(source, profile, scale, session)
+        else:
+            key = get_cache_key(source, profile, scale)
+            cached = cache.get(key)
+            span.set(cached=cached is not None)
+            if cached is None:
+                image = _to_image(source, profile, scale, session)
+                cache.put(key, image)
+            else:
+                image = cached
+        span.set(size=len(image))
+    return image
+
+
+def _to_image(
+    fig: go.Figure | dict[str, t.Any],
+    profile: profiles.RenderProfile,
+    scale: float,
+    session: sessions.RendererSession | None
+) -> bytes:
+    if session is None:
+        session = sessions.get_default()
+    if session is not None:
+        image = session.render(fig, profile.render_format, scale)
+    elif isinstance(fig, dict):
+        image = pio.to_image(
+            fig,
+            profile.render_format,
+            scale=scale,
+            validate=False
+        )
+    else:
+        image = fig.to_image(profile.render_format, scale=scale)
+    return profile.encode(image)
+
+
+@t.overload
+def decimate_figure(
+    fig: dict[str, t.Any],
+    profile: profiles.RenderProfile,
+    width: float = ...,
+    height: float = ...
+) -> dict[str, t.Any]: ...
+
+
+@t.overload
+def decimate_figure(
+    fig: go.Figure,
+    profile: profiles.RenderProfile,
+    width: float = ...,
+    height: float = ...
+) -> go.Figure | dict[str, t.Any]: ...
+
+
+def decimate_figure(
+    fig: go.Figure | dict[str, t.Any],
+    profile: profiles.RenderProfile,
+    width: float = 12.0,
+    height: float = 12.0
+) -> go.Figure | dict[str, t.Any]:
+    """Decimate the line traces of a figure to the resolution of a profile.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure or dict
+            A figure to be decimated. It is not modified.
+        profile : tlab_pptx.profiles.RenderProfile
+            The profile deciding the number of points kept.
+        width : float
+            The width of the figure on the slide in centimeter.
+        height : float
+            The height of the figure on the slide in centimeter.
+
+    Returns
+    -------
+    plotly.graph_objects.Figure or dict
+        The figure itself if the profile keeps all points, otherwise a
+        decimated figure dict.
+    """
+    max_points = profile.get_max_points(width, height)
+    if max_points is None:
+        return fig
+    with instrumentation.span("decimate", max_points=max_points) as span:
+        if isinstance(fig, dict):
+            fig_dict = dict(
+                fig,
+                data=[dict(trace) for trace in fig.get("data", ())]
+            )
+        else:
+            fig_dict = fig.to_dict()
+        stats = decimation.decimate(fig_dict, max_points)
+        span.set(points_in=stats.points_in, points_out=stats.points_out)
+    return fig_dict
+
+
+def get_cache_key(
+    fig: go.Figure | dict[str, t.Any],
+    profile: profiles.RenderProfile,
+    scale: float
+) -> str:
+    """Get the key of a figure rendered with a profile in a cache."""
+    if isinstance(fig, dict):
+        fig_json = pio.to_json(fig, validate=False)
+    else:
+        fig_json = fig.to_json()
+    return caching.RenderCache.make_key(
+        fig_json,
+        **get_render_params(profile, scale)
+    )
+
+
+def get_render_params(
+    profile: profiles.RenderProfile,
+    scale: float
+) -> dict[str, t.Any]:
+    """Get the parameters identifying a rendered image in a cache."""
+    return dict(
+        format=profile.format,
+        scale=scale,
+        quality=profile.quality,
+        compress_level=profile.compress_level
+    )
+
+
 def add_text(
     slide: pptx.slide.Slide,
     text: str,
@@ -170,15 +654,43 @@ def add_text(
         font_italic : bool
             If true, the text is italic style.
     """
-    textbox = slide.shapes.add_textbox(
-        left=pptx.util.Cm(left),
-        top=pptx.util.Cm(top),
-        width=pptx.util.Cm(width),
-        height=pptx.util.Cm(height)
-    )
-    textbox.text_frame.text = text
-    for paragraph in textbox.text_frame.paragraphs:
-        paragraph.font.name = font_name
-        paragraph.font.size = pptx.util.Pt(font_size)
-        paragraph.font.bold = font_bold
-        paragraph.font.italic = font_italic
+    with instrumentation.span("add_text"):
+        textbox = slide.shapes.add_textbox(
+            left=pptx.util.Cm(left),
+            top=pptx.util.Cm(top),
+            width=pptx.util.Cm(width),
+            height=pptx.util.Cm(height)
+        )
+        textbox.text_frame.text = text
+        for paragraph in textbox.text_frame.paragraphs:
+            paragraph.font.name = font_name
+            paragraph.font.size = pptx.util.Pt(font_size)
+            paragraph.font.bold = font_bold
+            paragraph.font.italic = font_italic
+
+
+def save_presentation(
+    prs: pptx.presentation.Presentation,
+    filepath_or_buffer: FilePathOrBuffer
+) -> None:
+    """Save a presentation as a `pptx` file.
+
+    The size of the written file is reported to the instrumentation hooks.
+
+    Parameters
+    ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx to be saved.
+        filepath_or_buffer : tlab_pptx.common.FilePathOrBuffer
+            A filepath string or buffer object.
+    """
+    with instrumentation.span("save") as span:
+        if not instrumentation.enabled():
+            prs.save(filepath_or_buffer)
+        elif isinstance(filepath_or_buffer, (str, os.PathLike)):
+            prs.save(filepath_or_buffer)
+            span.set(size=os.path.getsize(filepath_or_buffer))
+        else:
+            start = filepath_or_buffer.tell()
+            prs.save(filepath_or_buffer)
+            span.set(size=filepath_or_buffer.tell() - start)
@@ -0,0 +1,219 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import collections
+import io
+import copy
+import threading
+import typing as t
+
+import lxml.etree
+import PIL.Image
+import pptx.opc.packuri
+import pptx.oxml.ns
+import pptx.parts.slide
+import pptx.slide
+
+
+# Private use characters marking the text slots while compiling.
+_SENTINEL = "\ue000{}\ue000"
+
+Draw = t.Callable[[pptx.slide.Slide, t.Sequence[str], t.Sequence[bytes]], None]
+
+
+def _placeholder_image() -> bytes:
+    with io.BytesIO() as f:
+        PIL.Image.new("RGB", (1, 1)).save(f, "png")
+        return f.getvalue()
+
+
+def _serialize(slide: pptx.slide.Slide) -> bytes:
+    xml: bytes = lxml.etree.tostring(slide.shapes._spTree)
+    return xml
+
+
+class CompiledSlide:
+    """Slide XML precompiled with slots for texts and images.
+
+    A slide is drawn once through the object model of python-pptx into a
+    scratch slide part, which is never saved, and its shape tree is kept
+    with the texts and images replaced by slots. `fill` then emits a slide
+    by copying the shape tree and filling in the values, which results in
+    the same XML as drawing the slide directly.
+
+    Parameters
+    ----------
+        layout : pptx.slide.SlideLayout
+            The layout of the slides.
+        draw : callable
+            A function drawing a slide from its texts and images. Each text
+            must fill the whole text frame of a shape, and each image must be
+            added as a picture.
+        texts : int
+            The number of texts passed to `draw`.
+        images : int
+            The number of images passed to `draw`.
+
+    Examples
+    --------
+    >>> import pptx
+    >>> from tlab_pptx import common
+    >>> def draw(slide, texts, images):
+    ...     common.add_title(slide, texts[0])
+    ...     common.add_text(slide, texts[1], 1.0, 1.0)
+    >>> prs = pptx.Presentation()
+    >>> compiled = CompiledSlide(prs.slide_layouts[5], draw, texts=2, images=0)
+    >>> slide = prs.slides.add_slide(prs.slide_layouts[5])
+    >>> compiled.matches(slide)
+    True
+    >>> compiled.fill(slide, ["Title", "first\\nsecond"], [])
+    >>> [
+    ...     shape.text_frame.text
+    ...     for shape in slide.shapes if shape.has_text_frame
+    ... ]
+    ['Title', '', 'first\\nsecond']
+    """
+
+    def __init__(
+        self,
+        layout: pptx.slide.SlideLayout,
+        draw: Draw,
+        texts: int,
+        images: int
+    ) -> None:
+        # The images are added to a shallow copy of the package so that any
+        # image index installed on the package does not see them.
+        package = copy.copy(layout.part.package)
+        package.__dict__.pop("_image_parts", None)
+        part = pptx.parts.slide.SlidePart.new(
+            pptx.opc.packuri.PackURI("/ppt/slides/compiled.xml"),
+            package,
+            layout.part
+        )
+        slide = part.slide
+        slide.shapes.clone_layout_placeholders(layout)
+        self.base = _serialize(slide)
+        draw(
+            slide,
+            [_SENTINEL.format(i) for i in range(texts)],
+            [_placeholder_image()] * images
+        )
+        self._sp_tree = copy.deepcopy(slide.shapes._spTree)
+        shapes = list(self._sp_tree)
+        self._texts: list[int] = []
+        for i in range(texts):
+            [run] = self._sp_tree.xpath(
+                f".//a:t[text()='{_SENTINEL.format(i)}']/.."
+            )
+            paragraph = run.getparent()
+            for child in paragraph.content_children:
+                paragraph.remove(child)
+            self._texts.append(shapes.index(paragraph.getparent().getparent()))
+        self._pictures = [
+            i for i, shape in enumerate(shapes)
+            if shape.tag == pptx.oxml.ns.qn("p:pic")
+        ]
+        if len(self._pictures) != images:
+            raise ValueError(
+                f"{images} images are expected but {len(self._pictures)} "
+                "pictures are drawn"
+            )
+
+    def matches(self, slide: pptx.slide.Slide) -> bool:
+        """Check if a new slide has the shapes the slide was compiled from.
+
+        Parameters
+        ----------
+            slide : pptx.slide.Slide
+                A slide just added with the layout.
+
+        Returns
+        -------
+        bool
+            True if `fill` can be applied to the slide.
+        """
+        return _serialize(slide) == self.base
+
+    def fill(
+        self,
+        slide: pptx.slide.Slide,
+        texts: t.Sequence[str],
+        images: t.Sequence[bytes]
+    ) -> None:
+        """Fill the texts and images into a new slide.
+
+        Parameters
+        ----------
+            slide : pptx.slide.Slide
+                A slide just added with the layout, for which `matches` is
+                true.
+            texts : sequence of str
+                The texts in the order of `draw`. A line feed starts a new
+                paragraph.
+            images : sequence of bytes
+                The images in the order of `draw`.
+        """
+        sp_tree = copy.deepcopy(self._sp_tree)
+        shapes = list(sp_tree)
+        for i, text in zip(self._texts, texts):
+            tx_body = shapes[i].find(pptx.oxml.ns.qn("p:txBody"))
+            prototype = tx_body.find(pptx.oxml.ns.qn("a:p"))
+            tx_body.remove(prototype)
+            for line in text.split("\n"):
+                paragraph = copy.deepcopy(prototype)
+                paragraph.append_text(line)
+                tx_body.append(paragraph)
+        for i, image in zip(self._pictures, images):
+            with io.BytesIO(image) as f:
+                image_part, rId = slide.part.get_or_add_image_part(f)
+            pic = shapes[i]
+            pic.blipFill.blip.rEmbed = rId
+            pic.nvPicPr.cNvPr.set("descr", image_part.desc)
+        slide.shapes._spTree[:] = shapes
+
+
+# The slides compiled last, kept for at most `MAX_COMPILED` layouts so that
+# long running processes do not hold every template they have seen.
+MAX_COMPILED = 8
+_compiled: collections.OrderedDict[
+    tuple[t.Hashable, bytes],
+    CompiledSlide
+] = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def get_compiled(
+    key: t.Hashable,
+    slide: pptx.slide.Slide,
+    draw: Draw,
+    texts: int,
+    images: int
+) -> CompiledSlide:
+    """Get a slide compiled once per process for a new slide.
+
+    Parameters
+    ----------
+        key : hashable
+            The identity of `draw`.
+        slide : pptx.slide.Slide
+            A slide just added, whose layout the slide is compiled with.
+        draw, texts, images
+            The same as `CompiledSlide`.
+
+    Returns
+    -------
+    tlab_pptx.compiled.CompiledSlide
+        A compiled slide matching `slide`. Slides of different templates
+        are compiled separately, and only the last `MAX_COMPILED` of them
+        are kept.
+    """
+    base = _serialize(slide)
+    with _lock:
+        compiled = _compiled.get((key, base))
+        if compiled is not None:
+            _compiled.move_to_end((key, base))
+    if compiled is None:
+        compiled = CompiledSlide(slide.slide_layout, draw, texts, images)
+        with _lock:
+            _compiled[(key, compiled.base)] = compiled
+            while len(_compiled) > MAX_COMPILED:
+                _compiled.popitem(last=False)
+    return compiled
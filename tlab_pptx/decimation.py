@@ -0,0 +1,171 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import logging
+import dataclasses
+import typing as t
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class DecimationStats:
+    """Statistics of a decimated figure.
+
+    Attributes
+    ----------
+        points_in : int
+            The number of points of the line traces before decimation.
+        points_out : int
+            The number of points of the line traces after decimation.
+    """
+    points_in: int
+    points_out: int
+
+    @property
+    def ratio(self) -> float:
+        """The factor by which the number of points was reduced."""
+        return self.points_in / self.points_out if self.points_out else 1.0
+
+
+def _select(
+    x: np.ndarray,
+    y: np.ndarray,
+    idx: np.ndarray,
+    valid: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    cx: np.ndarray,
+    cy: np.ndarray
+) -> np.ndarray:
+    bx, by = x[idx], y[idx]
+    area = np.abs(
+        (ax - cx)[:, None] * (by - ay[:, None])
+        - (ax[:, None] - bx) * (cy - ay)[:, None]
+    )
+    area[~valid] = -1.0
+    return idx[np.arange(len(idx)), area.argmax(axis=1)]  # type: ignore
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select points by Largest-Triangle-Three-Buckets.
+
+    The points between the first and the last one are split into
+    `n_out - 2` buckets, and the point of each bucket forming the largest
+    triangle with its neighbouring buckets is kept. All buckets are
+    computed at once: a first pass uses the centroid of the previous bucket
+    as the left vertex, and a second pass refines it with the point
+    selected from the previous bucket. The global extrema of `y` are always
+    kept so that peaks survive.
+
+    Parameters
+    ----------
+        x : numpy.ndarray
+            The x values in ascending order.
+        y : numpy.ndarray
+            The y values.
+        n_out : int
+            The number of points to keep.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sorted indices of the kept points.
+
+    Examples
+    --------
+    >>> x = np.arange(10.0)
+    >>> y = np.array([0, 1, 2, 3, 4, 5, 4, 3, 9, 0], dtype=float)
+    >>> lttb(x, y, 5)
+    array([0, 1, 5, 8, 9])
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, stops = edges[:-1], edges[1:]
+    sizes = stops - starts
+    idx = starts[:, None] + np.arange(sizes.max())[None, :]
+    valid = idx < stops[:, None]
+    idx = np.minimum(idx, stops[:, None] - 1)
+    mx = np.where(valid, x[idx], 0.0).sum(axis=1) / sizes
+    my = np.where(valid, y[idx], 0.0).sum(axis=1) / sizes
+    cx = np.append(mx[1:], x[-1])
+    cy = np.append(my[1:], y[-1])
+    ax = np.insert(mx[:-1], 0, x[0])
+    ay = np.insert(my[:-1], 0, y[0])
+    selected = _select(x, y, idx, valid, ax, ay, cx, cy)
+    ax = np.insert(x[selected[:-1]], 0, x[0])
+    ay = np.insert(y[selected[:-1]], 0, y[0])
+    selected = _select(x, y, idx, valid, ax, ay, cx, cy)
+    return np.unique(np.concatenate([
+        [0, n - 1, np.argmax(y), np.argmin(y)],
+        selected
+    ]))
+
+
+def _decimate_trace(trace: dict[str, t.Any], max_points: int) -> int | None:
+    if trace.get("type", "scatter") not in ("scatter", "scattergl"):
+        return None
+    if "markers" in trace.get("mode", "lines") or trace.get("y") is None:
+        return None
+    for key in ("text", "error_x", "error_y"):
+        if key in trace:
+            return None
+    try:
+        y = np.asarray(trace["y"], dtype=float)
+        if trace.get("x") is None:
+            x = np.arange(len(y), dtype=float)
+        else:
+            x = np.asarray(trace["x"], dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if len(x) != len(y) or not np.all(np.isfinite(x) & np.isfinite(y)):
+        return None
+    if len(y) <= max_points or np.any(np.diff(x) < 0):
+        return None
+    selected = lttb(x, y, max_points)
+    trace["x"] = x[selected]
+    trace["y"] = y[selected]
+    return len(selected)
+
+
+def decimate(fig_dict: dict[str, t.Any], max_points: int) -> DecimationStats:
+    """Decimate the line traces of a figure in place.
+
+    Only numeric `Scatter` traces drawn as lines with ascending x values and
+    more than `max_points` points are decimated.
+
+    Parameters
+    ----------
+        fig_dict : dict
+            A figure dict like `plotly.graph_objects.Figure.to_dict`.
+        max_points : int
+            The maximum number of points kept per trace.
+
+    Returns
+    -------
+    tlab_pptx.decimation.DecimationStats
+        The number of points before and after decimation.
+
+    Examples
+    --------
+    >>> fig_dict = dict(data=[dict(type="scatter", y=np.sin(np.arange(1e5)))])
+    >>> decimate(fig_dict, 1000).points_out <= 1002
+    True
+    """
+    points_in = points_out = 0
+    for trace in fig_dict.get("data", []):
+        n = 0 if trace.get("y") is None else len(trace["y"])
+        decimated = _decimate_trace(trace, max_points)
+        points_in += n
+        points_out += n if decimated is None else decimated
+    stats = DecimationStats(points_in, points_out)
+    logger.info(
+        "Decimated %d points to %d points (%.1fx)",
+        stats.points_in,
+        stats.points_out,
+        stats.ratio
+    )
+    return stats
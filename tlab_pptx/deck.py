@@ -0,0 +1,856 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import asyncio
+import logging
+import pathlib
+import zipfile
+import tempfile
+import collections
+import concurrent.futures
+import dataclasses
+import types
+import typing as t
+
+import pptx
+import pptx.presentation
+import pptx.opc.oxml
+import pptx.opc.package
+import pptx.opc.packuri
+import pptx.opc.serialized
+import pptx.parts.image
+import pptx.slide
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    incremental,
+    instrumentation,
+    metadata,
+    profiles,
+    rendering,
+    sessions,
+    templates
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class _ImagePartIndex:
+    """Image parts of a package indexed by their SHA1 digests.
+
+    python-pptx walks the whole package to deduplicate and name every added
+    image, which makes adding pictures quadratic in the slide count. This
+    keeps the same bookkeeping in a dict so that each lookup is O(1).
+    """
+
+    def __init__(self, package: t.Any) -> None:
+        self._package = package
+        self._parts: dict[str, t.Any] = {}
+        self._next_idx = 1
+        for part in package.iter_parts():
+            if not part.partname.startswith("/ppt/media/image"):
+                continue
+            if part.partname.idx is not None:
+                self._next_idx = max(self._next_idx, part.partname.idx + 1)
+            if isinstance(part, pptx.parts.image.ImagePart):
+                self._parts.setdefault(part.sha1, part)
+
+    @classmethod
+    def install(cls, prs: pptx.presentation.Presentation) -> None:
+        package = prs.part.package
+        package.__dict__["_image_parts"] = cls(package)
+
+    def get_or_add_image_part(self, image_file: t.Any) -> t.Any:
+        image = pptx.parts.image.Image.from_file(image_file)
+        part = self._parts.get(image.sha1)
+        if part is None:
+            partname = pptx.opc.packuri.PackURI(
+                f"/ppt/media/image{self._next_idx:d}.{image.ext}"
+            )
+            self._next_idx += 1
+            part = pptx.parts.image.ImagePart(
+                partname,
+                image.content_type,
+                self._package,
+                image.blob,
+                image.filename
+            )
+            self._parts[image.sha1] = part
+        return part
+
+
+def _add_slide(
+    prs: pptx.presentation.Presentation,
+    presentation: abstract.AbstractPresentation,
+    futures: list[concurrent.futures.Future[bytes] | None],
+    profile: profiles.RenderProfile,
+    compiled: bool,
+    writer: "DeckWriter | None" = None
+) -> None:
+    with instrumentation.span("wait", slide=len(prs.slides)):
+        images = [
+            None if future is None else future.result()
+            for future in futures
+        ]
+    presentation.add_slide(
+        prs,
+        images=images,
+        profile=profile,
+        compiled=compiled
+    )
+    if writer is not None:
+        writer.flush()
+
+
+async def _add_slide_async(
+    prs: pptx.presentation.Presentation,
+    presentation: abstract.AbstractPresentation,
+    task: "asyncio.Task[list[bytes | None]]",
+    profile: profiles.RenderProfile,
+    compiled: bool
+) -> None:
+    with instrumentation.span("wait", slide=len(prs.slides)):
+        images = await task
+    await asyncio.to_thread(
+        presentation.add_slide,
+        prs,
+        images=images,
+        profile=profile,
+        compiled=compiled
+    )
+
+
+# The parts belonging to the slides which refer to them. The others, such as
+# the masters created on demand, are shared with later slides.
+_SLIDE_OWNED = (
+    "/ppt/slides/",
+    "/ppt/notesSlides/",
+    "/ppt/charts/",
+    "/ppt/embeddings/",
+    "/ppt/media/",
+)
+
+
+class _WrittenImagePart(pptx.parts.image.ImagePart):  # type: ignore[misc]
+    """Image part whose blob has been written and released.
+
+    python-pptx reads the native size from the blob whenever the image is
+    placed again, so it is kept here.
+    """
+    _written_size: tuple[int, int]
+
+    @property
+    def _native_size(self) -> tuple[int, int]:
+        return self._written_size
+
+
+class DeckWriter:
+    """Writer streaming slides into a `pptx` file one by one.
+
+    python-pptx keeps every part in memory until the presentation is saved.
+    Here the parts added with a slide, such as the slide itself and its
+    images and charts, are written into the zip archive by `flush` and their
+    content is released, so the memory stays roughly constant regardless of
+    the number of slides. The parts of the template, the presentation part
+    listing the slides and `[Content_Types].xml` are written by `close`.
+
+    The slides must not be modified after they are flushed.
+
+    Parameters
+    ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object to write to.
+        template : tlab_pptx.typing.FilePathOrBuffer, optional
+            A filepath or buffer of the template.
+
+    Examples
+    --------
+    >>> import io
+    >>> import datetime
+    >>> import plotly.graph_objects as go
+    >>> from tlab_pptx import photo_luminescence as pl
+    >>> with io.BytesIO() as f:
+    ...     with DeckWriter(f) as writer:
+    ...         for i in range(2):
+    ...             slide = pl.Presentation(
+    ...                 title=f"Sample {i}",
+    ...                 excitation_wavelength=400,
+    ...                 excitation_power=1,
+    ...                 time_range=10,
+    ...                 center_wavelength=480,
+    ...                 FWHM=50,
+    ...                 frame=10000,
+    ...                 date=datetime.date.today(),
+    ...                 h_fig=go.Figure(),
+    ...                 v_fig=go.Figure(),
+    ...                 a=63,
+    ...                 b=37,
+    ...                 tau1=1.2,
+    ...                 tau2=3.6
+    ...             ).add_slide(writer.prs)
+    ...             writer.flush()
+    ...     len(pptx.Presentation(f).slides)
+    2
+    """
+
+    def __init__(
+        self,
+        filepath_or_buffer: common.FilePathOrBuffer,
+        template: common.FilePathOrBuffer | None = None
+    ) -> None:
+        self.prs = templates.open_template(template)
+        _ImagePartIndex.install(self.prs)
+        self._package = self.prs.part.package
+        self._written: set[t.Any] = set()
+        self._template_parts = set(self._package.iter_parts())
+        self._slides = len(self.prs.slides)
+        self._filepath_or_buffer = filepath_or_buffer
+        self._start = None \
+            if isinstance(filepath_or_buffer, (str, os.PathLike)) \
+            else filepath_or_buffer.tell()
+        self._zip = zipfile.ZipFile(
+            filepath_or_buffer,
+            "w",
+            compression=zipfile.ZIP_DEFLATED
+        )
+
+    def __enter__(self) -> "DeckWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+
+    def _write(self, part: t.Any) -> int:
+        blob = part.blob
+        self._zip.writestr(part.partname.membername, blob)
+        if part._rels:
+            self._zip.writestr(
+                part.partname.rels_uri.membername,
+                part.rels.xml
+            )
+        self._written.add(part)
+        return len(blob)
+
+    def flush(self) -> None:
+        """Write the parts of the slides added since the last flush.
+
+        The written slides are emptied and the written images and other
+        binary parts keep no content, while the parts stay in the package
+        so that later slides can share them.
+        """
+        with instrumentation.span("flush") as span:
+            sld_ids = self.prs.slides._sldIdLst.sldId_lst[self._slides:]
+            stack = [
+                self.prs.part.related_part(sld_id.rId) for sld_id in sld_ids
+            ]
+            self._slides += len(sld_ids)
+            size = 0
+            while stack:
+                part = stack.pop()
+                if part in self._written or part in self._template_parts \
+                        or not part.partname.startswith(_SLIDE_OWNED):
+                    continue
+                size += self._write(part)
+                stack.extend(
+                    rel.target_part for rel in part.rels
+                    if not rel.is_external
+                )
+                if isinstance(part, pptx.opc.package.XmlPart):
+                    part._element.clear()
+                    continue
+                if isinstance(part, pptx.parts.image.ImagePart):
+                    native_size = part._native_size
+                    part.__class__ = _WrittenImagePart
+                    part._written_size = native_size
+                part._blob = b""
+            span.set(size=size)
+
+    def close(self) -> None:
+        """Write the remaining parts and close the archive."""
+        self.flush()
+        with instrumentation.span("save") as span:
+            try:
+                parts = tuple(self._package.iter_parts())
+                self._zip.writestr(
+                    pptx.opc.packuri.CONTENT_TYPES_URI.membername,
+                    pptx.opc.oxml.serialize_part_xml(
+                        pptx.opc.serialized._ContentTypesItem.xml_for(parts)
+                    )
+                )
+                self._zip.writestr(
+                    pptx.opc.packuri.PACKAGE_URI.rels_uri.membername,
+                    self._package._rels.xml
+                )
+                for part in parts:
+                    if part not in self._written:
+                        self._write(part)
+            finally:
+                self._zip.close()
+            if not instrumentation.enabled():
+                return
+            filepath_or_buffer = self._filepath_or_buffer
+            if isinstance(filepath_or_buffer, (str, os.PathLike)):
+                span.set(size=os.path.getsize(filepath_or_buffer))
+            else:
+                span.set(size=filepath_or_buffer.tell() - (self._start or 0))
+
+
+def open_deck(
+    filepath: common.FilePath,
+    template: common.FilePathOrBuffer | None = None
+) -> pptx.presentation.Presentation:
+    """Open a deck to be updated in place.
+
+    Parameters
+    ----------
+        filepath : tlab_pptx.typing.FilePath
+            A filepath of a `pptx` file. The template is opened instead if
+            it does not exist.
+        template : tlab_pptx.typing.FilePathOrBuffer, optional
+            A filepath or buffer of the template.
+
+    Returns
+    -------
+    pptx.presentation.Presentation
+        A Presentation object of python-pptx whose images are shared by
+        their contents, like those of `Deck.build`.
+    """
+    with instrumentation.span("template"):
+        if os.path.exists(filepath):
+            prs = pptx.Presentation(os.fspath(filepath))
+        else:
+            prs = templates.open_template(template)
+    assert isinstance(prs, pptx.presentation.Presentation)
+    _ImagePartIndex.install(prs)
+    return prs
+
+
+def replace_deck(
+    prs: pptx.presentation.Presentation,
+    filepath: common.FilePath
+) -> None:
+    """Save a deck replacing a file atomically.
+
+    Parameters
+    ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx.
+        filepath : tlab_pptx.typing.FilePath
+            A filepath of the `pptx` file to be replaced or created.
+    """
+    # Each save has its own temporary file, so concurrent saves of the same
+    # file never replace it with a partial deck.
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{os.path.basename(filepath)}.",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(filepath))
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            common.save_presentation(prs, f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        pathlib.Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+@dataclasses.dataclass(frozen=True)
+class Deck(abstract.AbstractPresentation):
+    """Presentation combining many presentations into a single deck.
+
+    The template is loaded once per build and each presentation is appended
+    as a slide of it, so slide layouts and masters are shared by all slides.
+    With more than one worker, the figures of upcoming slides are rendered
+    in a `tlab_pptx.rendering.RenderPool` while earlier slides are being
+    assembled.
+
+    Examples
+    --------
+    Create a Deck object from presentations of photo luminescence
+    experiments.
+    >>> import datetime
+    >>> import plotly.graph_objects as go
+    >>> from tlab_pptx import photo_luminescence as pl
+    >>> deck = Deck([
+    ...     pl.Presentation(
+    ...         title=f"Sample {i}",
+    ...         excitation_wavelength=400,
+    ...         excitation_power=1,
+    ...         time_range=10,
+    ...         center_wavelength=480,
+    ...         FWHM=50,
+    ...         frame=10000,
+    ...         date=datetime.date.today(),
+    ...         h_fig=go.Figure(),
+    ...         v_fig=go.Figure(),
+    ...         a=63,
+    ...         b=37,
+    ...         tau1=1.2,
+    ...         tau2=3.6
+    ...     )
+    ...     for i in range(2)
+    ... ])
+
+    Save the Deck object.
+    >>> deck.save("sample.pptx")  # doctest: +SKIP
+
+    Get pptx.presentation.Presentation object.
+    >>> len(deck.build().slides)
+    2
+    """
+    presentations: t.Iterable[abstract.AbstractPresentation]
+    template: common.FilePathOrBuffer | None = None
+
+    def build(
+        self,
+        cache: caching.RenderCache | None = None,
+        workers: int = 1,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.presentation.Presentation:
+        """Build a Presentation object
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        workers : int
+            The number of processes rendering figures.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures, e.g. "draft", "screen" or
+            "print".
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with when `workers`
+            is 1.
+        compiled : bool
+            If true, the slides of a fixed layout are filled from their
+            slide XML compiled once by `tlab_pptx.compiled`.
+
+        Returns
+        -------
+        pptx.presentaion.Presentation
+            A Presentation object of python-pptx
+        """
+        with instrumentation.span("build", workers=workers):
+            return self._build(
+                self._open_template(),
+                cache,
+                workers,
+                profiles.get_profile(profile),
+                session,
+                compiled
+            )
+
+    def _build(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None,
+        workers: int,
+        profile: profiles.RenderProfile,
+        session: sessions.RendererSession | None,
+        compiled: bool,
+        writer: DeckWriter | None = None
+    ) -> pptx.presentation.Presentation:
+        if workers == 1:
+            for presentation in self.presentations:
+                presentation.add_slide(
+                    prs,
+                    cache=cache,
+                    profile=profile,
+                    session=session,
+                    compiled=compiled
+                )
+                if writer is not None:
+                    writer.flush()
+            return prs
+        with rendering.RenderPool(workers, cache=cache) as pool:
+            pending: collections.deque[
+                tuple[
+                    abstract.AbstractPresentation,
+                    list[concurrent.futures.Future[bytes] | None]
+                ]
+            ] = collections.deque()
+            for presentation in self.presentations:
+                futures = [
+                    None if common.is_chart(
+                        figure.fig,
+                        profile,
+                        figure.width,
+                        figure.height
+                    )
+                    else pool.submit(figure, profile)
+                    for figure in presentation.figures()
+                ]
+                pending.append((presentation, futures))
+                if len(pending) > 2 * workers:
+                    _add_slide(
+                        prs,
+                        *pending.popleft(),
+                        profile,
+                        compiled,
+                        writer
+                    )
+            while pending:
+                _add_slide(
+                    prs,
+                    *pending.popleft(),
+                    profile,
+                    compiled,
+                    writer
+                )
+        return prs
+
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        """Append the slides of the deck to a Presentation object
+
+        Parameters
+        ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx to be updated.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        images : sequence of bytes or None, optional
+            Ignored, since the deck has no figures of its own.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with.
+        compiled : bool
+            If true, the slides of a fixed layout are filled from their
+            slide XML compiled once by `tlab_pptx.compiled`.
+
+        Returns
+        -------
+        pptx.slide.Slide
+            The last added slide.
+
+        Raises
+        ------
+        ValueError
+            If the deck has no presentations.
+        """
+        start = len(prs.slides)
+        self._build(prs, cache, 1, profile, session, compiled)
+        if len(prs.slides) == start:
+            raise ValueError("The deck has no presentations")
+        slide = prs.slides[-1]
+        assert isinstance(slide, pptx.slide.Slide)
+        return slide
+
+    def _open_template(self) -> pptx.presentation.Presentation:
+        with instrumentation.span("template"):
+            prs = templates.open_template(self.template)
+        assert isinstance(prs, pptx.presentation.Presentation)
+        _ImagePartIndex.install(prs)
+        return prs
+
+    async def build_async(
+        self,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        workers: int = 1,
+        pool: rendering.RenderPool | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+        compiled: bool = False
+    ) -> pptx.presentation.Presentation:
+        """Build a Presentation object without blocking the event loop
+
+        The figures of upcoming slides are rendered concurrently while
+        earlier slides are being assembled in a thread. At most twice as
+        many slides as the workers of the pool are rendered ahead.
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images used by a new pool.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        workers : int
+            The number of worker processes of a new pool.
+        pool : tlab_pptx.rendering.RenderPool, optional
+            A pool shared by many builds, used instead of a new pool.
+        semaphore : asyncio.Semaphore, optional
+            A semaphore shared by many builds to bound the number of
+            figures rendered at once.
+        compiled : bool
+            If true, the slides of a fixed layout are filled from their
+            slide XML compiled once by `tlab_pptx.compiled`.
+
+        Returns
+        -------
+        pptx.presentaion.Presentation
+            A Presentation object of python-pptx
+        """
+        profile = profiles.get_profile(profile)
+        with instrumentation.span("build", workers=workers):
+            prs = await asyncio.to_thread(self._open_template)
+            async with rendering.open_pool(pool, workers, cache) as pool:
+                pending: collections.deque[
+                    tuple[
+                        abstract.AbstractPresentation,
+                        asyncio.Task[list[bytes | None]]
+                    ]
+                ] = collections.deque()
+                try:
+                    for presentation in self.presentations:
+                        pending.append((
+                            presentation,
+                            asyncio.ensure_future(rendering.render_async(
+                                presentation.figures(),
+                                pool,
+                                profile,
+                                semaphore
+                            ))
+                        ))
+                        if len(pending) > 2 * pool.workers:
+                            await _add_slide_async(
+                                prs,
+                                *pending.popleft(),
+                                profile,
+                                compiled
+                            )
+                    while pending:
+                        await _add_slide_async(
+                            prs,
+                            *pending.popleft(),
+                            profile,
+                            compiled
+                        )
+                finally:
+                    for _, task in pending:
+                        task.cancel()
+        return prs
+
+    def save(
+        self,
+        filepath_or_buffer: common.FilePathOrBuffer,
+        cache: caching.RenderCache | None = None,
+        workers: int = 1,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False,
+        streaming: bool = False,
+        embed_spec: bool = False
+    ) -> None:
+        """Save as a `pptx` file.
+
+        Parameters
+        ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        workers : int
+            The number of processes rendering figures.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures, e.g. "draft", "screen" or
+            "print".
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with when `workers`
+            is 1.
+        compiled : bool
+            If true, the slides of a fixed layout are filled from their
+            slide XML compiled once by `tlab_pptx.compiled`.
+        streaming : bool
+            If true, each slide is written by a `DeckWriter` as soon as it
+            is added, which keeps the memory bounded for large decks.
+        embed_spec : bool
+            If true, the spec fields of the presentations are embedded in
+            the file by `tlab_pptx.metadata.embed`, so that it can be
+            indexed by `tlab_pptx.index.Index`.
+        """
+        # The presentations may be a generator, so they are read only once.
+        # They are kept for the records only, so that a streamed deck of a
+        # generator does not hold all of its figures otherwise.
+        embedded = list(self.presentations) if embed_spec else None
+        deck = self if embedded is None \
+            else dataclasses.replace(self, presentations=embedded)
+        if streaming:
+            with DeckWriter(filepath_or_buffer, self.template) as writer:
+                start = len(writer.prs.slides) + 1
+                with instrumentation.span("build", workers=workers):
+                    deck._build(
+                        writer.prs,
+                        cache,
+                        workers,
+                        profiles.get_profile(profile),
+                        session,
+                        compiled,
+                        writer
+                    )
+                if embedded is not None:
+                    metadata.embed(
+                        writer.prs,
+                        metadata.make_records(embedded, start)
+                    )
+            return
+        prs = deck.build(
+            cache=cache,
+            workers=workers,
+            profile=profile,
+            session=session,
+            compiled=compiled
+        )
+        if embedded is not None:
+            metadata.embed(prs, metadata.make_records(
+                embedded,
+                len(prs.slides) - len(embedded) + 1
+            ))
+        common.save_presentation(prs, filepath_or_buffer)
+
+    def update(
+        self,
+        filepath: common.FilePath,
+        cache: caching.RenderCache | None = None,
+        workers: int = 1,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False,
+        embed_spec: bool = False,
+        keys: t.Sequence[str | None] | None = None
+    ) -> incremental.UpdateStats:
+        """Update a `pptx` file building only the changed slides.
+
+        Every slide is tagged with the key of its presentation given by
+        `get_spec_key`. The slides of the existing file whose keys are still
+        present are kept with their images byte for byte and moved into the
+        order of `presentations`, and only the other presentations are built
+        and rendered. Slides without a matching presentation are removed.
+        The file is fully built if it does not exist, in which case the
+        template is used, otherwise its layouts are kept.
+
+        Parameters
+        ----------
+        filepath : tlab_pptx.typing.FilePath
+            A filepath of the `pptx` file to be updated or created. It is
+            replaced atomically.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        workers : int
+            The number of processes rendering figures.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures, e.g. "draft", "screen" or
+            "print".
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with when `workers`
+            is 1.
+        compiled : bool
+            If true, the slides of a fixed layout are filled from their
+            slide XML compiled once by `tlab_pptx.compiled`.
+        embed_spec : bool
+            If true, the spec fields of the presentations are embedded in
+            the file by `tlab_pptx.metadata.embed`. Otherwise the fields
+            embedded before are removed since they no longer describe the
+            slides.
+        keys : sequence of str or None, optional
+            The keys of the presentations given by `get_spec_key` with
+            `profile`, if they are kept between updates. They are computed
+            if omitted.
+
+        Returns
+        -------
+        tlab_pptx.incremental.UpdateStats
+            The numbers of the reused, rebuilt and removed slides.
+        """
+        profile = profiles.get_profile(profile)
+        presentations = list(self.presentations)
+        with instrumentation.span("build", workers=workers) as span:
+            prs = open_deck(filepath, self.template)
+            sld_id_lst = prs.slides._sldIdLst
+            existing: dict[str, list[t.Any]] = collections.defaultdict(list)
+            for sld_id in sld_id_lst.sldId_lst:
+                key = incremental.get_slide_key(
+                    prs.part.related_part(sld_id.rId).slide
+                )
+                if key is not None:
+                    existing[key].append(sld_id)
+            if keys is None:
+                keys = [
+                    presentation.get_spec_key(profile)
+                    for presentation in presentations
+                ]
+            elif len(keys) != len(presentations):
+                raise ValueError(
+                    f"{len(keys)} keys given for "
+                    f"{len(presentations)} presentations"
+                )
+            reused = [
+                existing[key].pop(0)
+                if key is not None and existing.get(key) else None
+                for key in keys
+            ]
+            changed = [
+                presentation
+                for presentation, sld_id in zip(presentations, reused)
+                if sld_id is None
+            ]
+            start = len(sld_id_lst.sldId_lst)
+            dataclasses.replace(self, presentations=changed)._build(
+                prs,
+                cache,
+                workers,
+                profile,
+                session,
+                compiled
+            )
+            added = iter(sld_id_lst.sldId_lst[start:])
+            order = []
+            for key, sld_id in zip(keys, reused):
+                if sld_id is None:
+                    sld_id = next(added)
+                    if key is not None:
+                        incremental.set_slide_key(
+                            prs.part.related_part(sld_id.rId).slide,
+                            key
+                        )
+                order.append(sld_id)
+            used = {sld_id.rId for sld_id in order}
+            removed = [
+                sld_id.rId for sld_id in sld_id_lst.sldId_lst
+                if sld_id.rId not in used
+            ]
+            sld_id_lst[:] = order
+            for rId in removed:
+                prs.part.drop_rel(rId)
+            incremental.renumber_slides(prs)
+            metadata.embed(
+                prs,
+                metadata.make_records(presentations) if embed_spec else None
+            )
+            stats = incremental.UpdateStats(
+                reused=len(presentations) - len(changed),
+                rebuilt=len(changed),
+                removed=len(removed)
+            )
+            span.set(
+                reused=stats.reused,
+                rebuilt=stats.rebuilt,
+                removed=stats.removed
+            )
+        replace_deck(prs, filepath)
+        logger.info(
+            "Reused %d slides, rebuilt %d slides and removed %d slides",
+            stats.reused,
+            stats.rebuilt,
+            stats.removed
+        )
+        return stats
@@ -0,0 +1,429 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import dataclasses
+import itertools
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from tlab_pptx import common
+
+
+Array = npt.NDArray[np.floating[t.Any]]
+
+# The number of curves fitted at once, which bounds the memory of the
+# Jacobians to about 40 * CHUNK_SIZE * (number of points) bytes.
+CHUNK_SIZE = 2048
+
+# The number of lifetimes tried for each component before refinement.
+_GRID_SIZE = 16
+
+
+class _Convolution:
+    """Discrete convolution with an instrument response function.
+
+    The IRF is normalized to a unit sum and sampled on the time axis of the
+    curves, so its position sets the excitation time.
+    """
+
+    def __init__(self, irf: npt.ArrayLike, size: int) -> None:
+        irf = np.asarray(irf, dtype=float)
+        if irf.shape != (size,):
+            raise ValueError(
+                f"The IRF must have {size} points but has shape {irf.shape}"
+            )
+        total = irf.sum()
+        if not np.isfinite(total) or total <= 0.0:
+            raise ValueError("The IRF must have a positive finite sum")
+        self._size = size
+        self._n_fft = 1 << (2 * size - 1).bit_length()
+        self._irf = np.fft.rfft(irf / total, self._n_fft)
+
+    def __call__(self, x: Array) -> Array:
+        spectrum = np.fft.rfft(x, self._n_fft, axis=-1) * self._irf
+        y: Array = np.fft.irfft(spectrum, self._n_fft, axis=-1)
+        return y[..., :self._size]
+
+
+def _decays(
+    s: Array,
+    log_taus: Array,
+    convolve: _Convolution | None,
+    derivatives: bool = False
+) -> tuple[Array, Array | None]:
+    """Evaluate the exponential decays of shape (..., components, points).
+
+    The derivatives are taken with respect to the logarithms of the
+    lifetimes.
+    """
+    rates = np.exp(-log_taus)[..., None]
+    decays = np.exp(-s * rates)
+    d_decays = decays * s * rates if derivatives else None
+    if convolve is not None:
+        decays = convolve(decays)
+        if d_decays is not None:
+            d_decays = convolve(d_decays)
+    return decays, d_decays
+
+
+def _basis(decays: Array, offset: bool) -> Array:
+    """Stack the columns of the linear model, of shape (..., points, cols)."""
+    basis = np.swapaxes(decays, -1, -2)
+    if offset:
+        ones = np.ones(basis.shape[:-1] + (1,))
+        basis = np.concatenate([basis, ones], axis=-1)
+    return basis
+
+
+def _initial_guess(
+    s: Array,
+    y: Array,
+    convolve: _Convolution | None,
+    offset: bool
+) -> Array:
+    """Find the best pair of lifetimes of a grid for each curve.
+
+    All curves share the time axis, so the projection onto the span of each
+    candidate basis is a single matrix product.
+    """
+    span = s[-1]
+    dt = span / (s.size - 1)
+    grid = np.log(np.geomspace(dt, 2.0 * span, _GRID_SIZE))
+    best_cost = np.full(len(y), np.inf)
+    best = np.zeros((len(y), 2))
+    for pair in itertools.combinations(grid, 2):
+        log_taus = np.array(pair)
+        decays, _ = _decays(s, log_taus, convolve)
+        q, _ = np.linalg.qr(_basis(decays, offset))
+        # The residual is the part of the curves orthogonal to the basis.
+        cost = -((y @ q) ** 2).sum(axis=1)
+        better = cost < best_cost
+        best_cost[better] = cost[better]
+        best[better] = log_taus
+    return best
+
+
+def _solve_linear(basis: Array, y: Array) -> Array:
+    """Solve the amplitudes of a batch of linear least squares problems."""
+    normal = np.swapaxes(basis, -1, -2) @ basis \
+        + 1e-12 * np.eye(basis.shape[-1])
+    rhs = (np.swapaxes(basis, -1, -2) @ y[..., None])[..., 0]
+    coefficients: Array = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    return coefficients
+
+
+def _fit_chunk(
+    s: Array,
+    y: Array,
+    convolve: _Convolution | None,
+    offset: bool,
+    max_iter: int,
+    tol: float
+) -> tuple[Array, Array, Array, npt.NDArray[np.bool_]]:
+    """Refine the fits of normalized curves by Levenberg-Marquardt.
+
+    The parameters of each curve are its linear coefficients followed by
+    the logarithms of the two lifetimes.
+    """
+    n = len(y)
+    linear = 3 if offset else 2
+    log_taus = _initial_guess(s, y, convolve, offset)
+    decays, _ = _decays(s, log_taus, convolve)
+    params = np.concatenate(
+        [_solve_linear(_basis(decays, offset), y), log_taus],
+        axis=1
+    )
+    damping = np.full(n, 1e-3)
+    converged = np.zeros(n, dtype=bool)
+    cost = np.zeros(n)
+    active = np.arange(n)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        p = params[active]
+        decays, d_decays = _decays(s, p[:, linear:], convolve, True)
+        assert d_decays is not None
+        basis = _basis(decays, offset)
+        residual = y[active] - (basis @ p[:, :linear, None])[..., 0]
+        current = (residual ** 2).sum(axis=1)
+        cost[active] = current
+        jacobian = np.concatenate(
+            [basis, _basis(d_decays * p[:, :2, None], False)],
+            axis=-1
+        )
+        jt = np.swapaxes(jacobian, -1, -2)
+        normal = jt @ jacobian
+        gradient = (jt @ residual[..., None])[..., 0]
+        diagonal = np.diagonal(normal, axis1=-2, axis2=-1)
+        damped = normal + np.eye(normal.shape[-1]) * (
+            damping[active, None] * diagonal + 1e-12
+        )[:, None, :]
+        step = np.linalg.solve(damped, gradient[..., None])[..., 0]
+        trial = p + step
+        decays, _ = _decays(s, trial[:, linear:], convolve)
+        trial_residual = y[active] - (
+            _basis(decays, offset) @ trial[:, :linear, None]
+        )[..., 0]
+        trial_cost = (trial_residual ** 2).sum(axis=1)
+        accept = np.isfinite(trial_cost) & (trial_cost < current)
+        params[active[accept]] = trial[accept]
+        cost[active[accept]] = trial_cost[accept]
+        damping[active] = np.where(
+            accept,
+            damping[active] / 3.0,
+            damping[active] * 2.0
+        )
+        # A fit has converged once the residual or the parameters barely
+        # change, which also stops exact fits whose residual keeps shrinking.
+        done = accept & (
+            (current - trial_cost <= tol * current)
+            | (np.abs(step).max(axis=1) <= np.sqrt(tol))
+        ) | (damping[active] > 1e10)
+        converged[active[done]] = True
+        active = active[~done]
+    return params[:, :linear], np.exp(params[:, linear:]), cost, converged
+
+
+@dataclasses.dataclass(frozen=True)
+class DecayFit:
+    """Bi-exponential fits of decay curves sharing a time axis.
+
+    Each curve is fitted with
+    ``A1 * exp(-t / tau1) + A2 * exp(-t / tau2) + offset``
+    from the first time, convolved with the IRF if given.
+
+    Attributes
+    ----------
+        time : numpy.ndarray
+            The shared time axis in ns.
+        amplitudes : numpy.ndarray
+            The amplitudes of the fast and slow components of shape (n, 2).
+        tau1 : numpy.ndarray
+            The lifetimes of the fast components in ns.
+        tau2 : numpy.ndarray
+            The lifetimes of the slow components in ns.
+        offset : numpy.ndarray
+            The constant backgrounds.
+        rss : numpy.ndarray
+            The residual sums of squares.
+        success : numpy.ndarray
+            True for the fits which converged.
+        irf : numpy.ndarray, optional
+            The instrument response function the decays are convolved with.
+    """
+    time: Array
+    amplitudes: Array
+    tau1: Array
+    tau2: Array
+    offset: Array
+    rss: Array
+    success: npt.NDArray[np.bool_]
+    irf: Array | None = None
+
+    @property
+    def a(self) -> npt.NDArray[np.int64]:
+        """The percentages of the fast components rounded to integers."""
+        total = self.amplitudes.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = np.clip(self.amplitudes[:, 0] / total, 0.0, 1.0)
+        a: npt.NDArray[np.int64] = np.rint(
+            100.0 * np.nan_to_num(fraction)
+        ).astype(np.int64)
+        return a
+
+    @property
+    def b(self) -> npt.NDArray[np.int64]:
+        """The percentages of the slow components, 100 minus `a`."""
+        b: npt.NDArray[np.int64] = 100 - self.a
+        return b
+
+    def curves(self) -> Array:
+        """Evaluate the fitted curves.
+
+        Returns
+        -------
+        numpy.ndarray
+            The fitted curves of shape (n, points).
+        """
+        s = self.time - self.time[0]
+        convolve = None if self.irf is None else _Convolution(self.irf, s.size)
+        decays, _ = _decays(
+            s,
+            np.log(np.stack([self.tau1, self.tau2], axis=1)),
+            convolve
+        )
+        curves: Array = (
+            _basis(decays, False) @ self.amplitudes[..., None]
+        )[..., 0] + self.offset[:, None]
+        return curves
+
+    def to_frame(self, index: t.Any = None) -> pd.DataFrame:
+        """Get the fields of `tlab_pptx.photo_luminescence.Presentation`.
+
+        Parameters
+        ----------
+            index : array-like, optional
+                The index of the DataFrame, e.g. that of the experiments.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The columns "a", "b", "tau1" and "tau2".
+        """
+        return pd.DataFrame(
+            dict(a=self.a, b=self.b, tau1=self.tau1, tau2=self.tau2),
+            index=index
+        )
+
+
+def fit_biexponential(
+    time: npt.ArrayLike,
+    curves: npt.ArrayLike,
+    irf: npt.ArrayLike | None = None,
+    offset: bool = True,
+    max_iter: int = 100,
+    tol: float = 1e-10
+) -> DecayFit:
+    """Fit bi-exponential decays to many curves at once.
+
+    The starting lifetimes are chosen from a grid by projecting all curves
+    at once onto the decays of each pair of lifetimes, and the fits are then
+    refined by a Levenberg-Marquardt iteration batched over the curves.
+
+    Parameters
+    ----------
+        time : array-like
+            The shared time axis in ns of shape (points,). It must be evenly
+            spaced if `irf` is given.
+        curves : array-like
+            The decay curves of shape (n, points) or (points,). Without an
+            IRF, they should start at the excitation, e.g. at their maxima.
+        irf : array-like, optional
+            The instrument response function sampled on `t`.
+        offset : bool
+            If true, a constant background is fitted as well.
+        max_iter : int
+            The maximum number of iterations of each fit.
+        tol : float
+            The relative decrease of the residual, or the square of the
+            change of the parameters, below which a fit is regarded as
+            converged.
+
+    Returns
+    -------
+    tlab_pptx.fitting.DecayFit
+        The fits with ``tau1 <= tau2``.
+
+    Examples
+    --------
+    >>> t = np.linspace(0.0, 10.0, 200)
+    >>> curves = [
+    ...     60 * np.exp(-t / 0.5) + 40 * np.exp(-t / 3.0),
+    ...     30 * np.exp(-t / 1.0) + 70 * np.exp(-t / 4.0),
+    ... ]
+    >>> fit = fit_biexponential(t, curves, offset=False)
+    >>> fit.a, fit.b
+    (array([60, 30]), array([40, 70]))
+    >>> np.round(fit.tau1, 3), np.round(fit.tau2, 3)
+    (array([0.5, 1. ]), array([3., 4.]))
+    """
+    t = np.asarray(time, dtype=float)
+    y = np.atleast_2d(np.asarray(curves, dtype=float))
+    if t.ndim != 1 or t.size < 5:
+        raise ValueError("The time axis must be 1-D with at least 5 points")
+    if y.ndim != 2 or y.shape[1] != t.size:
+        raise ValueError(
+            f"The curves must have shape (n, {t.size}) but have {y.shape}"
+        )
+    if np.any(np.diff(t) <= 0.0):
+        raise ValueError("The time axis must be increasing")
+    s = t - t[0]
+    convolve = None
+    if irf is not None:
+        if not np.allclose(np.diff(s), s[-1] / (s.size - 1)):
+            raise ValueError("The time axis must be evenly spaced with an IRF")
+        convolve = _Convolution(irf, s.size)
+    # The curves are normalized so that the damping and tolerances do not
+    # depend on the counts.
+    scale = np.abs(y).max(axis=1)
+    scale[~(scale > 0.0)] = 1.0
+    y = y / scale[:, None]
+    linear = np.zeros((len(y), 3 if offset else 2))
+    taus = np.zeros((len(y), 2))
+    rss = np.zeros(len(y))
+    success = np.zeros(len(y), dtype=bool)
+    for start in range(0, len(y), CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        linear[chunk], taus[chunk], rss[chunk], success[chunk] = _fit_chunk(
+            s,
+            y[chunk],
+            convolve,
+            offset,
+            max_iter,
+            tol
+        )
+    # The components are ordered by their lifetimes.
+    order = np.argsort(taus, axis=1)
+    amplitudes = np.take_along_axis(linear[:, :2], order, axis=1)
+    taus = np.take_along_axis(taus, order, axis=1)
+    return DecayFit(
+        time=t,
+        amplitudes=amplitudes * scale[:, None],
+        tau1=taus[:, 0],
+        tau2=taus[:, 1],
+        offset=(linear[:, 2] if offset else np.zeros(len(y))) * scale,
+        rss=rss * scale ** 2,
+        success=success
+        & np.isfinite(linear).all(axis=1)
+        & np.isfinite(taus).all(axis=1),
+        irf=None if irf is None else np.asarray(irf, dtype=float)
+    )
+
+
+def overlay_fit(
+    fig: common.FigureOrSpec,
+    time: npt.ArrayLike,
+    curve: npt.ArrayLike,
+    name: str = "fit"
+) -> dict[str, t.Any]:
+    """Overlay a fitted curve onto a decay figure such as `v_fig`.
+
+    Parameters
+    ----------
+        fig : plotly.graph_objects.Figure, dict or bytes
+            A figure, or a figure dict or its JSON. It is not modified.
+        time : array-like
+            The time axis of the curve.
+        curve : array-like
+            The fitted curve, e.g. a row of `DecayFit.curves`.
+        name : str
+            The name of the trace.
+
+    Returns
+    -------
+    dict
+        A figure dict sharing the data with `fig`, with the curve drawn as
+        a dashed line on top.
+
+    Examples
+    --------
+    >>> import plotly.graph_objects as go
+    >>> fig = overlay_fit(
+    ...     go.Figure(go.Scatter(y=[3, 2, 1])),
+    ...     [0, 1, 2],
+    ...     [3, 2, 1]
+    ... )
+    >>> len(fig["data"]), fig["data"][-1]["name"]
+    (2, 'fit')
+    """
+    fig_dict = common.get_figure_dict(fig)
+    trace = dict(
+        type="scatter",
+        x=np.asarray(time),
+        y=np.asarray(curve),
+        mode="lines",
+        name=name,
+        line=dict(dash="dash", color="black")
+    )
+    return dict(fig_dict, data=[*fig_dict.get("data", ()), trace])
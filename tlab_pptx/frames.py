@@ -0,0 +1,141 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import typing as t
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+Converter = t.Callable[[pd.Series], pd.Series]
+
+
+class InvalidRowsError(ValueError):
+    """Error reporting all invalid rows of a DataFrame at once.
+
+    Attributes
+    ----------
+        errors : dict
+            The messages of the invalid values of each row by its label.
+    """
+
+    def __init__(self, errors: dict[t.Hashable, list[str]]) -> None:
+        self.errors = errors
+        super().__init__("\n".join([
+            f"{len(errors)} invalid rows",
+            *(
+                f"  row {label!r}: {'; '.join(messages)}"
+                for label, messages in errors.items()
+            )
+        ]))
+
+
+def to_int(series: pd.Series) -> pd.Series:
+    """Convert a column to integers truncated like `int`.
+
+    Values which are not finite numbers are converted to NA.
+    """
+    numbers = pd.to_numeric(series, errors="coerce").astype(float)
+    return np.trunc(numbers.where(np.isfinite(numbers))).astype("Int64")
+
+
+def to_float(series: pd.Series) -> pd.Series:
+    """Convert a column to floats, with NA for values which are not numbers."""
+    return pd.to_numeric(series, errors="coerce").astype(float)
+
+
+def to_str(series: pd.Series) -> pd.Series:
+    """Convert a column to strings, keeping missing values as NA."""
+    return series.where(series.isna(), series.astype(str))
+
+
+def to_date(series: pd.Series) -> pd.Series:
+    """Convert a column to `datetime.date`, with NA for invalid dates.
+
+    The format is inferred for each value, so a column may mix formats.
+
+    Examples
+    --------
+    >>> to_date(pd.Series(["2022-01-01", "01/02/2022", "2022.01.03", "x"]))
+    0    2022-01-01
+    1    2022-01-02
+    2    2022-01-03
+    3           NaN
+    dtype: object
+    """
+    dates = pd.to_datetime(series, errors="coerce", format="mixed")
+    return dates.dt.date.where(dates.notna())
+
+
+def to_figure(series: pd.Series) -> pd.Series:
+    """Keep the figures, figure dicts and JSON bytes of a column.
+
+    The other values are replaced with NA.
+    """
+    return series.where(series.map(
+        lambda value: isinstance(value, (go.Figure, dict, bytes))
+    ))
+
+
+def coerce(
+    frame: pd.DataFrame,
+    columns: t.Mapping[str, Converter]
+) -> pd.DataFrame:
+    """Validate and convert the columns of a DataFrame.
+
+    Each column is converted as a whole, and the values which cannot be
+    converted are reported together.
+
+    Parameters
+    ----------
+        frame : pandas.DataFrame
+            A DataFrame with one row per item.
+        columns : mapping of str to callable
+            The converters of the required columns. A converter returns NA
+            for the values it rejects.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The converted columns with the index of `frame`.
+
+    Raises
+    ------
+    ValueError
+        If some columns are missing.
+    tlab_pptx.frames.InvalidRowsError
+        If some values are invalid.
+
+    Examples
+    --------
+    >>> frame = pd.DataFrame(
+    ...     dict(name=["a", "b", None], power=["1.5", 2, "x"])
+    ... )
+    >>> coerce(frame.iloc[:2], dict(name=to_str, power=to_int))
+      name  power
+    0    a      1
+    1    b      2
+    >>> coerce(frame, dict(name=to_str, power=to_int))
+    Traceback (most recent call last):
+        ...
+    tlab_pptx.frames.InvalidRowsError: 1 invalid rows
+      row 2: invalid name: None; invalid power: 'x'
+    """
+    missing = [name for name in columns if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    coerced = pd.DataFrame({
+        name: convert(frame[name])
+        for name, convert in columns.items()
+    })
+    invalid = coerced.isna().to_numpy()
+    if invalid.any():
+        errors: dict[t.Hashable, list[str]] = {}
+        labels = frame.index.tolist()
+        for i, j in zip(*np.nonzero(invalid)):
+            name = coerced.columns[j]
+            value = frame[name].iloc[i]
+            errors.setdefault(labels[i], []).append(
+                f"invalid {name}: {value!r}"
+            )
+        raise InvalidRowsError(errors)
+    return coerced
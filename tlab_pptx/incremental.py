@@ -0,0 +1,206 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import json
+import hashlib
+import dataclasses
+import typing as t
+
+import lxml.etree
+import plotly
+import plotly.io as pio
+import pptx.opc.constants
+import pptx.opc.package
+import pptx.opc.packuri
+import pptx.oxml
+import pptx.oxml.ns
+import pptx.presentation
+import pptx.slide
+
+import tlab_pptx
+from tlab_pptx import common, profiles
+
+
+# The name of the slide tag storing the spec key of a slide.
+TAG_NAME = "TLAB_PPTX_SPEC"
+
+_RT_TAGS = pptx.opc.constants.RELATIONSHIP_TYPE.TAGS
+_CT_TAGS = pptx.opc.constants.CONTENT_TYPE.PML_TAGS
+_TAGS_PARTNAME = "/ppt/tags/spec{:d}.xml"
+
+
+@dataclasses.dataclass(frozen=True)
+class UpdateStats:
+    """Statistics of an incremental update of a deck.
+
+    Attributes
+    ----------
+        reused : int
+            The number of slides kept from the existing deck.
+        rebuilt : int
+            The number of slides built again.
+        removed : int
+            The number of slides of the existing deck no longer used.
+    """
+    reused: int
+    rebuilt: int
+    removed: int
+
+
+def make_spec_key(
+    kind: str,
+    texts: t.Sequence[str],
+    figures: t.Sequence[common.PlacedFigure],
+    profile: profiles.RenderProfile
+) -> str:
+    """Compute the key identifying the content of a slide.
+
+    Parameters
+    ----------
+        kind : str
+            The name of the presentation class drawing the slide.
+        texts : sequence of str
+            The texts drawn on the slide.
+        figures : sequence of tlab_pptx.common.PlacedFigure
+            The figures placed on the slide.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+
+    Returns
+    -------
+    str
+        A hex digest which changes whenever the slide would be drawn
+        differently, including by another version of tlab_pptx or plotly.
+
+    Examples
+    --------
+    >>> import plotly.graph_objects as go
+    >>> figure = common.PlacedFigure(go.Figure(go.Scatter(y=[0, 1])), 0.0, 0.0)
+    >>> key = make_spec_key("slide", ["title"], [figure], profiles.DRAFT)
+    >>> key == make_spec_key("slide", ["title"], [figure], profiles.DRAFT)
+    True
+    >>> key == make_spec_key("slide", ["title"], [figure], profiles.PRINT)
+    False
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        dict(
+            kind=kind,
+            texts=list(texts),
+            profile=dataclasses.asdict(profile),
+            tlab_pptx=tlab_pptx.__version__,
+            plotly=plotly.__version__
+        ),
+        sort_keys=True
+    ).encode())
+    for figure in figures:
+        digest.update(b"\0")
+        digest.update(json.dumps(
+            [figure.left, figure.top, figure.width, figure.height]
+        ).encode())
+        digest.update(pio.to_json(
+            common.get_styled_figure(figure.fig, figure.annotations),
+            validate=False
+        ).encode())
+    return digest.hexdigest()
+
+
+def _get_tags_part(slide: pptx.slide.Slide) -> t.Any:
+    for rel in slide.part.rels:
+        if rel.reltype == _RT_TAGS and not rel.is_external \
+                and rel.target_partname.startswith("/ppt/tags/spec"):
+            return rel.target_part
+    return None
+
+
+def get_slide_key(slide: pptx.slide.Slide) -> str | None:
+    """Get the spec key stored in a slide by `set_slide_key`.
+
+    Parameters
+    ----------
+        slide : pptx.slide.Slide
+            A slide of a loaded or built presentation.
+
+    Returns
+    -------
+    str or None
+        The stored key, or None if the slide has none.
+    """
+    part = _get_tags_part(slide)
+    if part is None:
+        return None
+    for tag in lxml.etree.fromstring(part.blob).iter(pptx.oxml.ns.qn("p:tag")):
+        if tag.get("name") == TAG_NAME:
+            value: str | None = tag.get("val")
+            return value
+    return None
+
+
+def set_slide_key(slide: pptx.slide.Slide, key: str) -> None:
+    """Store a spec key in a slide as a slide tag.
+
+    The tag is kept by PowerPoint when the deck is edited and saved, so the
+    slide can still be matched with its spec afterwards.
+
+    Parameters
+    ----------
+        slide : pptx.slide.Slide
+            A slide without a key.
+        key : str
+            The key computed by `make_spec_key`.
+
+    Examples
+    --------
+    >>> import pptx
+    >>> prs = pptx.Presentation()
+    >>> slide = prs.slides.add_slide(prs.slide_layouts[6])
+    >>> get_slide_key(slide) is None
+    True
+    >>> set_slide_key(slide, "0123abcd")
+    >>> get_slide_key(slide)
+    '0123abcd'
+    """
+    tag_lst = pptx.oxml.parse_xml(
+        f'<p:tagLst {pptx.oxml.ns.nsdecls("p")}><p:tag/></p:tagLst>'
+    )
+    tag_lst[0].set("name", TAG_NAME)
+    tag_lst[0].set("val", key)
+    part = pptx.opc.package.Part(
+        pptx.opc.packuri.PackURI(
+            _TAGS_PARTNAME.format(slide.part.partname.idx)
+        ),
+        _CT_TAGS,
+        slide.part.package,
+        lxml.etree.tostring(
+            tag_lst,
+            xml_declaration=True,
+            encoding="UTF-8",
+            standalone=True
+        )
+    )
+    rId = slide.part.relate_to(part, _RT_TAGS)
+    cust_data_lst = pptx.oxml.parse_xml(
+        f'<p:custDataLst {pptx.oxml.ns.nsdecls("p", "r")}>'
+        '<p:tags/>'
+        '</p:custDataLst>'
+    )
+    cust_data_lst[0].set(pptx.oxml.ns.qn("r:id"), rId)
+    slide.shapes._spTree.addnext(cust_data_lst)
+
+
+def renumber_slides(prs: pptx.presentation.Presentation) -> None:
+    """Rename the slide parts after the order of the slides.
+
+    python-pptx names a new slide after the number of slides, which can
+    collide with an existing slide once slides are removed or reordered.
+
+    Parameters
+    ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object whose slides have been rearranged.
+    """
+    for i, slide in enumerate(prs.slides, 1):
+        slide.part.partname = pptx.opc.packuri.PackURI(
+            f"/ppt/slides/slide{i:d}.xml"
+        )
+        part = _get_tags_part(slide)
+        if part is not None:
+            part.partname = pptx.opc.packuri.PackURI(_TAGS_PARTNAME.format(i))
@@ -0,0 +1,334 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Index the spec fields embedded in `pptx` files into SQLite.
+
+    $ python -m tlab_pptx.index archive.sqlite --scan decks/
+    $ python -m tlab_pptx.index archive.sqlite --where "tau1 > 2"
+"""
+import os
+import sys
+import time
+import fnmatch
+import logging
+import sqlite3
+import zipfile
+import argparse
+import dataclasses
+import typing as t
+
+from tlab_pptx import common, metadata
+
+
+logger = logging.getLogger(__name__)
+
+# The columns of the fields of a photo luminescence presentation. The fields
+# are stored as strings and converted by the affinity of the columns.
+COLUMNS = {
+    "title": "TEXT",
+    "excitation_wavelength": "INTEGER",
+    "excitation_power": "INTEGER",
+    "time_range": "INTEGER",
+    "center_wavelength": "INTEGER",
+    "FWHM": "REAL",
+    "frame": "INTEGER",
+    "date": "TEXT",
+    "a": "INTEGER",
+    "b": "INTEGER",
+    "tau1": "REAL",
+    "tau2": "REAL",
+}
+SCHEMA_VERSION = 1
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    crc INTEGER
+);
+CREATE TABLE IF NOT EXISTS slides (
+    path TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    slide INTEGER NOT NULL,
+    kind TEXT,
+    {", ".join(f"{name} {type}" for name, type in COLUMNS.items())},
+    PRIMARY KEY (path, slide)
+);
+CREATE INDEX IF NOT EXISTS slides_excitation_wavelength
+    ON slides (excitation_wavelength);
+CREATE INDEX IF NOT EXISTS slides_tau1 ON slides (tau1);
+CREATE INDEX IF NOT EXISTS slides_tau2 ON slides (tau2);
+CREATE INDEX IF NOT EXISTS slides_date ON slides (date);
+PRAGMA user_version = {SCHEMA_VERSION:d};
+"""
+_INSERT = (
+    f"INSERT INTO slides (path, slide, kind, {', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(COLUMNS) + 3))})"
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class ScanStats:
+    """Statistics of a scan of a directory.
+
+    Attributes
+    ----------
+        added : int
+            The number of files indexed for the first time.
+        updated : int
+            The number of changed files whose fields were read again.
+        unchanged : int
+            The number of files whose fields were not read, since their
+            size and modification time, or the checksum of their fields,
+            are unchanged.
+        removed : int
+            The number of indexed files no longer found.
+        failed : int
+            The number of files which could not be read.
+    """
+    added: int
+    updated: int
+    unchanged: int
+    removed: int
+    failed: int
+
+
+class Index:
+    """SQLite index of the spec fields embedded in `pptx` files.
+
+    The fields are embedded by saving with `embed_spec=True` and are read by
+    `tlab_pptx.metadata.read`, which reads only the central directory of a
+    file and the small member holding them. A file whose size and
+    modification time are unchanged since the last scan is not opened, and
+    the fields of a touched file are parsed again only if the CRC-32 of
+    their member, recorded in the central directory, has changed.
+
+    Parameters
+    ----------
+        database : str or os.PathLike
+            The path of the SQLite database, created if it does not exist.
+
+    Examples
+    --------
+    >>> with Index(":memory:") as index:
+    ...     index.select("tau1 > ? AND excitation_wavelength = ?", (2.0, 400))
+    []
+    """
+
+    def __init__(self, database: common.FilePath) -> None:
+        self.connection = sqlite3.connect(database)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version not in (0, SCHEMA_VERSION):
+            self.connection.close()
+            raise ValueError(f"Unsupported index version: {version}")
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "Index":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def scan(
+        self,
+        directory: common.FilePath,
+        pattern: str = "*.pptx"
+    ) -> ScanStats:
+        """Index the files of a directory and its subdirectories.
+
+        Parameters
+        ----------
+            directory : str or os.PathLike
+                The directory to scan.
+            pattern : str
+                The glob pattern of the names of the files.
+
+        Returns
+        -------
+        ScanStats
+            The numbers of the files by what was done with them.
+        """
+        directory = os.path.abspath(directory)
+        counts = dict.fromkeys(
+            ("added", "updated", "unchanged", "removed", "failed"),
+            0
+        )
+        indexed = {
+            row["path"]: row for row in self.connection.execute(
+                "SELECT path, mtime_ns, size, crc FROM files"
+            )
+        }
+        found = set()
+        with self.connection:
+            for root, _, names in os.walk(directory):
+                for name in fnmatch.filter(names, pattern):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found.add(path)
+                    row = indexed.get(path)
+                    if row is not None \
+                            and row["mtime_ns"] == stat.st_mtime_ns \
+                            and row["size"] == stat.st_size:
+                        counts["unchanged"] += 1
+                        continue
+                    counts[self._index(path, stat, row)] += 1
+            removed = [
+                (path,) for path in indexed
+                if path not in found
+                and path.startswith(os.path.join(directory, ""))
+                and fnmatch.fnmatch(os.path.basename(path), pattern)
+            ]
+            self.connection.executemany(
+                "DELETE FROM files WHERE path = ?",
+                removed
+            )
+            counts["removed"] = len(removed)
+        stats = ScanStats(**counts)
+        logger.info(
+            "Scanned %s: %d added, %d updated, %d unchanged, %d removed, "
+            "%d failed",
+            directory,
+            stats.added,
+            stats.updated,
+            stats.unchanged,
+            stats.removed,
+            stats.failed
+        )
+        return stats
+
+    def _index(
+        self,
+        path: str,
+        stat: os.stat_result,
+        row: sqlite3.Row | None
+    ) -> str:
+        """Index a new or touched file and tell what was done with it."""
+        try:
+            with zipfile.ZipFile(path) as archive:
+                try:
+                    crc: int | None = archive.getinfo(metadata.MEMBER).CRC
+                except KeyError:
+                    crc = None
+                if row is not None and row["crc"] == crc:
+                    records = None
+                else:
+                    records = [] if crc is None \
+                        else metadata.parse(archive.read(metadata.MEMBER))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning("Could not index %s: %s", path, e)
+            if row is not None:
+                self.connection.execute(
+                    "DELETE FROM files WHERE path = ?",
+                    (path,)
+                )
+            return "failed"
+        self.connection.execute(
+            "INSERT INTO files (path, mtime_ns, size, crc) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET "
+            "mtime_ns = excluded.mtime_ns, size = excluded.size, "
+            "crc = excluded.crc",
+            (path, stat.st_mtime_ns, stat.st_size, crc)
+        )
+        if records is None:
+            return "unchanged"
+        self.connection.execute("DELETE FROM slides WHERE path = ?", (path,))
+        self.connection.executemany(_INSERT, [
+            (
+                path,
+                record.get("slide"),
+                record.get("kind"),
+                *(record.get(name) for name in COLUMNS)
+            )
+            for record in records
+        ])
+        return "added" if row is None else "updated"
+
+    def select(
+        self,
+        where: str = "1",
+        parameters: t.Sequence[t.Any] | t.Mapping[str, t.Any] = ()
+    ) -> list[dict[str, t.Any]]:
+        """Select the indexed slides.
+
+        Parameters
+        ----------
+            where : str
+                An SQL expression over `path`, `slide`, `kind` and the
+                columns of `COLUMNS`, e.g. "tau1 > 2 AND
+                excitation_wavelength = 400".
+            parameters : sequence or mapping
+                The values of the placeholders of `where`.
+
+        Returns
+        -------
+        list of dict
+            The slides ordered by their files and numbers.
+        """
+        return [
+            dict(row) for row in self.connection.execute(
+                f"SELECT * FROM slides WHERE {where} ORDER BY path, slide",
+                parameters
+            )
+        ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tlab_pptx.index",
+        description="Index the spec fields embedded in pptx files and "
+                    "query them."
+    )
+    parser.add_argument("database", help="the SQLite database of the index")
+    parser.add_argument(
+        "--scan",
+        action="append",
+        default=[],
+        metavar="DIRECTORY",
+        help="index a directory first"
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*.pptx",
+        help="the glob pattern of the pptx files"
+    )
+    parser.add_argument(
+        "--where",
+        help="an SQL expression selecting the slides to print"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        index = Index(args.database)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"tlab_pptx.index: error: {e}", file=sys.stderr)
+        return 2
+    with index:
+        for directory in args.scan:
+            index.scan(directory, args.pattern)
+        if args.where is None:
+            return 0
+        start = time.perf_counter()
+        try:
+            slides = index.select(args.where)
+        except sqlite3.Error as e:
+            print(f"tlab_pptx.index: error: {e}", file=sys.stderr)
+            return 2
+        elapsed = time.perf_counter() - start
+    columns = ["path", "slide", *COLUMNS]
+    print("\t".join(columns))
+    for slide in slides:
+        print("\t".join(str(slide[name]) for name in columns))
+    print(f"{len(slides)} slides in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
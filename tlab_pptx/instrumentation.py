@@ -0,0 +1,301 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import json
+import time
+import types
+import threading
+import contextlib
+import contextvars
+import dataclasses
+import typing as t
+
+
+class Span:
+    """A timed stage of building a presentation.
+
+    Attributes
+    ----------
+        stage : str
+            The name of the stage, e.g. "template", "render", "add_picture"
+            or "save".
+        attributes : dict
+            The identity and results of the stage. The attributes of the
+            enclosing spans, such as "slide" and "figure", are inherited,
+            and "size" holds the number of bytes produced if known.
+        parent : Span, optional
+            The enclosing span.
+        start : float
+            The `time.perf_counter` value when the stage started.
+        end : float, optional
+            The `time.perf_counter` value when the stage ended.
+        thread : int
+            The identifier of the thread running the stage.
+    """
+    __slots__ = (
+        "stage", "attributes", "parent", "start", "end", "thread",
+        "_hooks", "_token"
+    )
+
+    def __init__(
+        self,
+        stage: str,
+        attributes: dict[str, t.Any],
+        hooks: t.Sequence["Hook"]
+    ) -> None:
+        self.stage = stage
+        self.parent = _current.get()
+        if self.parent is None:
+            self.attributes = attributes
+        else:
+            self.attributes = {**self.parent.attributes, **attributes}
+        self.start = 0.0
+        self.end: float | None = None
+        self.thread = threading.get_ident()
+        self._hooks = hooks
+        self._token: contextvars.Token[Span | None] | None = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        for hook in self._hooks:
+            hook.on_start(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None
+    ) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        for hook in self._hooks:
+            hook.on_end(self)
+        if self._token is not None:
+            _current.reset(self._token)
+
+    @property
+    def duration(self) -> float | None:
+        """The seconds taken by the stage, or None if it is running."""
+        return None if self.end is None else self.end - self.start
+
+    def set(self, **attributes: t.Any) -> None:
+        """Attach attributes known only when the stage ends."""
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """A span doing nothing, returned while no hook is registered."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        pass
+
+    def set(self, **attributes: t.Any) -> None:
+        pass
+
+
+class Hook:
+    """Callback receiving the start and the end of every span.
+
+    Subclasses override `on_start` and/or `on_end`. Both are called in the
+    thread running the stage.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when a stage starts."""
+
+    def on_end(self, span: Span) -> None:
+        """Called when a stage ends with its duration and attributes."""
+
+
+_NULL_SPAN = _NullSpan()
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "tlab_pptx_span",
+    default=None
+)
+_hooks: tuple[Hook, ...] = ()
+_lock = threading.Lock()
+
+
+def span(stage: str, **attributes: t.Any) -> Span | _NullSpan:
+    """Instrument a stage.
+
+    While no hook is registered, a shared span doing nothing is returned so
+    that instrumented code pays only for the call.
+
+    Parameters
+    ----------
+        stage : str
+            The name of the stage.
+        **attributes
+            The identity of the stage, e.g. the slide or figure index.
+
+    Returns
+    -------
+    tlab_pptx.instrumentation.Span
+        A context manager timing the stage.
+
+    Examples
+    --------
+    >>> with span("render", figure=0) as s:
+    ...     s.set(size=1024)
+    """
+    if not _hooks:
+        return _NULL_SPAN
+    return Span(stage, attributes, _hooks)
+
+
+def enabled() -> bool:
+    """Check if any hook is registered."""
+    return bool(_hooks)
+
+
+def register(hook: Hook) -> Hook:
+    """Register a hook receiving the spans of all threads.
+
+    Returns
+    -------
+    tlab_pptx.instrumentation.Hook
+        The hook itself.
+    """
+    global _hooks
+    with _lock:
+        _hooks = (*_hooks, hook)
+    return hook
+
+
+def unregister(hook: Hook) -> None:
+    """Unregister a hook registered by `register`."""
+    global _hooks
+    with _lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+@contextlib.contextmanager
+def instrument(*hooks: Hook) -> t.Iterator[None]:
+    """Register hooks within a with block.
+
+    Examples
+    --------
+    >>> summary = Summary()
+    >>> with instrument(summary):
+    ...     with span("save") as s:
+    ...         s.set(size=2048)
+    >>> summary.stats()["save"].count, summary.stats()["save"].size
+    (1, 2048)
+    """
+    for hook in hooks:
+        register(hook)
+    try:
+        yield
+    finally:
+        for hook in hooks:
+            unregister(hook)
+
+
+@dataclasses.dataclass(frozen=True)
+class StageStats:
+    """Aggregated spans of a stage.
+
+    Attributes
+    ----------
+        count : int
+            The number of spans.
+        total : float
+            The total seconds of the spans.
+        max : float
+            The longest seconds of a span.
+        size : int
+            The total bytes produced by the spans.
+    """
+    count: int
+    total: float
+    max: float
+    size: int
+
+    @property
+    def mean(self) -> float:
+        """The mean seconds per span."""
+        return self.total / self.count if self.count else 0.0
+
+
+class Summary(Hook):
+    """Collector aggregating the spans in memory per stage."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        duration = span.duration or 0.0
+        size = span.attributes.get("size") or 0
+        with self._lock:
+            stats = self._stats.get(span.stage, StageStats(0, 0.0, 0.0, 0))
+            self._stats[span.stage] = StageStats(
+                count=stats.count + 1,
+                total=stats.total + duration,
+                max=max(stats.max, duration),
+                size=stats.size + size
+            )
+
+    def stats(self) -> dict[str, StageStats]:
+        """Get the statistics per stage in the order they first ended."""
+        with self._lock:
+            return dict(self._stats)
+
+    def format(self) -> str:
+        """Format the statistics as a table in milliseconds."""
+        lines = [
+            f"{'stage':<16}{'count':>8}{'total':>12}{'mean':>12}"
+            f"{'max':>12}{'bytes':>14}"
+        ]
+        for stage, stats in self.stats().items():
+            lines.append(
+                f"{stage:<16}{stats.count:>8d}{stats.total * 1000:>12.1f}"
+                f"{stats.mean * 1000:>12.2f}{stats.max * 1000:>12.1f}"
+                f"{stats.size:>14d}"
+            )
+        return "\n".join(lines)
+
+
+class ChromeTrace(Hook):
+    """Collector recording the spans as Chrome trace events.
+
+    The written JSON can be opened with chrome://tracing or Perfetto.
+    """
+
+    def __init__(self) -> None:
+        self._events: list[dict[str, t.Any]] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def on_end(self, span: Span) -> None:
+        event = dict(
+            name=span.stage,
+            ph="X",
+            ts=span.start * 1e6,
+            dur=(span.duration or 0.0) * 1e6,
+            pid=self._pid,
+            tid=span.thread,
+            args={
+                key: value if isinstance(value, (int, float, str, bool))
+                else str(value)
+                for key, value in span.attributes.items()
+            }
+        )
+        with self._lock:
+            self._events.append(event)
+
+    def events(self) -> list[dict[str, t.Any]]:
+        """Get the recorded trace events."""
+        with self._lock:
+            return list(self._events)
+
+    def dump(self, file: t.TextIO) -> None:
+        """Write the trace events as JSON to a text file."""
+        json.dump(dict(traceEvents=self.events()), file)
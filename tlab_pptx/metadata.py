@@ -0,0 +1,189 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Spec fields embedded in a `pptx` file as a custom XML part.
+
+The part is a small XML document stored as its own member of the zip
+archive, so the fields of every slide can be read back by `read` without
+parsing the slides or inflating the images.
+"""
+import datetime
+import zipfile
+import typing as t
+
+import lxml.etree
+import pptx.opc.constants
+import pptx.opc.package
+import pptx.opc.packuri
+import pptx.presentation
+
+from tlab_pptx import abstract, common
+
+
+PARTNAME = "/customXml/tlabPptxSpec.xml"
+MEMBER = PARTNAME.lstrip("/")
+NAMESPACE = "urn:tlab-pptx:spec"
+VERSION = 1
+
+_RT_CUSTOM_XML = pptx.opc.constants.RELATIONSHIP_TYPE.CUSTOM_XML
+_CT_XML = pptx.opc.constants.CONTENT_TYPE.XML
+_SPECS = f"{{{NAMESPACE}}}specs"
+_SLIDE = f"{{{NAMESPACE}}}slide"
+
+Record = dict[str, str]
+
+
+def make_records(
+    presentations: t.Iterable[abstract.AbstractPresentation],
+    start: int = 1
+) -> list[Record]:
+    """Make the records of the presentations having spec fields.
+
+    Parameters
+    ----------
+        presentations : iterable of tlab_pptx.abstract.AbstractPresentation
+            The presentations in the order of their slides.
+        start : int
+            The number of the slide of the first presentation.
+
+    Returns
+    -------
+    list of dict
+        The fields formatted as strings with the number of the slide and
+        the name of the presentation class.
+    """
+    records = []
+    for slide, presentation in enumerate(presentations, start):
+        fields = presentation.get_spec_fields()
+        if fields is None:
+            continue
+        cls = type(presentation)
+        record = dict(
+            slide=str(slide),
+            kind=f"{cls.__module__}.{cls.__qualname__}"
+        )
+        for name, value in fields.items():
+            record[name] = _format_value(value)
+        records.append(record)
+    return records
+
+
+def embed(
+    prs: pptx.presentation.Presentation,
+    records: t.Iterable[Record] | None
+) -> None:
+    """Store records in a presentation, replacing those stored before.
+
+    Parameters
+    ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx.
+        records : iterable of dict, optional
+            The records made by `make_records`. If None, the stored records
+            are only removed.
+
+    Examples
+    --------
+    >>> import io
+    >>> import pptx
+    >>> prs = pptx.Presentation()
+    >>> embed(prs, [dict(slide="1", kind="Sample", tau1="1.2")])
+    >>> with io.BytesIO() as f:
+    ...     prs.save(f)
+    ...     read(f)
+    [{'slide': '1', 'kind': 'Sample', 'tau1': '1.2'}]
+    """
+    for rel in list(prs.part.rels):
+        if rel.reltype == _RT_CUSTOM_XML and not rel.is_external \
+                and rel.target_part.partname == PARTNAME:
+            prs.part.drop_rel(rel.rId)
+    if records is None:
+        return
+    root = lxml.etree.Element(_SPECS, nsmap={None: NAMESPACE})
+    root.set("version", str(VERSION))
+    for record in records:
+        lxml.etree.SubElement(root, _SLIDE, record)
+    part = pptx.opc.package.Part(
+        pptx.opc.packuri.PackURI(PARTNAME),
+        _CT_XML,
+        prs.part.package,
+        lxml.etree.tostring(
+            root,
+            xml_declaration=True,
+            encoding="UTF-8",
+            standalone=True
+        )
+    )
+    prs.part.relate_to(part, _RT_CUSTOM_XML)
+
+
+def read(filepath_or_buffer: common.FilePathOrBuffer) -> list[Record] | None:
+    """Read the records stored in a `pptx` file by `embed`.
+
+    Only the central directory of the archive and the member of the part
+    are read.
+
+    Parameters
+    ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object of a `pptx` file.
+
+    Returns
+    -------
+    list of dict or None
+        The records in the order of the slides, or None if the file has
+        none stored.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a zip archive or the records are invalid.
+    """
+    try:
+        with zipfile.ZipFile(filepath_or_buffer) as archive:
+            try:
+                data = archive.read(MEMBER)
+            except KeyError:
+                return None
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a pptx file: {e}") from None
+    return parse(data)
+
+
+def parse(data: bytes) -> list[Record]:
+    """Parse the XML of the part written by `embed`.
+
+    Parameters
+    ----------
+        data : bytes
+            The content of the part.
+
+    Returns
+    -------
+    list of dict
+        The records in the order of the slides.
+
+    Raises
+    ------
+    ValueError
+        If the records are invalid or of an unsupported version.
+    """
+    try:
+        root = lxml.etree.fromstring(data)
+    except lxml.etree.XMLSyntaxError as e:
+        raise ValueError(f"Invalid spec metadata: {e}") from None
+    if root.tag != _SPECS:
+        raise ValueError(
+            f"Invalid spec metadata: unexpected element {root.tag!r}"
+        )
+    if root.get("version") != str(VERSION):
+        raise ValueError(
+            f"Unsupported spec metadata version: {root.get('version')}"
+        )
+    return [dict(element.attrib) for element in root.iterchildren(_SLIDE)]
+
+
+def _format_value(value: t.Any) -> str:
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,611 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import re
+import math
+import dataclasses
+import typing as t
+
+import lxml.etree
+import numpy as np
+import pptx
+import pptx.oxml
+import pptx.oxml.ns
+import pptx.presentation
+import pptx.slide
+import pptx.util
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    decimation,
+    incremental,
+    instrumentation,
+    photo_luminescence as pl,
+    profiles,
+    sessions,
+    templates
+)
+
+
+# The resolution of the thumbnails for profiles with a fixed scale.
+THUMBNAIL_DPI = 150.0
+
+# The position and size of the grid of decay curves in centimeter.
+_GRID = (0.33, 2.6, 15.8, 15.8)
+# The position and width of the table in centimeter.
+_TABLE = (16.4, 2.6, 8.7)
+_TABLE_HEADERS = ("Sample", "a", "b", "τ₁ (ns)", "τ₂ (ns)")
+_TABLE_WIDTHS = (3.5, 1.1, 1.1, 1.5, 1.5)
+# The gap between the tables split side by side and the margin left below
+# them in centimeter.
+_TABLE_GAP = 0.2
+_TABLE_MARGIN = 0.33
+# The largest number of tables side by side, and the smallest size of their
+# texts in point before the table is split further.
+_MAX_TABLES = 3
+_MIN_FONT_SIZE = 5.0
+# The fraction of a cell of the grid left between the thumbnails.
+_GAP = 0.12
+# Private use characters marking the cells of the prototype row.
+_SENTINEL = "\ue000{}\ue000"
+
+
+def get_thumbnail_profile(
+    profile: profiles.RenderProfile
+) -> profiles.RenderProfile:
+    """Get the profile rendering a grid of thumbnails.
+
+    The resolution and the decimation follow `profile` if it has a `dpi`,
+    otherwise `THUMBNAIL_DPI` is used instead of its fixed scale. The grid
+    is always rasterized.
+
+    Examples
+    --------
+    >>> get_thumbnail_profile(profiles.ORIGINAL).dpi
+    150.0
+    >>> get_thumbnail_profile(profiles.PRINT).dpi
+    300
+    """
+    return dataclasses.replace(
+        profile,
+        dpi=profile.dpi or THUMBNAIL_DPI,
+        scale=None,
+        backend="image",
+        points_per_pixel=profile.points_per_pixel or 1.0
+    )
+
+
+def _normalize(values: t.Any, log: bool) -> t.Any:
+    values = np.asarray(values, dtype=float)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0.0, np.log10(values), np.nan)
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return np.full(values.shape, np.nan)
+    low, high = finite.min(), finite.max()
+    if high == low:
+        return np.where(np.isfinite(values), 0.5, np.nan)
+    return (values - low) / (high - low)
+
+
+def compose_grid(
+    figures: t.Sequence[common.FigureOrSpec],
+    titles: t.Sequence[str],
+    columns: int | None = None,
+    max_points: int | None = None
+) -> dict[str, t.Any]:
+    """Compose the line traces of figures into a grid of small multiples.
+
+    Rather than a subplot with its own axes per figure, which plotly renders
+    slower than linearly in their number, each figure is scaled into its
+    cell of a single pair of hidden axes. The i-th traces of all figures
+    are joined into one trace separated by NaN, styled like the first of
+    them, and the frames and the titles of the cells are one trace each.
+    Each figure is scaled to fill its cell, on a log scale for the axes of
+    type "log".
+
+    Parameters
+    ----------
+        figures : sequence of plotly.graph_objects.Figure, dict or bytes
+            The figures of the cells.
+        titles : sequence of str
+            The titles of the cells.
+        columns : int, optional
+            The number of columns. Defaults to a square grid.
+        max_points : int, optional
+            The number of points each trace is decimated to.
+
+    Returns
+    -------
+    dict
+        A figure dict spanning [0, 1] on both axes.
+
+    Examples
+    --------
+    >>> fig = compose_grid([dict(data=[dict(y=[0, 1])])] * 3, ["a", "b", "c"])
+    >>> [trace.get("name") for trace in fig["data"]]
+    [None, 'frames', 'titles']
+    >>> fig["data"][0]["x"][:3], fig["data"][0]["y"][:3]
+    (array([0.03, 0.47,  nan]), array([0.53, 0.88,  nan]))
+    """
+    n = len(figures)
+    columns = columns or max(1, math.ceil(math.sqrt(n)))
+    rows = max(1, math.ceil(n / columns))
+    index = np.arange(n)
+    column, row = index % columns, index // columns
+    x0 = (column + _GAP / 2) / columns
+    x1 = (column + 1 - _GAP / 2) / columns
+    y0 = 1.0 - (row + 1 - _GAP / 2) / rows
+    # The top of a cell is left for its title.
+    y1 = 1.0 - (row + 2 * _GAP) / rows
+    styles: list[dict[str, t.Any]] = []
+    xs: list[list[t.Any]] = []
+    ys: list[list[t.Any]] = []
+    gap = np.array([np.nan])
+    for i, fig in enumerate(figures):
+        source = common.get_figure_dict(fig)
+        layout = source.get("layout") or {}
+        log_x = (layout.get("xaxis") or {}).get("type") == "log"
+        log_y = (layout.get("yaxis") or {}).get("type") == "log"
+        traces = [
+            dict(trace) for trace in source.get("data", ())
+            if trace.get("type", "scatter") in ("scatter", "scattergl")
+            and trace.get("y") is not None
+        ]
+        if max_points is not None:
+            decimation.decimate(dict(data=traces), max_points)
+        ys_i = [np.asarray(trace["y"], dtype=float) for trace in traces]
+        xs_i = [
+            np.arange(len(y), dtype=float) if trace.get("x") is None
+            else np.asarray(trace["x"], dtype=float)
+            for trace, y in zip(traces, ys_i)
+        ]
+        if not traces:
+            continue
+        # The traces of a figure share the scale of its cell.
+        x = _normalize(np.concatenate(xs_i), log_x)
+        y = _normalize(np.concatenate(ys_i), log_y)
+        bounds = np.cumsum([0, *map(len, ys_i)])
+        for k, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if k == len(styles):
+                styles.append({
+                    key: value for key, value in traces[k].items()
+                    if key in ("line", "name", "opacity")
+                })
+                xs.append([])
+                ys.append([])
+            xs[k] += [
+                np.round(x0[i] + x[start:stop] * (x1[i] - x0[i]), 6),
+                gap
+            ]
+            ys[k] += [
+                np.round(y0[i] + y[start:stop] * (y1[i] - y0[i]), 6),
+                gap
+            ]
+    data = [
+        dict(
+            style,
+            type="scatter",
+            mode="lines",
+            x=np.concatenate(x_parts),
+            y=np.concatenate(y_parts)
+        )
+        for style, x_parts, y_parts in zip(styles, xs, ys)
+    ]
+    # The frames are closed rectangles separated by NaN.
+    nan = np.full(n, np.nan)
+    frame_x = np.stack([x0, x1, x1, x0, x0, nan], axis=1).ravel()
+    frame_y = np.stack([y0, y0, y1, y1, y0, nan], axis=1).ravel()
+    data.append(dict(
+        type="scatter",
+        mode="lines",
+        name="frames",
+        x=np.round(frame_x, 6),
+        y=np.round(frame_y, 6),
+        line=dict(color="black", width=0.5)
+    ))
+    data.append(dict(
+        type="scatter",
+        mode="text",
+        name="titles",
+        x=np.round((x0 + x1) / 2, 6),
+        y=np.round(1.0 - (row + _GAP) / rows, 6),
+        text=list(titles),
+        textposition="middle center"
+    ))
+    axis = dict(range=[0.0, 1.0], visible=False)
+    return dict(data=data, layout=dict(xaxis=axis, yaxis=axis))
+
+
+def format_table(
+    presentations: t.Sequence[pl.Presentation]
+) -> list[list[str]]:
+    """Format the columns of the summary table.
+
+    Each column is formatted as a whole like
+    `tlab_pptx.photo_luminescence.Presentation`.
+
+    Returns
+    -------
+    list of list of str
+        The columns of `title`, `a`, `b`, `tau1` and `tau2`.
+
+    Examples
+    --------
+    >>> import datetime
+    >>> prs = pl.Presentation(
+    ...     "S", 400, 1, 10, 480, 50.0, 10000, datetime.date(2022, 1, 1),
+    ...     {}, {}, 63, 37, 1.234, 12.5
+    ... )
+    >>> format_table([prs])
+    [['S'], ['63'], ['37'], ['1.2'], ['12']]
+    """
+    n = len(presentations)
+
+    def values(name: str) -> t.Any:
+        return np.fromiter((getattr(p, name) for p in presentations), float, n)
+
+    return [
+        [p.title for p in presentations],
+        np.char.mod("%d", values("a")).tolist(),
+        np.char.mod("%d", values("b")).tolist(),
+        np.char.mod("%.2g", values("tau1")).tolist(),
+        np.char.mod("%.2g", values("tau2")).tolist()
+    ]
+
+
+def _escape(values: t.Sequence[str]) -> t.Any:
+    escaped = np.asarray(values, dtype=str)
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        escaped = np.char.replace(escaped, char, entity)
+    return escaped
+
+
+def add_table(
+    slide: pptx.slide.Slide,
+    columns: t.Sequence[t.Sequence[str]],
+    headers: t.Sequence[str],
+    left: float,
+    top: float,
+    widths: t.Sequence[float],
+    font_size: float = 10.0
+) -> None:
+    """Add a native table to a slide.
+
+    A prototype row is drawn through python-pptx and serialized once, and
+    the XML of all rows is concatenated column by column and parsed in one
+    call, so the cost per row is nearly that of formatting its values.
+
+    Parameters
+    ----------
+        slide : pptx.slide.Slide
+            A slide to be updated.
+        columns : sequence of sequence of str
+            The texts of the body cells by column.
+        headers : sequence of str
+            The texts of the header cells.
+        left : float
+            The left position of the table in centimeter.
+        top : float
+            The top position of the table in centimeter.
+        widths : sequence of float
+            The width of each column in centimeter.
+        font_size : float
+            The size of the texts in point.
+    """
+    with instrumentation.span("add_table", rows=len(columns[0])):
+        row_height = pptx.util.Pt(font_size * 1.5)
+        shape = slide.shapes.add_table(
+            2,
+            len(headers),
+            pptx.util.Cm(left),
+            pptx.util.Cm(top),
+            pptx.util.Cm(sum(widths)),
+            row_height * 2
+        )
+        table = shape.table
+        for j, width in enumerate(widths):
+            table.columns[j].width = pptx.util.Cm(width)
+        sentinels = [_SENTINEL.format(j) for j in range(len(headers))]
+        for i, texts in enumerate([headers, sentinels]):
+            table.rows[i].height = row_height
+            for j, text in enumerate(texts):
+                cell = table.cell(i, j)
+                cell.margin_top = cell.margin_bottom = 0
+                cell.text = text
+                font = cell.text_frame.paragraphs[0].font
+                font.size = pptx.util.Pt(font_size)
+        tbl = table._tbl
+        prototype = tbl.tr_lst[1]
+        fragments = re.split(
+            _SENTINEL.format(r"\d+"),
+            lxml.etree.tostring(prototype, encoding="unicode")
+        )
+        tbl.remove(prototype)
+        if len(columns[0]):
+            rows = np.asarray(fragments[0], dtype=object)
+            for column, fragment in zip(columns, fragments[1:]):
+                rows = rows + _escape(column).astype(object) + fragment
+            parsed = pptx.oxml.parse_xml(
+                f"<a:tbl {pptx.oxml.ns.nsdecls('a')}>{''.join(rows)}</a:tbl>"
+            )
+            tbl.extend(list(parsed))
+        shape.height = row_height * len(tbl.tr_lst)
+
+
+@dataclasses.dataclass(frozen=True)
+class Overview(abstract.AbstractPresentation):
+    """Presentation summarizing many photo luminescence experiments.
+
+    The decay curves (`v_fig`) of all experiments are composed into one
+    grid of subplots, which is rendered in a single call at a resolution
+    sized for the thumbnails, next to a native table of `a`, `b`, `tau1`
+    and `tau2`. The table is split into up to three tables side by side
+    and its texts are shrunk so that it fits the height of the slide.
+
+    Examples
+    --------
+    >>> import datetime
+    >>> import plotly.graph_objects as go
+    >>> overview = Overview([
+    ...     pl.Presentation(
+    ...         title=f"Sample {i}",
+    ...         excitation_wavelength=400,
+    ...         excitation_power=1,
+    ...         time_range=10,
+    ...         center_wavelength=480,
+    ...         FWHM=50,
+    ...         frame=10000,
+    ...         date=datetime.date.today(),
+    ...         h_fig=go.Figure(),
+    ...         v_fig=go.Figure(go.Scatter(y=[1.0, 0.5, 0.25])),
+    ...         a=63,
+    ...         b=37,
+    ...         tau1=1.2,
+    ...         tau2=3.6
+    ...     )
+    ...     for i in range(4)
+    ... ])
+
+    Save the Overview object, or put it in front of a deck.
+    >>> overview.save("overview.pptx")  # doctest: +SKIP
+    """
+    presentations: t.Sequence[pl.Presentation]
+    title: str = "Overview"
+    columns: int | None = None
+    # The grids composed by `_grid` by their profiles.
+    _grids: dict[profiles.RenderProfile, dict[str, t.Any]] = \
+        dataclasses.field(
+            default_factory=dict,
+            init=False,
+            repr=False,
+            compare=False
+        )
+
+    def _grid(self, profile: profiles.RenderProfile) -> dict[str, t.Any]:
+        """Compose the grid with the traces decimated to the thumbnails.
+
+        The grid is composed once per profile, since both `get_spec_key`
+        and `render` need it.
+        """
+        if profile not in self._grids:
+            self._grids[profile] = self._compose_grid(profile)
+        return self._grids[profile]
+
+    def _compose_grid(
+        self,
+        profile: profiles.RenderProfile
+    ) -> dict[str, t.Any]:
+        columns = self.columns \
+            or max(1, math.ceil(math.sqrt(len(self.presentations))))
+        _, _, width, height = _GRID
+        max_points = profile.get_max_points(width, height)
+        with instrumentation.span("compose", figures=len(self.presentations)):
+            return compose_grid(
+                [p.v_fig for p in self.presentations],
+                [p.title for p in self.presentations],
+                columns,
+                None if max_points is None else max(2, max_points // columns)
+            )
+
+    def _font_size(self) -> float:
+        """The size of the texts in point, smaller for more experiments."""
+        return float(np.clip(300.0 / (len(self.presentations) + 1), 5.0, 12.0))
+
+    def _table_layout(self, height: float) -> tuple[int, float]:
+        """The number of tables and their font size fitting `height` cm."""
+        n = len(self.presentations)
+        for tables in range(1, _MAX_TABLES + 1):
+            # Each table has a header row, and the rows are 1.5 times as
+            # high as the texts.
+            rows = math.ceil(n / tables) + 1
+            font_size = pptx.util.Cm(height).pt / (1.5 * rows)
+            if font_size >= _MIN_FONT_SIZE:
+                break
+        return tables, min(self._font_size(), font_size)
+
+    def get_spec_key(self, profile: profiles.RenderProfile) -> str:
+        """Get the key identifying the content of the slide
+
+        Parameters
+        ----------
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+
+        Returns
+        -------
+        str
+            A hex digest of the table, the grid and the profile.
+        """
+        thumbnail_profile = get_thumbnail_profile(profile)
+        return incremental.make_spec_key(
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            [
+                self.title,
+                *(
+                    text for column in format_table(self.presentations)
+                    for text in column
+                )
+            ],
+            [common.PlacedFigure(self._grid(thumbnail_profile), *_GRID)],
+            thumbnail_profile
+        )
+
+    def render(
+        self,
+        cache: caching.RenderCache | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None
+    ) -> bytes:
+        """Render the grid of decay curves
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile, adapted by `get_thumbnail_profile`.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the grid with.
+
+        Returns
+        -------
+        bytes
+            The rendered image.
+        """
+        profile = get_thumbnail_profile(profile)
+        _, _, width, height = _GRID
+        fig = common.get_styled_figure(self._grid(profile))
+        fig["layout"]["font"] = dict(size=self._font_size() * 1.5)
+        fig["layout"]["margin"] = dict(l=4, r=4, t=4, b=4)
+        return common.render_figure(
+            fig,
+            profile,
+            width,
+            height,
+            cache=cache,
+            session=session
+        )
+
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        """Append a slide to a Presentation object
+
+        Parameters
+        ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx to be updated.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        images : sequence of bytes or None, optional
+            Ignored, since the grid is rendered with its own profile.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the grid.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the grid with.
+        compiled : bool
+            Ignored, since the table depends on the presentations.
+
+        Returns
+        -------
+        pptx.slide.Slide
+            The added slide.
+        """
+        with instrumentation.span(
+            "slide",
+            slide=len(prs.slides),
+            title=self.title
+        ):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            assert isinstance(slide, pptx.slide.Slide)
+            common.add_title(slide, self.title)
+            if self.presentations:
+                image = self.render(
+                    cache=cache,
+                    profile=profile,
+                    session=session
+                )
+                common.add_picture(slide, image, *_GRID)
+            left, top, width = _TABLE
+            tables, font_size = self._table_layout(
+                pptx.util.Length(prs.slide_height).cm - top - _TABLE_MARGIN
+            )
+            rows = math.ceil(len(self.presentations) / tables)
+            width = (width - _TABLE_GAP * (tables - 1)) / tables
+            columns = format_table(self.presentations)
+            for i in range(tables):
+                add_table(
+                    slide,
+                    [column[i * rows:(i + 1) * rows] for column in columns],
+                    _TABLE_HEADERS,
+                    left + i * (width + _TABLE_GAP),
+                    top,
+                    [w * width / sum(_TABLE_WIDTHS) for w in _TABLE_WIDTHS],
+                    font_size
+                )
+        return slide
+
+    def build(
+        self,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None
+    ) -> pptx.presentation.Presentation:
+        """Build a Presentation object
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the grid.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the grid with.
+
+        Returns
+        -------
+        pptx.presentaion.Presentation
+            A Presentation object of python-pptx
+        """
+        with instrumentation.span("build"):
+            with instrumentation.span("template"):
+                prs = templates.open_template()
+            assert isinstance(prs, pptx.presentation.Presentation)
+            self.add_slide(
+                prs,
+                cache=cache,
+                profile=profiles.get_profile(profile),
+                session=session
+            )
+        return prs
+
+    def save(
+        self,
+        filepath_or_buffer: common.FilePathOrBuffer,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None
+    ) -> None:
+        """Save as a `pptx` file.
+
+        Parameters
+        ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the grid.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the grid with.
+        """
+        prs = self.build(cache=cache, profile=profile, session=session)
+        common.save_presentation(prs, filepath_or_buffer)
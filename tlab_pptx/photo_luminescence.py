@@ -1,13 +1,79 @@
 # Copyright (c) 2022 Shuhei Nitta. All rights reserved.
 import dataclasses
 import datetime
+import functools
+import typing as t
 
+import numpy as np
 import pptx
 import pptx.presentation
 import pptx.slide
-import plotly.graph_objects as go
 
-from tlab_pptx import abstract, common
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    compiled as compilation,
+    incremental,
+    instrumentation,
+    metadata,
+    profiles,
+    sessions,
+    templates
+)
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+    from tlab_pptx import frames
+
+
+# The positions of the text boxes in centimeter and their fonts.
+_TEXT_BOXES = [
+    (2.33, 2.5, "Arial"),
+    (14.33, 2.5, "Arial"),
+    (14.33, 17.0, "Cambria Math"),
+    (19.33, 17.0, "Cambria Math"),
+]
+
+
+def _get_frame_columns() -> dict[str, "frames.Converter"]:
+    """Get the columns read by `Presentation.from_frame` and their converters.
+
+    `tlab_pptx.frames` is imported here, since pandas takes longer to import
+    than the rest of the module.
+    """
+    from tlab_pptx import frames
+    return dict(
+        title=frames.to_str,
+        excitation_wavelength=frames.to_int,
+        excitation_power=frames.to_int,
+        time_range=frames.to_int,
+        center_wavelength=frames.to_int,
+        FWHM=frames.to_float,
+        frame=frames.to_int,
+        date=frames.to_date,
+        h_fig=frames.to_figure,
+        v_fig=frames.to_figure,
+        a=frames.to_int,
+        b=frames.to_int,
+        tau1=frames.to_float,
+        tau2=frames.to_float,
+    )
+
+
+def _draw(
+    boxes: tuple[tuple[float, float, float, float], ...],
+    slide: pptx.slide.Slide,
+    texts: t.Sequence[str],
+    images: t.Sequence[bytes]
+) -> None:
+    """Draw the slide through python-pptx, which is compiled once."""
+    common.add_title(slide, texts[0])
+    for image, box in zip(images, boxes):
+        common.add_picture(slide, image, *box)
+    for text, (left, top, font_name) in zip(texts[1:], _TEXT_BOXES):
+        common.add_text(slide, text, left, top, font_name=font_name)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -17,6 +83,7 @@ class Presentation(abstract.AbstractPresentation):
     Exapmles
     --------
     Create a Presentaion object.
+    >>> import plotly.graph_objects as go
     >>> prs = Presentation(
     ...     title="Title",
     ...     excitation_wavelength=400,
@@ -48,57 +115,406 @@ class Presentation(abstract.AbstractPresentation):
     FWHM: float
     frame: int
     date: datetime.date
-    h_fig: go.Figure
-    v_fig: go.Figure
+    h_fig: common.FigureOrSpec
+    v_fig: common.FigureOrSpec
     a: int
     b: int
     tau1: float
     tau2: float
+    # The texts formatted in advance by `from_frame`.
+    _formatted: tuple[str, ...] | None = dataclasses.field(
+        default=None,
+        init=False,
+        repr=False,
+        compare=False
+    )
+
+    @classmethod
+    def from_frame(cls, frame: "pd.DataFrame") -> list["Presentation"]:
+        """Create Presentation objects from the rows of a DataFrame
+
+        The columns are validated and converted as a whole, and the texts
+        of the slides are formatted column-wise.
+
+        Parameters
+        ----------
+        frame : pandas.DataFrame
+            A DataFrame with one row per experiment and a column for each
+            field. Integer fields are truncated like `int`, and dates may be
+            given as strings.
+
+        Returns
+        -------
+        list of tlab_pptx.photo_luminescence.Presentation
+            The presentations in the order of the rows, which can be
+            combined by `tlab_pptx.deck.Deck`.
+
+        Raises
+        ------
+        ValueError
+            If some columns are missing.
+        tlab_pptx.frames.InvalidRowsError
+            If some rows are invalid. All invalid rows are reported.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> import plotly.graph_objects as go
+        >>> frame = pd.DataFrame(dict(
+        ...     title=["Sample 1", "Sample 2"],
+        ...     excitation_wavelength=[400, 400.0],
+        ...     excitation_power=[1, 2],
+        ...     time_range=[10, 10],
+        ...     center_wavelength=[480, 500],
+        ...     FWHM=[50, 48.5],
+        ...     frame=[10000, 10000],
+        ...     date=["2022-01-01", "2022-01-02"],
+        ...     h_fig=[go.Figure()] * 2,
+        ...     v_fig=[go.Figure()] * 2,
+        ...     a=[63, 70],
+        ...     b=[37, 30],
+        ...     tau1=[1.2, 0.8],
+        ...     tau2=[3.6, 4.1]
+        ... ))
+        >>> presentations = Presentation.from_frame(frame)
+        >>> presentations[1].date, presentations[1].excitation_wavelength
+        (datetime.date(2022, 1, 2), 400)
+        >>> frame["tau1"] = [1.2, "n/a"]
+        >>> Presentation.from_frame(frame)
+        Traceback (most recent call last):
+            ...
+        tlab_pptx.frames.InvalidRowsError: 1 invalid rows
+          row 1: invalid tau1: 'n/a'
+        """
+        from tlab_pptx import frames
+        coerced = frames.coerce(frame, _get_frame_columns())
+        presentations = []
+        for fields, texts in zip(
+            coerced.to_dict("records"),
+            _format_texts(coerced)
+        ):
+            presentation = cls(**fields)
+            object.__setattr__(presentation, "_formatted", texts)
+            presentations.append(presentation)
+        return presentations
+
+    def build(
+        self,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.presentation.Presentation:
+        """Build a Presentation object
+
+        Parameters
+        ----------
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures, e.g. "draft", "screen" or
+            "print".
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with.
+        compiled : bool
+            If true, the slide is filled from its compiled slide XML, see
+            `add_slide`.
+
+        Returns
+        -------
+        pptx.presentaion.Presentation
+            A Presentation object of python-pptx
+        """
+        with instrumentation.span("build"):
+            with instrumentation.span("template"):
+                prs = templates.open_template()
+            assert isinstance(prs, pptx.presentation.Presentation)
+            self.add_slide(
+                prs,
+                cache=cache,
+                profile=profiles.get_profile(profile),
+                session=session,
+                compiled=compiled
+            )
+        return prs
+
+    def figures(self) -> list[common.PlacedFigure]:
+        """Get the figures of the slide
 
-    def build(self) -> pptx.presentation.Presentation:
-        prs = pptx.Presentation()
-        assert isinstance(prs, pptx.presentation.Presentation)
-        slide = prs.slides.add_slide(prs.slide_layouts[5])
-        assert isinstance(slide, pptx.slide.Slide)
-        common.add_title(slide, self.title)
+        Returns
+        -------
+        list of tlab_pptx.common.PlacedFigure
+            `h_fig` and `v_fig` annotated with the date.
+        """
         date_annotation = common.get_date_annotation(self.date)
-        self.h_fig.add_annotation(date_annotation)
-        common.add_figure(slide, self.h_fig, 0.33, 5.0)
-        self.v_fig.add_annotation(date_annotation)
-        common.add_figure(slide, self.v_fig, 12.33, 5.0)
-        common.add_text(
-            slide,
+        return [
+            common.PlacedFigure(
+                self.h_fig, 0.33, 5.0, annotations=(date_annotation,)
+            ),
+            common.PlacedFigure(
+                self.v_fig, 12.33, 5.0, annotations=(date_annotation,)
+            )
+        ]
+
+    def get_spec_key(self, profile: profiles.RenderProfile) -> str:
+        """Get the key identifying the content of the slide
+
+        Parameters
+        ----------
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+
+        Returns
+        -------
+        str
+            A hex digest of the texts, the figures and the profile.
+        """
+        return incremental.make_spec_key(
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            self._texts(),
+            self.figures(),
+            profile
+        )
+
+    def get_spec_fields(self) -> dict[str, t.Any]:
+        """Get the fields of the spec to be embedded in a `pptx` file
+
+        Returns
+        -------
+        dict
+            The fields other than the figures.
+
+        Examples
+        --------
+        >>> prs = Presentation(
+        ...     title="Title",
+        ...     excitation_wavelength=400,
+        ...     excitation_power=1,
+        ...     time_range=10,
+        ...     center_wavelength=480,
+        ...     FWHM=50,
+        ...     frame=10000,
+        ...     date=datetime.date(2022, 1, 1),
+        ...     h_fig=dict(data=[]),
+        ...     v_fig=dict(data=[]),
+        ...     a=63,
+        ...     b=37,
+        ...     tau1=1.2,
+        ...     tau2=3.6
+        ... )
+        >>> prs.get_spec_fields()["tau1"]
+        1.2
+        """
+        return {
+            field.name: getattr(self, field.name)
+            for field in dataclasses.fields(self)
+            if field.init and field.name not in ("h_fig", "v_fig")
+        }
+
+    def add_slide(
+        self,
+        prs: pptx.presentation.Presentation,
+        cache: caching.RenderCache | None = None,
+        images: t.Sequence[bytes | None] | None = None,
+        profile: profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False
+    ) -> pptx.slide.Slide:
+        """Append a slide to a Presentation object
+
+        Parameters
+        ----------
+        prs : pptx.presentation.Presentation
+            A Presentation object of python-pptx to be updated.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        images : sequence of bytes or None, optional
+            The images already rendered from `figures()`. The figures whose
+            images are omitted or None are added here.
+        profile : tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with.
+        compiled : bool
+            If true, the slide is filled from the slide XML compiled once
+            by `tlab_pptx.compiled` instead of drawing every shape, unless
+            a figure is added as a native chart.
+
+        Returns
+        -------
+        pptx.slide.Slide
+            The added slide.
+        """
+        figures = self.figures()
+        if images is None:
+            images = [None] * len(figures)
+        charts = [
+            None if image is not None else common.get_chart(
+                figure.fig,
+                profile,
+                figure.width,
+                figure.height
+            )
+            for figure, image in zip(figures, images)
+        ]
+        fast = compiled and all(chart is None for chart in charts)
+        with instrumentation.span(
+            "slide",
+            slide=len(prs.slides),
+            title=self.title
+        ):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            assert isinstance(slide, pptx.slide.Slide)
+            texts = self._texts()
+            if not fast:
+                common.add_title(slide, texts[0])
+            rendered = []
+            for i, (figure, image, chart) in enumerate(
+                zip(figures, images, charts)
+            ):
+                with instrumentation.span("figure", figure=i):
+                    if chart is not None:
+                        common.add_figure(
+                            slide,
+                            chart,
+                            figure.left,
+                            figure.top,
+                            figure.width,
+                            figure.height,
+                            cache=cache,
+                            profile=profile,
+                            annotations=figure.annotations,
+                            session=session
+                        )
+                        continue
+                    if image is None:
+                        image = common.render_figure(
+                            common.get_styled_figure(
+                                figure.fig,
+                                figure.annotations
+                            ),
+                            profile,
+                            figure.width,
+                            figure.height,
+                            cache=cache,
+                            session=session
+                        )
+                    if fast:
+                        rendered.append(image)
+                    else:
+                        common.add_picture(
+                            slide,
+                            image,
+                            figure.left,
+                            figure.top,
+                            figure.width,
+                            figure.height
+                        )
+            if fast:
+                boxes = tuple(
+                    (figure.left, figure.top, figure.width, figure.height)
+                    for figure in figures
+                )
+                with instrumentation.span("fill"):
+                    compilation.get_compiled(
+                        (type(self), boxes),
+                        slide,
+                        functools.partial(_draw, boxes),
+                        len(texts),
+                        len(rendered)
+                    ).fill(slide, texts, rendered)
+            else:
+                for text, (left, top, font_name) in zip(
+                    texts[1:],
+                    _TEXT_BOXES
+                ):
+                    common.add_text(
+                        slide,
+                        text,
+                        left,
+                        top,
+                        font_name=font_name
+                    )
+        return slide
+
+    def _texts(self) -> list[str]:
+        if self._formatted is not None:
+            return list(self._formatted)
+        return [
+            self.title,
             f"Excitation wavelength : {int(self.excitation_wavelength):d} nm\n"
             f"Excitation power : {int(self.excitation_power):d} mW\n"
             f"Time range : {int(self.time_range):d} ns\n",
-            2.33,
-            2.5
-        )
-        common.add_text(
-            slide,
             f"Center wavelength : {int(self.center_wavelength):d} nm\n"
             f"FWHM : {self.FWHM:.2g} nm\n"
             f"Frame : {int(self.frame):d}\n",
-            14.33,
-            2.5
-        )
-        common.add_text(
-            slide,
             f"a : b = {int(self.a):d} : {int(self.b):d}",
-            14.33,
-            17.0,
-            font_name="Cambria Math",
-        )
-        common.add_text(
-            slide,
             f"τ₁ = {self.tau1:.2g} ns\n"
             f"τ₂ = {self.tau2:.2g} ns\n",
-            19.33,
-            17.0,
-            font_name="Cambria Math",
+        ]
+
+    def save(
+        self,
+        filepath_or_buffer: common.FilePathOrBuffer,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        compiled: bool = False,
+        embed_spec: bool = False
+    ) -> None:
+        """Save as a `pptx` file.
+
+        Parameters
+        ----------
+        filepath_or_buffer : tlab_pptx.typing.FilePathOrBuffer
+            A filepath string or buffer object.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures, e.g. "draft", "screen" or
+            "print".
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with.
+        compiled : bool
+            If true, the slide is filled from its compiled slide XML, see
+            `add_slide`.
+        embed_spec : bool
+            If true, the fields of `get_spec_fields` are embedded in the
+            file by `tlab_pptx.metadata.embed`, so that it can be indexed
+            by `tlab_pptx.index.Index`.
+        """
+        prs = self.build(
+            cache=cache,
+            profile=profile,
+            session=session,
+            compiled=compiled
         )
-        return prs
+        if embed_spec:
+            metadata.embed(prs, metadata.make_records([self], len(prs.slides)))
+        common.save_presentation(prs, filepath_or_buffer)
+
+
+def _format_texts(frame: "pd.DataFrame") -> list[tuple[str, ...]]:
+    """Format the texts of `Presentation._texts` column-wise."""
+    import pandas as pd
+    frame = frame.reset_index(drop=True)
+
+    def d(name: str) -> pd.Series:
+        return frame[name].astype(str)
+
+    def g(name: str) -> pd.Series:
+        return pd.Series(np.char.mod("%.2g", frame[name].to_numpy(float)))
 
-    def save(self, filepath_or_buffer: common.FilePathOrBuffer) -> None:
-        prs = self.build()
-        prs.save(filepath_or_buffer)
+    columns = [
+        frame["title"],
+        "Excitation wavelength : " + d("excitation_wavelength") + " nm\n"
+        + "Excitation power : " + d("excitation_power") + " mW\n"
+        + "Time range : " + d("time_range") + " ns\n",
+        "Center wavelength : " + d("center_wavelength") + " nm\n"
+        + "FWHM : " + g("FWHM") + " nm\n"
+        + "Frame : " + d("frame") + "\n",
+        "a : b = " + d("a") + " : " + d("b"),
+        "τ₁ = " + g("tau1") + " ns\n"
+        + "τ₂ = " + g("tau2") + " ns\n",
+    ]
+    return list(zip(*(column.tolist() for column in columns)))
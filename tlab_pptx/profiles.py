@@ -0,0 +1,203 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import io
+import math
+import dataclasses
+
+import PIL.Image
+
+
+CM_PER_INCH = 2.54
+
+
+@dataclasses.dataclass(frozen=True)
+class RenderProfile:
+    """Profile deciding the resolution and encoding of rendered figures.
+
+    Attributes
+    ----------
+        name : str
+            The name of the profile.
+        dpi : float, optional
+            The resolution of the image on the slide in dots per inch.
+        scale : float, optional
+            A fixed scale factor relative to the figure layout. It takes
+            precedence over `dpi`.
+        format : str
+            The image format, "png" or "jpeg".
+        quality : int, optional
+            The JPEG quality from 1 to 95 used to encode the image.
+        compress_level : int, optional
+            The zlib level from 0 to 9 used to encode a PNG image.
+        backend : str
+            "image" to rasterize figures with kaleido, or "chart" to add
+            them as native PowerPoint charts. Figures that cannot be
+            converted into charts are rasterized with this profile.
+        points_per_pixel : float, optional
+            The number of points per horizontal pixel line traces are
+            decimated to before rendering. If omitted, all points are kept.
+
+    Examples
+    --------
+    >>> profile = RenderProfile("screen", dpi=254)
+    >>> profile.get_scale(12.0, 12.0)
+    2.4
+    """
+    name: str
+    dpi: float | None = None
+    scale: float | None = None
+    format: str = "png"
+    quality: int | None = None
+    compress_level: int | None = None
+    backend: str = "image"
+    points_per_pixel: float | None = None
+
+    def __post_init__(self) -> None:
+        if self.dpi is None and self.scale is None:
+            raise ValueError("Either dpi or scale must be given")
+        if self.format not in ("png", "jpeg"):
+            raise ValueError(f"Unsupported image format: {self.format!r}")
+        if self.backend not in ("image", "chart"):
+            raise ValueError(f"Unsupported backend: {self.backend!r}")
+        if self.points_per_pixel is not None and self.points_per_pixel <= 0:
+            raise ValueError("points_per_pixel must be positive")
+
+    def get_scale(
+        self,
+        width: float,
+        height: float,
+        layout_width: int = 500,
+        layout_height: int = 500
+    ) -> float:
+        """Compute the scale factor passed to kaleido.
+
+        Parameters
+        ----------
+            width : float
+                The width of the figure on the slide in centimeter.
+            height : float
+                The height of the figure on the slide in centimeter.
+            layout_width : int
+                The width of the figure layout in pixel.
+            layout_height : int
+                The height of the figure layout in pixel.
+
+        Returns
+        -------
+        float
+            The scale factor giving at least `dpi` in both directions.
+        """
+        if self.scale is not None:
+            return self.scale
+        assert self.dpi is not None
+        return round(max(
+            width / CM_PER_INCH * self.dpi / layout_width,
+            height / CM_PER_INCH * self.dpi / layout_height
+        ), 6)
+
+    def get_max_points(
+        self,
+        width: float,
+        height: float,
+        layout_width: int = 500,
+        layout_height: int = 500
+    ) -> int | None:
+        """Compute the number of points line traces are decimated to.
+
+        Parameters
+        ----------
+            width : float
+                The width of the figure on the slide in centimeter.
+            height : float
+                The height of the figure on the slide in centimeter.
+            layout_width : int
+                The width of the figure layout in pixel.
+            layout_height : int
+                The height of the figure layout in pixel.
+
+        Returns
+        -------
+        int or None
+            The maximum number of points per trace, or None if traces are
+            not decimated.
+        """
+        if self.points_per_pixel is None:
+            return None
+        scale = self.get_scale(width, height, layout_width, layout_height)
+        return math.ceil(self.points_per_pixel * layout_width * scale)
+
+    @property
+    def render_format(self) -> str:
+        """The format requested from kaleido before `encode`."""
+        if self.format == "jpeg" and self.quality is not None:
+            return "png"
+        return self.format
+
+    def encode(self, image: bytes) -> bytes:
+        """Encode an image rendered in `render_format`.
+
+        Parameters
+        ----------
+            image : bytes
+                An image rendered by kaleido.
+
+        Returns
+        -------
+        bytes
+            The image in `format` with the compression of the profile.
+        """
+        if self.format == "jpeg" and self.quality is not None:
+            options = dict(quality=self.quality)
+        elif self.format == "png" and self.compress_level is not None:
+            options = dict(compress_level=self.compress_level)
+        else:
+            return image
+        with PIL.Image.open(io.BytesIO(image)) as src, io.BytesIO() as dst:
+            src.convert("RGB").save(dst, self.format, **options)
+            return dst.getvalue()
+
+
+ORIGINAL = RenderProfile("original", scale=10)
+DRAFT = RenderProfile(
+    "draft",
+    dpi=96,
+    format="jpeg",
+    quality=80,
+    points_per_pixel=4
+)
+SCREEN = RenderProfile("screen", dpi=200, points_per_pixel=4)
+PRINT = RenderProfile("print", dpi=300, compress_level=9)
+NATIVE = RenderProfile("native", dpi=200, backend="chart", points_per_pixel=4)
+
+PROFILES = {
+    profile.name: profile
+    for profile in (ORIGINAL, DRAFT, SCREEN, PRINT, NATIVE)
+}
+
+
+def get_profile(profile: str | RenderProfile) -> RenderProfile:
+    """Get a render profile by name.
+
+    Parameters
+    ----------
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The name of a predefined profile, or a profile itself.
+
+    Returns
+    -------
+    tlab_pptx.profiles.RenderProfile
+        The render profile.
+
+    Examples
+    --------
+    >>> get_profile("print").dpi
+    300
+    """
+    if isinstance(profile, RenderProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown render profile: {profile!r}. "
+            f"Choose from {sorted(PROFILES)}"
+        ) from None
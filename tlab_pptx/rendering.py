@@ -0,0 +1,275 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import types
+import asyncio
+import contextlib
+import multiprocessing
+import concurrent.futures
+import typing as t
+
+from tlab_pptx import caching, common, profiles, sessions
+
+
+_session: sessions.RendererSession | None = None
+
+
+def _warm_up() -> None:
+    """Start kaleido in a worker process before the first job arrives."""
+    global _session
+    _session = sessions.RendererSession()
+
+
+def _render(
+    fig_dict: dict[str, t.Any],
+    profile: profiles.RenderProfile,
+    scale: float
+) -> bytes:
+    assert _session is not None
+    image = _session.render(fig_dict, profile.render_format, scale)
+    return profile.encode(image)
+
+
+class RenderPool:
+    """Pool of persistent kaleido workers rendering figures in parallel.
+
+    Each worker process starts its own `tlab_pptx.sessions.RendererSession`
+    once and keeps it for the lifetime of the pool. Workers are spawned
+    rather than forked so that they never share the kaleido subprocess of
+    the parent.
+
+    With a single worker the figures are rendered in the calling process
+    exactly like `tlab_pptx.common.render_figure`.
+
+    Parameters
+    ----------
+        workers : int, optional
+            The number of worker processes. Defaults to the number of CPUs.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache to look up the images in before submitting them.
+
+    Examples
+    --------
+    >>> import plotly.graph_objects as go
+    >>> with RenderPool(workers=1) as pool:
+    ...     future = pool.submit(common.PlacedFigure(go.Figure(), 0.0, 0.0))
+    ...     future.result()[:4]
+    b'\\x89PNG'
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        cache: caching.RenderCache | None = None
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        if self.workers > 1:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up
+            )
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None
+    ) -> None:
+        self.shutdown()
+
+    def submit(
+        self,
+        figure: common.PlacedFigure,
+        profile: profiles.RenderProfile = profiles.ORIGINAL
+    ) -> "concurrent.futures.Future[bytes]":
+        """Style a figure and schedule it to be rendered.
+
+        Parameters
+        ----------
+            figure : tlab_pptx.common.PlacedFigure
+                A figure to be rendered.
+            profile : tlab_pptx.profiles.RenderProfile
+                The profile deciding the resolution and encoding of the image.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            A future of the rendered image.
+        """
+        fig = common.get_styled_figure(figure.fig, figure.annotations)
+        future: concurrent.futures.Future[bytes]
+        if self._executor is None:
+            future = concurrent.futures.Future()
+            future.set_result(common.render_figure(
+                fig,
+                profile,
+                figure.width,
+                figure.height,
+                cache=self.cache
+            ))
+            return future
+        scale = profile.get_scale(figure.width, figure.height)
+        source = common.decimate_figure(
+            fig,
+            profile,
+            figure.width,
+            figure.height
+        )
+        cache = self.cache
+        if cache is None:
+            return self._executor.submit(_render, source, profile, scale)
+        key = common.get_cache_key(source, profile, scale)
+        cached = cache.get(key)
+        if cached is not None:
+            future = concurrent.futures.Future()
+            future.set_result(cached)
+            return future
+        future = self._executor.submit(_render, source, profile, scale)
+
+        def put(future: concurrent.futures.Future[bytes]) -> None:
+            if not future.cancelled() and future.exception() is None:
+                cache.put(key, future.result())
+
+        future.add_done_callback(put)
+        return future
+
+    def shutdown(self, cancel_futures: bool = False) -> None:
+        """Stop the worker processes.
+
+        Parameters
+        ----------
+            cancel_futures : bool
+                If true, pending renders are cancelled instead of awaited.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=cancel_futures)
+            self._executor = None
+
+
+def _submit(
+    pool: RenderPool,
+    figure: common.PlacedFigure,
+    profile: profiles.RenderProfile
+) -> "concurrent.futures.Future[bytes] | None":
+    if common.is_chart(figure.fig, profile, figure.width, figure.height):
+        return None
+    return pool.submit(figure, profile)
+
+
+async def _render_async(
+    pool: RenderPool,
+    figure: common.PlacedFigure,
+    profile: profiles.RenderProfile,
+    semaphore: asyncio.Semaphore | None
+) -> bytes | None:
+    async with semaphore or contextlib.nullcontext():
+        # The submission is not interrupted so that a render scheduled
+        # after cancellation is cancelled as well.
+        submission = asyncio.ensure_future(
+            asyncio.to_thread(_submit, pool, figure, profile)
+        )
+        try:
+            future = await asyncio.shield(submission)
+        except asyncio.CancelledError:
+            future = await submission
+            if future is not None:
+                future.cancel()
+            raise
+        if future is None:
+            return None
+        return await asyncio.wrap_future(future)
+
+
+async def render_async(
+    figures: t.Iterable[common.PlacedFigure],
+    pool: RenderPool,
+    profile: profiles.RenderProfile = profiles.ORIGINAL,
+    semaphore: asyncio.Semaphore | None = None
+) -> list[bytes | None]:
+    """Render figures concurrently without blocking the event loop.
+
+    Each figure is styled and submitted in a thread and awaited as a future
+    of the pool. Cancelling the call cancels the renders not started yet,
+    and a failed render cancels the others.
+
+    Parameters
+    ----------
+        figures : iterable of tlab_pptx.common.PlacedFigure
+            The figures to be rendered.
+        pool : tlab_pptx.rendering.RenderPool
+            The pool rendering the figures.
+        profile : tlab_pptx.profiles.RenderProfile
+            The profile deciding the resolution and encoding of the images.
+        semaphore : asyncio.Semaphore, optional
+            A semaphore bounding the number of figures rendered at once. It
+            can be shared by many calls.
+
+    Returns
+    -------
+    list of bytes or None
+        The rendered images in the order of `figures`. Figures added as
+        native charts are not rendered and give None.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import plotly.graph_objects as go
+    >>> with RenderPool(workers=1) as pool:
+    ...     images = asyncio.run(render_async(
+    ...         [common.PlacedFigure(go.Figure(), 0.0, 0.0)],
+    ...         pool,
+    ...         profiles.DRAFT
+    ...     ))
+    >>> images[0][:2]
+    b'\\xff\\xd8'
+    """
+    tasks = [
+        asyncio.ensure_future(_render_async(pool, figure, profile, semaphore))
+        for figure in figures
+    ]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+@contextlib.asynccontextmanager
+async def open_pool(
+    pool: RenderPool | None = None,
+    workers: int = 1,
+    cache: caching.RenderCache | None = None
+) -> t.AsyncIterator[RenderPool]:
+    """Use a render pool in an async with block.
+
+    Parameters
+    ----------
+        pool : tlab_pptx.rendering.RenderPool, optional
+            A pool shared by many builds. It is used as is and not shut
+            down.
+        workers : int
+            The number of worker processes of a new pool.
+        cache : tlab_pptx.caching.RenderCache, optional
+            The cache of a new pool.
+
+    Returns
+    -------
+    tlab_pptx.rendering.RenderPool
+        `pool`, or a new pool shut down without blocking the event loop
+        when the block exits.
+    """
+    if pool is not None:
+        yield pool
+        return
+    pool = RenderPool(workers, cache=cache)
+    try:
+        yield pool
+    finally:
+        await asyncio.to_thread(pool.shutdown, True)
@@ -0,0 +1,216 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import time
+import types
+import threading
+import dataclasses
+import typing as t
+
+import plotly.io as pio
+import plotly.graph_objects as go
+from kaleido.scopes.plotly import PlotlyScope
+
+
+# If set, a default session is prewarmed when `tlab_pptx` is imported.
+PREWARM_ENV = "TLAB_PPTX_PREWARM"
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionStats:
+    """Latency statistics of a renderer session.
+
+    Attributes
+    ----------
+        cold_start : float or None
+            The seconds taken by the last start of kaleido including the
+            first render, or None if it has not been started.
+        renders : int
+            The number of figures rendered.
+        render_time : float
+            The total seconds spent rendering figures.
+        restarts : int
+            The number of times kaleido was restarted after it died.
+    """
+    cold_start: float | None
+    renders: int
+    render_time: float
+    restarts: int
+
+    @property
+    def warm_render(self) -> float | None:
+        """The mean seconds per render with kaleido running."""
+        return self.render_time / self.renders if self.renders else None
+
+
+class RendererSession:
+    """Managed kaleido renderer shared by builds.
+
+    Each session owns a kaleido scope, and so a kaleido subprocess, of its
+    own, configured like the scope used by `plotly.io.to_image`. It pays
+    the Chromium startup once, restarts kaleido if its subprocess dies and
+    shuts it down when closed, without affecting other sessions.
+
+    Parameters
+    ----------
+        start : bool
+            If true, kaleido is started in the constructor.
+        retries : int
+            The number of times a render is retried after kaleido died.
+
+    Examples
+    --------
+    >>> with RendererSession() as session:
+    ...     image = session.render(go.Figure(), "png", 1)
+    ...     session.stats().renders
+    1
+    """
+
+    def __init__(self, start: bool = True, retries: int = 1) -> None:
+        self.retries = retries
+        self._scope = PlotlyScope(
+            plotlyjs=pio.kaleido.scope.plotlyjs,
+            mathjax=pio.kaleido.scope.mathjax
+        )
+        self._lock = threading.Lock()
+        self._cold_start: float | None = None
+        self._renders = 0
+        self._render_time = 0.0
+        self._restarts = 0
+        self._started = False
+        if start:
+            self.start()
+
+    def __enter__(self) -> "RendererSession":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: types.TracebackType | None
+    ) -> None:
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        """True if the kaleido subprocess is running."""
+        proc = self._scope._proc
+        return proc is not None and proc.poll() is None
+
+    def start(self) -> float:
+        """Start kaleido and render an empty figure if it is not running.
+
+        Returns
+        -------
+        float
+            The seconds taken to start, or 0.0 if it was already running.
+        """
+        with self._lock:
+            if self.alive:
+                return 0.0
+            if self._started:
+                self._restarts += 1
+            start = time.perf_counter()
+            self._scope.transform(go.Figure(), format="png", scale=1)
+            self._cold_start = time.perf_counter() - start
+            self._started = True
+            return self._cold_start
+
+    def render(
+        self,
+        fig: go.Figure | dict[str, t.Any],
+        format: str = "png",
+        scale: float = 1
+    ) -> bytes:
+        """Render a figure into an image.
+
+        Parameters
+        ----------
+            fig : plotly.graph_objects.Figure or dict
+                A figure to be rendered. A dict is passed to kaleido
+                without validation.
+            format : str
+                The image format passed to kaleido.
+            scale : float
+                The scale factor of the image relative to the figure layout.
+
+        Returns
+        -------
+        bytes
+            The rendered image.
+        """
+        for attempt in range(self.retries + 1):
+            if not self.alive:
+                self.start()
+            start = time.perf_counter()
+            try:
+                image: bytes = self._scope.transform(
+                    fig, format=format, scale=scale
+                )
+            except ValueError:
+                if self.alive or attempt == self.retries:
+                    raise
+                continue
+            self._render_time += time.perf_counter() - start
+            self._renders += 1
+            return image
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def close(self) -> None:
+        """Shut down the kaleido subprocess."""
+        with self._lock:
+            self._scope._shutdown_kaleido()
+            self._started = False
+
+    def stats(self) -> SessionStats:
+        """Get the latency statistics of the session.
+
+        Returns
+        -------
+        tlab_pptx.sessions.SessionStats
+            The cold start and warm render latencies.
+        """
+        return SessionStats(
+            cold_start=self._cold_start,
+            renders=self._renders,
+            render_time=self._render_time,
+            restarts=self._restarts
+        )
+
+
+def prewarm() -> RendererSession:
+    """Create a session starting kaleido in a background thread.
+
+    Renders issued before the startup finishes wait for it instead of
+    starting another subprocess.
+
+    Returns
+    -------
+    tlab_pptx.sessions.RendererSession
+        The session being started.
+    """
+    session = RendererSession(start=False)
+    threading.Thread(
+        target=session.start,
+        name="tlab-pptx-prewarm",
+        daemon=True
+    ).start()
+    return session
+
+
+def get_default() -> RendererSession | None:
+    """Get the session prewarmed on import.
+
+    Figures rendered without a session of their own are rendered by this
+    session if it exists.
+
+    Returns
+    -------
+    tlab_pptx.sessions.RendererSession or None
+        The session started in the background when the package was imported
+        with `PREWARM_ENV` set, otherwise None.
+    """
+    return _default
+
+
+_default = prewarm() if os.environ.get(PREWARM_ENV) else None
@@ -0,0 +1,276 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Compact binary serialization of photo luminescence presentations.
+
+A spec holds the numeric fields in a fixed struct and each figure as a small
+JSON skeleton whose numeric arrays are replaced by references to raw binary
+arrays, so the traces are neither formatted as JSON floats nor parsed back.
+"""
+import io
+import json
+import struct
+import datetime
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+import plotly.utils
+
+from tlab_pptx import common, photo_luminescence as pl
+
+
+MAGIC = b"TLPS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBI")
+# excitation_wavelength, excitation_power, time_range, center_wavelength,
+# FWHM, frame, date as an ordinal, a, b, tau1 and tau2.
+_FIELDS = struct.Struct("<4qdqi2q2d")
+_LENGTH = struct.Struct("<I")
+_ARRAY = struct.Struct("<BB")
+_DIMENSION = struct.Struct("<Q")
+# The key of an object standing for a binary array in a figure skeleton.
+_ARRAY_KEY = "$array"
+
+
+def dumps(presentations: t.Iterable[pl.Presentation]) -> bytes:
+    """Serialize presentations to bytes.
+
+    Parameters
+    ----------
+        presentations : iterable of tlab_pptx.photo_luminescence.Presentation
+            The presentations to serialize.
+
+    Returns
+    -------
+    bytes
+        The specs of the presentations.
+
+    Raises
+    ------
+    ValueError
+        If a field cannot be converted to the type of its field.
+
+    Examples
+    --------
+    >>> prs = pl.Presentation(
+    ...     title="Title",
+    ...     excitation_wavelength=400,
+    ...     excitation_power=1,
+    ...     time_range=10,
+    ...     center_wavelength=480,
+    ...     FWHM=50,
+    ...     frame=10000,
+    ...     date=datetime.date(2022, 1, 1),
+    ...     h_fig=dict(data=[dict(type="scatter", y=np.linspace(0, 1, 1000))]),
+    ...     v_fig=dict(data=[]),
+    ...     a=63,
+    ...     b=37,
+    ...     tau1=1.2,
+    ...     tau2=3.6
+    ... )
+    >>> data = dumps([prs])
+    >>> len(data)
+    8188
+    >>> [loaded] = loads(data)
+    >>> loaded.title, loaded.date, loaded.h_fig["data"][0]["y"].dtype
+    ('Title', datetime.date(2022, 1, 1), dtype('float64'))
+    """
+    presentations = list(presentations)
+    with io.BytesIO() as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(presentations)))
+        for presentation in presentations:
+            _write_spec(f, presentation)
+        return f.getvalue()
+
+
+def loads(data: bytes) -> list[pl.Presentation]:
+    """Deserialize presentations from bytes.
+
+    The figures are loaded as figure dicts sharing their arrays with
+    `data`.
+
+    Parameters
+    ----------
+        data : bytes
+            The specs serialized by `dumps`.
+
+    Returns
+    -------
+    list of tlab_pptx.photo_luminescence.Presentation
+        The presentations in the order they were serialized.
+
+    Raises
+    ------
+    ValueError
+        If `data` is not a spec of a supported version.
+    """
+    reader = _Reader(memoryview(data))
+    try:
+        magic, version, count = reader.unpack(_HEADER)
+    except ValueError:
+        raise ValueError("Not a presentation spec") from None
+    if magic != MAGIC:
+        raise ValueError("Not a presentation spec")
+    if version != VERSION:
+        raise ValueError(f"Unsupported spec version: {version}")
+    try:
+        presentations = [_read_spec(reader) for _ in range(count)]
+    except (struct.error, TypeError, IndexError, KeyError) as e:
+        raise ValueError(f"Invalid spec: {type(e).__name__}: {e}") from None
+    if reader.offset != len(data):
+        raise ValueError("Trailing data after the specs")
+    return presentations
+
+
+def _write_spec(f: t.BinaryIO, presentation: pl.Presentation) -> None:
+    # The fields are converted like the texts of the slide, so numbers of
+    # other types, e.g. from numpy or pandas, are accepted.
+    try:
+        fields = _FIELDS.pack(
+            int(presentation.excitation_wavelength),
+            int(presentation.excitation_power),
+            int(presentation.time_range),
+            int(presentation.center_wavelength),
+            float(presentation.FWHM),
+            int(presentation.frame),
+            presentation.date.toordinal(),
+            int(presentation.a),
+            int(presentation.b),
+            float(presentation.tau1),
+            float(presentation.tau2)
+        )
+    except (struct.error, TypeError, OverflowError) as e:
+        raise ValueError(
+            f"Invalid fields of {presentation.title!r}: {e}"
+        ) from None
+    _write_bytes(f, str(presentation.title).encode())
+    f.write(fields)
+    for fig in (presentation.h_fig, presentation.v_fig):
+        _write_figure(f, fig)
+
+
+def _read_spec(reader: "_Reader") -> pl.Presentation:
+    title = bytes(reader.read_bytes()).decode()
+    (
+        excitation_wavelength,
+        excitation_power,
+        time_range,
+        center_wavelength,
+        FWHM,
+        frame,
+        date,
+        a,
+        b,
+        tau1,
+        tau2
+    ) = reader.unpack(_FIELDS)
+    h_fig = _read_figure(reader)
+    v_fig = _read_figure(reader)
+    return pl.Presentation(
+        title=title,
+        excitation_wavelength=excitation_wavelength,
+        excitation_power=excitation_power,
+        time_range=time_range,
+        center_wavelength=center_wavelength,
+        FWHM=FWHM,
+        frame=frame,
+        date=datetime.date.fromordinal(date),
+        h_fig=h_fig,
+        v_fig=v_fig,
+        a=a,
+        b=b,
+        tau1=tau1,
+        tau2=tau2
+    )
+
+
+def _write_figure(f: t.BinaryIO, fig: common.FigureOrSpec) -> None:
+    arrays: list[npt.NDArray[t.Any]] = []
+    skeleton = _extract_arrays(common.get_figure_dict(fig), arrays)
+    _write_bytes(f, json.dumps(
+        skeleton,
+        cls=plotly.utils.PlotlyJSONEncoder,
+        separators=(",", ":")
+    ).encode())
+    f.write(_LENGTH.pack(len(arrays)))
+    for array in arrays:
+        dtype = array.dtype.str.encode()
+        f.write(_ARRAY.pack(len(dtype), array.ndim))
+        f.write(dtype)
+        for size in array.shape:
+            f.write(_DIMENSION.pack(size))
+        f.write(np.ascontiguousarray(array).data)
+
+
+def _read_figure(reader: "_Reader") -> dict[str, t.Any]:
+    skeleton = reader.read_bytes()
+    (count,) = reader.unpack(_LENGTH)
+    arrays = []
+    for _ in range(count):
+        dtype_size, ndim = reader.unpack(_ARRAY)
+        dtype = np.dtype(bytes(reader.read(dtype_size)).decode())
+        shape = tuple(reader.unpack(_DIMENSION)[0] for _ in range(ndim))
+        size = int(np.prod(shape, dtype=np.int64))
+        arrays.append(np.frombuffer(
+            reader.read(size * dtype.itemsize),
+            dtype=dtype
+        ).reshape(shape))
+
+    def restore(obj: dict[str, t.Any]) -> t.Any:
+        if len(obj) == 1 and _ARRAY_KEY in obj:
+            return arrays[obj[_ARRAY_KEY]]
+        return obj
+
+    fig: dict[str, t.Any] = json.loads(bytes(skeleton), object_hook=restore)
+    return fig
+
+
+def _extract_arrays(obj: t.Any, arrays: list[npt.NDArray[t.Any]]) -> t.Any:
+    """Replace the numeric arrays of a figure dict with references."""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "biuf" and obj.size:
+            arrays.append(obj)
+            return {_ARRAY_KEY: len(arrays) - 1}
+        return obj
+    if isinstance(obj, dict):
+        return {
+            key: _extract_arrays(value, arrays) for key, value in obj.items()
+        }
+    if isinstance(obj, (list, tuple)) and obj:
+        if not any(isinstance(value, bool) for value in obj):
+            try:
+                array = np.asarray(obj)
+            except (ValueError, OverflowError):
+                pass
+            else:
+                if array.dtype.kind in "iuf":
+                    arrays.append(array)
+                    return {_ARRAY_KEY: len(arrays) - 1}
+        return [_extract_arrays(value, arrays) for value in obj]
+    return obj
+
+
+def _write_bytes(f: t.BinaryIO, data: bytes) -> None:
+    f.write(_LENGTH.pack(len(data)))
+    f.write(data)
+
+
+class _Reader:
+
+    def __init__(self, data: memoryview) -> None:
+        self.data = data
+        self.offset = 0
+
+    def read(self, size: int) -> memoryview:
+        if self.offset + size > len(self.data):
+            raise ValueError("Truncated spec")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def read_bytes(self) -> memoryview:
+        (size,) = self.unpack(_LENGTH)
+        return self.read(size)
+
+    def unpack(self, format: struct.Struct) -> tuple[t.Any, ...]:
+        return format.unpack(self.read(format.size))
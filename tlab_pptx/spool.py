@@ -0,0 +1,516 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Render presentations submitted to a spool directory.
+
+Clients submit the specs of presentations to a spool, which can be a shared
+directory, and a worker on the machine with the rendering capacity saves
+each job as a `pptx` file next to its metrics.
+
+    $ python -m tlab_pptx.spool /srv/spool --batch-size 8
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import logging
+import argparse
+import threading
+import dataclasses
+import typing as t
+
+from tlab_pptx import (
+    caching,
+    common,
+    deck,
+    instrumentation,
+    photo_luminescence as pl,
+    profiles,
+    sessions,
+    specs
+)
+
+
+logger = logging.getLogger(__name__)
+
+_SPEC_SUFFIX = ".tlps"
+
+
+@dataclasses.dataclass(frozen=True)
+class JobMetrics:
+    """Metrics of a finished job.
+
+    Attributes
+    ----------
+        job_id : str
+            The ID of the job.
+        slides : int
+            The number of slides.
+        spec_bytes : int
+            The size of the spec.
+        attempts : int
+            The number of attempts to render the job.
+        wait : float
+            The seconds from the submission until a worker claimed the job.
+        seconds : float
+            The seconds to load, render and save the job.
+        error : str, optional
+            The error of the last attempt if the job failed.
+    """
+    job_id: str
+    slides: int
+    spec_bytes: int
+    attempts: int
+    wait: float
+    seconds: float
+    error: str | None = None
+
+    @property
+    def slides_per_second(self) -> float:
+        """The throughput of the job."""
+        return self.slides / self.seconds if self.seconds > 0.0 else 0.0
+
+
+class Spool:
+    """Queue of render jobs in a directory.
+
+    A job is written to `incoming` under a temporary name and renamed when
+    complete. A worker claims it by renaming it to `working`, which is
+    atomic so that several workers can share a spool, and writes the result
+    to `done` or `failed` with the metrics of the job.
+
+    Parameters
+    ----------
+        directory : str or os.PathLike
+            The directory of the spool, created if missing.
+        max_pending : int
+            The number of unclaimed jobs beyond which `submit` waits.
+        interval : float
+            The seconds between checks while waiting.
+    """
+
+    def __init__(
+        self,
+        directory: common.FilePath,
+        max_pending: int = 64,
+        interval: float = 0.1
+    ) -> None:
+        self.directory = os.fspath(directory)
+        self.max_pending = max_pending
+        self.interval = interval
+        for name in ("incoming", "working", "done", "failed"):
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+
+    def _path(
+        self,
+        state: str,
+        job_id: str,
+        suffix: str = _SPEC_SUFFIX
+    ) -> str:
+        return os.path.join(self.directory, state, job_id + suffix)
+
+    def output_path(self, job_id: str) -> str:
+        """Get the path of the `pptx` file of a job."""
+        return self._path("done", job_id, ".pptx")
+
+    def pending(self) -> int:
+        """Count the unclaimed jobs."""
+        with os.scandir(os.path.join(self.directory, "incoming")) as entries:
+            return sum(entry.name.endswith(_SPEC_SUFFIX) for entry in entries)
+
+    def submit(
+        self,
+        presentations: t.Iterable[pl.Presentation],
+        job_id: str | None = None,
+        block: bool = True,
+        timeout: float | None = None
+    ) -> str:
+        """Submit a job rendering presentations into one `pptx` file.
+
+        Parameters
+        ----------
+            presentations : iterable of Presentation
+                The `tlab_pptx.photo_luminescence.Presentation` objects of
+                the slides.
+            job_id : str, optional
+                The ID of the job. A random ID is used if omitted.
+            block : bool
+                If true, wait while `max_pending` jobs are unclaimed.
+            timeout : float, optional
+                The maximum seconds to wait.
+
+        Returns
+        -------
+        str
+            The ID of the job.
+
+        Raises
+        ------
+        queue.Full
+            If the spool is still full when not blocking or after
+            `timeout`.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        data = specs.dumps(presentations)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending() >= self.max_pending:
+            if not block or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                raise queue.Full(
+                    f"{self.pending()} jobs are pending in "
+                    f"{self.directory!r}"
+                )
+            time.sleep(self.interval)
+        path = self._path("incoming", job_id)
+        tmp_path = self._path("incoming", f".{job_id}.{os.getpid()}", ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return job_id
+
+    def claim(self, count: int) -> list[str]:
+        """Claim the oldest unclaimed jobs.
+
+        Parameters
+        ----------
+            count : int
+                The maximum number of jobs.
+
+        Returns
+        -------
+        list of str
+            The IDs of the claimed jobs.
+        """
+        with os.scandir(os.path.join(self.directory, "incoming")) as entries:
+            candidates = sorted(
+                (entry.stat().st_mtime_ns, entry.name[:-len(_SPEC_SUFFIX)])
+                for entry in entries if entry.name.endswith(_SPEC_SUFFIX)
+            )
+        claimed: list[str] = []
+        for _, job_id in candidates:
+            if len(claimed) == count:
+                break
+            try:
+                os.rename(
+                    self._path("incoming", job_id),
+                    self._path("working", job_id)
+                )
+            except FileNotFoundError:
+                continue  # Claimed by another worker.
+            claimed.append(job_id)
+        return claimed
+
+    def recover(self) -> list[str]:
+        """Return the jobs left in `working` by a stopped worker to the queue.
+
+        It must not be called while other workers are running.
+
+        Returns
+        -------
+        list of str
+            The IDs of the returned jobs.
+        """
+        recovered = []
+        with os.scandir(os.path.join(self.directory, "working")) as entries:
+            for entry in entries:
+                if entry.name.endswith(_SPEC_SUFFIX):
+                    job_id = entry.name[:-len(_SPEC_SUFFIX)]
+                    os.replace(entry.path, self._path("incoming", job_id))
+                    recovered.append(job_id)
+        return recovered
+
+    def result(self, job_id: str, timeout: float | None = None) -> JobMetrics:
+        """Wait for a job to finish.
+
+        Parameters
+        ----------
+            job_id : str
+                The ID of the job.
+            timeout : float, optional
+                The maximum seconds to wait.
+
+        Returns
+        -------
+        tlab_pptx.spool.JobMetrics
+            The metrics of the job. Its file is at `output_path(job_id)`
+            unless `error` is set.
+
+        Raises
+        ------
+        TimeoutError
+            If the job has not finished within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for state in ("done", "failed"):
+                try:
+                    with open(self._path(state, job_id, ".json")) as f:
+                        return JobMetrics(**json.load(f))
+                except FileNotFoundError:
+                    pass
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id!r} has not finished")
+            time.sleep(self.interval)
+
+    def _finish(self, metrics: JobMetrics) -> None:
+        state = "done" if metrics.error is None else "failed"
+        if metrics.error is not None:
+            os.replace(
+                self._path("working", metrics.job_id),
+                self._path("failed", metrics.job_id)
+            )
+        else:
+            os.remove(self._path("working", metrics.job_id))
+        path = self._path(state, metrics.job_id, ".json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dataclasses.asdict(metrics), f)
+        os.replace(tmp_path, path)
+
+
+class RenderWorker:
+    """Worker rendering the jobs of a spool.
+
+    Up to `batch_size` jobs are claimed per scan of the spool, and they are
+    rendered one after another with one renderer session, which is kept
+    between the jobs. A job is retried if saving it fails. A spec which
+    cannot be loaded fails at once, and a job failing in any way is moved
+    to `failed/` without stopping the worker.
+
+    Parameters
+    ----------
+        spool : tlab_pptx.spool.Spool
+            The spool to take the jobs from.
+        batch_size : int
+            The maximum number of jobs claimed at once.
+        retries : int
+            The number of retries of a failed job.
+        template : tlab_pptx.typing.FilePathOrBuffer, optional
+            A filepath of the template.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with. `run` starts
+            one if omitted.
+    """
+
+    def __init__(
+        self,
+        spool: Spool,
+        batch_size: int = 8,
+        retries: int = 2,
+        template: common.FilePath | None = None,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None
+    ) -> None:
+        self.spool = spool
+        self.batch_size = batch_size
+        self.retries = retries
+        self.template = template
+        self.cache = cache
+        self.profile = profiles.get_profile(profile)
+        self.session = session
+        self.metrics: list[JobMetrics] = []
+
+    def _render(self, job_id: str) -> JobMetrics:
+        start = time.perf_counter()
+        path = self.spool._path("working", job_id)
+        wait = max(0.0, time.time() - os.stat(path).st_mtime)
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            presentations = specs.loads(data)
+        except Exception as e:
+            return JobMetrics(
+                job_id,
+                0,
+                len(data),
+                0,
+                wait,
+                time.perf_counter() - start,
+                f"{type(e).__name__}: {e}"
+            )
+        output = self.spool.output_path(job_id)
+        tmp_output = self.spool._path(
+            "done",
+            f".{job_id}.{os.getpid()}",
+            ".tmp"
+        )
+        error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                deck.Deck(presentations, self.template).save(
+                    tmp_output,
+                    cache=self.cache,
+                    profile=self.profile,
+                    session=self.session
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "Attempt %d of job %s failed: %s",
+                    attempt,
+                    job_id,
+                    error
+                )
+            else:
+                os.replace(tmp_output, output)
+                error = None
+                break
+        if error is not None and os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        return JobMetrics(
+            job_id,
+            len(presentations),
+            len(data),
+            attempt,
+            wait,
+            time.perf_counter() - start,
+            error
+        )
+
+    def process(self) -> list[JobMetrics]:
+        """Claim a batch of jobs and render them one after another.
+
+        Returns
+        -------
+        list of tlab_pptx.spool.JobMetrics
+            The metrics of the jobs in the batch, which is empty if no job
+            is pending.
+        """
+        job_ids = self.spool.claim(self.batch_size)
+        if not job_ids:
+            return []
+        batch = []
+        with instrumentation.span("batch", jobs=len(job_ids)):
+            for job_id in job_ids:
+                with instrumentation.span("job", job=job_id) as span:
+                    start = time.perf_counter()
+                    try:
+                        metrics = self._render(job_id)
+                    except Exception as e:
+                        # The job is moved to failed/ rather than stopping
+                        # the worker whatever went wrong.
+                        metrics = JobMetrics(
+                            job_id,
+                            0,
+                            0,
+                            0,
+                            0.0,
+                            time.perf_counter() - start,
+                            f"{type(e).__name__}: {e}"
+                        )
+                    span.set(
+                        slides=metrics.slides,
+                        attempts=metrics.attempts
+                    )
+                self.spool._finish(metrics)
+                logger.info(
+                    "Job %s: %d slides in %.3f s (%.1f slides/s) "
+                    "after waiting %.3f s%s",
+                    job_id,
+                    metrics.slides,
+                    metrics.seconds,
+                    metrics.slides_per_second,
+                    metrics.wait,
+                    "" if metrics.error is None
+                    else f", failed: {metrics.error}"
+                )
+                batch.append(metrics)
+        self.metrics.extend(batch)
+        return batch
+
+    def run(
+        self,
+        interval: float = 0.5,
+        stop: threading.Event | None = None
+    ) -> None:
+        """Render jobs until stopped.
+
+        Parameters
+        ----------
+            interval : float
+                The seconds to wait when no job is pending.
+            stop : threading.Event, optional
+                An event stopping the worker when set. It runs until
+                interrupted if omitted.
+        """
+        stop = stop or threading.Event()
+        session = self.session
+        if session is None:
+            self.session = sessions.RendererSession()
+        try:
+            while not stop.is_set():
+                if not self.process():
+                    stop.wait(interval)
+        finally:
+            if session is None and self.session is not None:
+                self.session.close()
+                self.session = None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tlab_pptx.spool",
+        description="Render the jobs submitted to a spool directory."
+    )
+    parser.add_argument("directory", help="the spool directory")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="the maximum number of jobs claimed at once"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="the number of retries of a failed job"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="the seconds between checks when idle"
+    )
+    parser.add_argument(
+        "--profile",
+        default=profiles.ORIGINAL.name,
+        help="the render profile"
+    )
+    parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="requeue the jobs left by a stopped worker"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    spool = Spool(args.directory)
+    if args.recover:
+        spool.recover()
+    worker = RenderWorker(
+        spool,
+        batch_size=args.batch_size,
+        retries=args.retries,
+        profile=args.profile
+    )
+    try:
+        worker.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    slides = sum(metrics.slides for metrics in worker.metrics)
+    seconds = sum(metrics.seconds for metrics in worker.metrics)
+    failed = sum(metrics.error is not None for metrics in worker.metrics)
+    print(
+        f"{len(worker.metrics)} jobs, {failed} failed, "
+        f"{slides} slides in {seconds:.3f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
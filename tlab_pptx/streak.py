@@ -0,0 +1,336 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import re
+import struct
+import dataclasses
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from tlab_pptx import common
+
+
+Array = npt.NDArray[np.float64]
+Window = tuple[float, float]
+
+# The data types of the file types in the header of an ITEX image.
+_ITEX_DTYPES = {0: "u1", 2: "<u2", 3: "<u4"}
+_ITEX_HEADER = struct.Struct("<2s6h")
+_ITEX_HEADER_SIZE = 64
+# The number of exposures accumulated by HiPic in the comment of an image.
+_ITEX_EXPOSURES = re.compile(rb"\bNrExposure=(\d+)")
+
+
+@dataclasses.dataclass(frozen=True)
+class Projections:
+    """Projections of a streak image onto its two axes.
+
+    Attributes
+    ----------
+        wavelengths : numpy.ndarray
+            The wavelength of each column in nm.
+        spectrum : numpy.ndarray
+            The counts summed over the time window for each wavelength.
+        times : numpy.ndarray
+            The time of each row in ns.
+        decay : numpy.ndarray
+            The counts summed over the wavelength window for each time.
+        images : int
+            The number of images of the file summed.
+        frame : int, optional
+            The number of frames accumulated by the camera, or None if it is
+            unknown.
+    """
+    wavelengths: Array
+    spectrum: Array
+    times: Array
+    decay: Array
+    images: int
+    frame: int | None = None
+
+    @property
+    def center_wavelength(self) -> float:
+        """The center of the spectrum between its half maxima in nm."""
+        left, right = self._half_maxima()
+        return (left + right) / 2.0
+
+    @property
+    def FWHM(self) -> float:
+        """The full width at half maximum of the spectrum in nm."""
+        left, right = self._half_maxima()
+        return abs(right - left)
+
+    def _half_maxima(self) -> tuple[float, float]:
+        x, y = self.wavelengths, self.spectrum
+        peak = int(np.argmax(y))
+        half = y[peak] / 2.0
+
+        def cross(indices: t.Iterable[int]) -> float:
+            previous = peak
+            for i in indices:
+                if y[i] <= half:
+                    # Interpolate linearly between the two neighbours.
+                    return float(np.interp(
+                        half,
+                        [y[i], y[previous]],
+                        [x[i], x[previous]]
+                    ))
+                previous = i
+            return float(x[previous])
+
+        return cross(range(peak - 1, -1, -1)), cross(range(peak + 1, len(y)))
+
+    def h_fig(self) -> dict[str, t.Any]:
+        """Get the figure dict of the spectrum."""
+        return dict(
+            data=[dict(
+                type="scatter",
+                x=self.wavelengths,
+                y=self.spectrum,
+                mode="lines"
+            )],
+            layout=dict(
+                xaxis=dict(title=dict(text="Wavelength (nm)")),
+                yaxis=dict(title=dict(text="Intensity (counts)"))
+            )
+        )
+
+    def v_fig(self) -> dict[str, t.Any]:
+        """Get the figure dict of the decay."""
+        return dict(
+            data=[dict(
+                type="scatter",
+                x=self.times,
+                y=self.decay,
+                mode="lines"
+            )],
+            layout=dict(
+                xaxis=dict(title=dict(text="Time (ns)")),
+                yaxis=dict(title=dict(text="Intensity (counts)"))
+            )
+        )
+
+    def fields(self, frame: int | None = None) -> dict[str, t.Any]:
+        """Get the fields of `tlab_pptx.photo_luminescence.Presentation`.
+
+        Parameters
+        ----------
+            frame : int, optional
+                The number of frames accumulated by the camera. Defaults to
+                `frame` of the projections.
+
+        Returns
+        -------
+        dict
+            "center_wavelength", "FWHM", "frame", "h_fig" and "v_fig".
+
+        Raises
+        ------
+        ValueError
+            If the number of frames is unknown.
+        """
+        if frame is None:
+            frame = self.frame
+        if frame is None:
+            raise ValueError(
+                "The number of frames is unknown; pass it as frame"
+            )
+        return dict(
+            center_wavelength=int(round(self.center_wavelength)),
+            FWHM=self.FWHM,
+            frame=frame,
+            h_fig=self.h_fig(),
+            v_fig=self.v_fig()
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class StreakImage:
+    """Raw streak camera images stored in a file.
+
+    The file holds `frames` images of `height` rows of time by `width`
+    columns of wavelength after a header of `offset` bytes. It is never read
+    as a whole: `project` maps a block of rows at a time.
+
+    Attributes
+    ----------
+        path : str or os.PathLike
+            The path of the file.
+        width : int
+            The number of columns, i.e. wavelengths.
+        height : int
+            The number of rows, i.e. times.
+        dtype : str
+            The data type of a pixel, e.g. "<u2" for little endian 16 bit.
+        offset : int
+            The size of the header in bytes.
+        frames : int, optional
+            The number of images in the file. If omitted, it is given by the
+            size of the file.
+        frame : int, optional
+            The number of frames accumulated by the camera, reported on the
+            slides. It is not the number of images in the file.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmpdir:
+    ...     path = os.path.join(tmpdir, "streak.raw")
+    ...     with open(path, "wb") as f:
+    ...         _ = f.write(b"header")
+    ...         _ = f.write(np.arange(12, dtype="<u2").tobytes())
+    ...     image = StreakImage(path, width=3, height=4, offset=6)
+    ...     projections = image.project(time_window=(1, 2))
+    >>> projections.spectrum, projections.decay
+    (array([ 9., 11., 13.]), array([ 3., 12., 21., 30.]))
+    """
+    path: common.FilePath
+    width: int
+    height: int
+    dtype: str = "<u2"
+    offset: int = 0
+    frames: int | None = None
+    frame: int | None = None
+
+    @classmethod
+    def from_itex(cls, path: common.FilePath) -> "StreakImage":
+        """Open an image saved in the ITEX format of Hamamatsu streak cameras.
+
+        Parameters
+        ----------
+            path : str or os.PathLike
+                The path of an `.img` file.
+
+        Returns
+        -------
+        tlab_pptx.streak.StreakImage
+            The image described by the header. The number of frames is the
+            number of exposures recorded in the comment by HiPic, if any.
+        """
+        with open(path, "rb") as f:
+            header = f.read(_ITEX_HEADER_SIZE)
+            if len(header) < _ITEX_HEADER_SIZE:
+                raise ValueError(
+                    f"{os.fspath(path)!r} is too short for an ITEX image"
+                )
+            magic, comment, width, height, _, _, file_type = \
+                _ITEX_HEADER.unpack_from(header)
+            if magic != b"IM":
+                raise ValueError(f"{os.fspath(path)!r} is not an ITEX image")
+            if file_type not in _ITEX_DTYPES:
+                raise ValueError(f"Unsupported ITEX file type: {file_type}")
+            match = _ITEX_EXPOSURES.search(f.read(comment))
+        return cls(
+            path,
+            width=width,
+            height=height,
+            dtype=_ITEX_DTYPES[file_type],
+            offset=_ITEX_HEADER_SIZE + comment,
+            frame=None if match is None else int(match.group(1))
+        )
+
+    def _frames(self) -> int:
+        if self.frames is not None:
+            return self.frames
+        frame_size = self.width * self.height * np.dtype(self.dtype).itemsize
+        frames = (os.path.getsize(self.path) - self.offset) // frame_size
+        if frames < 1:
+            raise ValueError(
+                f"{os.fspath(self.path)!r} holds no complete image"
+            )
+        return frames
+
+    def project(
+        self,
+        time_window: Window | None = None,
+        wavelength_window: Window | None = None,
+        times: npt.ArrayLike | None = None,
+        wavelengths: npt.ArrayLike | None = None,
+        chunk_bytes: int = 1 << 24
+    ) -> Projections:
+        """Sum the images over windows of time and wavelength.
+
+        The rows are mapped with `numpy.memmap` in blocks of at most
+        `chunk_bytes` which are released as soon as they are summed, so the
+        memory stays bounded regardless of the size of the file.
+
+        Parameters
+        ----------
+            time_window : tuple of float, optional
+                The inclusive range of times summed into the spectrum. All
+                rows are summed if omitted.
+            wavelength_window : tuple of float, optional
+                The inclusive range of wavelengths summed into the decay. All
+                columns are summed if omitted.
+            times : array-like, optional
+                The time of each row in ns. Defaults to the row indices.
+            wavelengths : array-like, optional
+                The wavelength of each column in nm. Defaults to the column
+                indices.
+            chunk_bytes : int
+                The maximum size of a mapped block.
+
+        Returns
+        -------
+        tlab_pptx.streak.Projections
+            The spectrum and the decay of all images.
+        """
+        t_axis = _get_axis(times, self.height, "times")
+        w_axis = _get_axis(wavelengths, self.width, "wavelengths")
+        rows = _get_mask(t_axis, time_window)
+        columns = _get_mask(w_axis, wavelength_window)
+        if not rows.any() or not columns.any():
+            raise ValueError("The windows select no pixels")
+        dtype = np.dtype(self.dtype)
+        row_bytes = self.width * dtype.itemsize
+        block = max(1, chunk_bytes // row_bytes)
+        frames = self._frames()
+        spectrum = np.zeros(self.width)
+        decay = np.zeros(self.height)
+        for frame in range(frames):
+            for start in range(0, self.height, block):
+                stop = min(start + block, self.height)
+                data = np.memmap(
+                    self.path,
+                    dtype=dtype,
+                    mode="r",
+                    offset=self.offset
+                    + (frame * self.height + start) * row_bytes,
+                    shape=(stop - start, self.width)
+                )
+                decay[start:stop] += data[:, columns].sum(
+                    axis=1,
+                    dtype=np.float64
+                )
+                selected = rows[start:stop]
+                if selected.any():
+                    spectrum += data[selected].sum(axis=0, dtype=np.float64)
+                del data
+        return Projections(
+            wavelengths=w_axis,
+            spectrum=spectrum,
+            times=t_axis,
+            decay=decay,
+            images=frames,
+            frame=self.frame
+        )
+
+
+def _get_axis(axis: npt.ArrayLike | None, size: int, name: str) -> Array:
+    if axis is None:
+        return np.arange(size, dtype=np.float64)
+    values = np.asarray(axis, dtype=np.float64)
+    if values.shape != (size,):
+        raise ValueError(
+            f"{name} must have {size} values but has shape {values.shape}"
+        )
+    return values
+
+
+def _get_mask(axis: Array, window: Window | None) -> npt.NDArray[np.bool_]:
+    if window is None:
+        return np.ones(axis.shape, dtype=bool)
+    low, high = sorted(window)
+    mask: npt.NDArray[np.bool_] = (axis >= low) & (axis <= high)
+    return mask
@@ -0,0 +1,163 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+import os
+import io
+import copy
+import hashlib
+import threading
+import collections
+import dataclasses
+import typing as t
+
+import pptx
+import pptx.presentation
+
+from tlab_pptx import common
+
+
+@dataclasses.dataclass(frozen=True)
+class TemplateStats:
+    """Statistics of a template cache.
+
+    Attributes
+    ----------
+        hits : int
+            The number of templates copied from the cache.
+        misses : int
+            The number of templates parsed.
+        entries : int
+            The number of parsed templates currently stored.
+    """
+    hits: int
+    misses: int
+    entries: int
+
+
+class TemplateCache:
+    """In-memory cache of parsed `pptx` templates.
+
+    A template is unzipped and parsed once, and every `open` returns an
+    independent deep copy of it, which is several times cheaper than
+    parsing. Templates given by path are parsed again when the file changes.
+
+    Parameters
+    ----------
+        max_entries : int
+            The maximum number of parsed templates kept. The least recently
+            used one is dropped beyond it.
+
+    Examples
+    --------
+    >>> cache = TemplateCache()
+    >>> first, second = cache.open(), cache.open()
+    >>> first is second, len(first.slide_layouts) == len(second.slide_layouts)
+    (False, True)
+    >>> cache.stats()
+    TemplateStats(hits=1, misses=1, entries=1)
+    """
+
+    def __init__(self, max_entries: int = 8) -> None:
+        self.max_entries = max_entries
+        self._templates: collections.OrderedDict[
+            t.Hashable,
+            pptx.presentation.Presentation
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def open(
+        self,
+        template: common.FilePathOrBuffer | None = None
+    ) -> pptx.presentation.Presentation:
+        """Get a Presentation object of a template.
+
+        Parameters
+        ----------
+            template : tlab_pptx.typing.FilePathOrBuffer, optional
+                A filepath or buffer of a `pptx` file. The default template
+                of python-pptx is used if omitted. A buffer is read from
+                its current position.
+
+        Returns
+        -------
+        pptx.presentation.Presentation
+            A Presentation object which can be modified freely.
+        """
+        key, source = _get_key(template)
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is not None:
+                self._templates.move_to_end(key)
+                self._hits += 1
+                return copy.deepcopy(cached)
+        prs = pptx.Presentation(source)
+        assert isinstance(prs, pptx.presentation.Presentation)
+        # Resolve the lazy properties once so that the copies inherit them.
+        prs.slide_layouts
+        with self._lock:
+            self._misses += 1
+            self._templates[key] = prs
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+            return copy.deepcopy(prs)
+
+    def clear(self) -> None:
+        """Remove all parsed templates."""
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> TemplateStats:
+        """Get the statistics of the cache."""
+        with self._lock:
+            return TemplateStats(
+                self._hits,
+                self._misses,
+                len(self._templates)
+            )
+
+
+def _get_key(
+    template: common.FilePathOrBuffer | None
+) -> tuple[t.Hashable, t.Any]:
+    if template is None:
+        return None, None
+    if isinstance(template, (str, os.PathLike)):
+        path = os.path.abspath(template)
+        stat = os.stat(path)
+        return ("path", path, stat.st_mtime_ns, stat.st_size), path
+    data = template.read()
+    return ("content", hashlib.sha1(data).hexdigest()), io.BytesIO(data)
+
+
+_cache = TemplateCache()
+
+
+def open_template(
+    template: common.FilePathOrBuffer | None = None
+) -> pptx.presentation.Presentation:
+    """Get a Presentation object of a template parsed once per process.
+
+    Parameters
+    ----------
+        template : tlab_pptx.typing.FilePathOrBuffer, optional
+            A filepath or buffer of a `pptx` file. The default template of
+            python-pptx is used if omitted.
+
+    Returns
+    -------
+    pptx.presentation.Presentation
+        An independent copy of the parsed template.
+
+    Examples
+    --------
+    >>> prs = open_template()
+    >>> slide = prs.slides.add_slide(prs.slide_layouts[5])
+    >>> len(prs.slides), len(open_template().slides)
+    (1, 0)
+    """
+    return _cache.open(template)
+
+
+def get_cache() -> TemplateCache:
+    """Get the template cache shared by the process."""
+    return _cache
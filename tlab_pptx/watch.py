@@ -0,0 +1,537 @@
+# Copyright (c) 2022 Shuhei Nitta. All rights reserved.
+"""Watch a directory and append a slide for each new measurement.
+
+    $ python -m tlab_pptx.watch measurements/ report.pptx
+"""
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import argparse
+import threading
+import dataclasses
+import typing as t
+
+import pandas as pd
+import pptx.presentation
+
+from tlab_pptx import (
+    abstract,
+    caching,
+    common,
+    deck,
+    incremental,
+    instrumentation,
+    metadata,
+    photo_luminescence as pl,
+    profiles,
+    sessions
+)
+
+
+logger = logging.getLogger(__name__)
+
+Loader = t.Callable[[str], abstract.AbstractPresentation]
+
+
+def load_measurement(path: str) -> pl.Presentation:
+    """Load a measurement saved as a JSON object of Presentation fields.
+
+    Parameters
+    ----------
+        path : str
+            The path of a JSON file. The figures are given as figure dicts
+            and the date as an ISO string.
+
+    Returns
+    -------
+    tlab_pptx.photo_luminescence.Presentation
+        The presentation validated like `Presentation.from_frame`.
+    """
+    with open(path, "rb") as f:
+        record = json.load(f)
+    [presentation] = pl.Presentation.from_frame(pd.DataFrame([record]))
+    return presentation
+
+
+@dataclasses.dataclass(frozen=True)
+class WatchEvent:
+    """An update of the deck after measurements landed, or its save.
+
+    Attributes
+    ----------
+        paths : tuple of str
+            The measurements added or replaced.
+        stats : tlab_pptx.incremental.UpdateStats or None
+            The statistics of the update, or None if the deck has not
+            changed.
+        latencies : tuple of float
+            The seconds from when each measurement saved was first seen
+            until the deck was saved, including the time to settle.
+        errors : dict of str to str
+            The measurements which could not be loaded or added and why.
+    """
+    paths: tuple[str, ...]
+    stats: incremental.UpdateStats | None
+    latencies: tuple[float, ...]
+    errors: dict[str, str]
+
+
+@dataclasses.dataclass(frozen=True)
+class WatchStats:
+    """Statistics of a watcher.
+
+    Attributes
+    ----------
+        events : int
+            The number of updates of the deck.
+        measurements : int
+            The number of measurements added or replaced.
+        failures : int
+            The number of measurements which could not be loaded.
+        latency_mean : float or None
+            The mean seconds from arrival to the updated deck.
+        latency_max : float or None
+            The longest seconds from arrival to the updated deck.
+    """
+    events: int
+    measurements: int
+    failures: int
+    latency_mean: float | None
+    latency_max: float | None
+
+
+@dataclasses.dataclass
+class _Pending:
+    signature: tuple[int, int]
+    first_seen: float
+    changed: float
+
+
+class Watcher:
+    """Watcher updating a deck as measurements land in a directory.
+
+    A file is taken once its size and modification time have not changed
+    for `settle` seconds, so files still being written are skipped. Each
+    `poll` adds the settled measurements to the deck, or replaces their
+    slides if they were rewritten. The deck is parsed once and kept open
+    for the lifetime of the watcher, so only the new slides are built and
+    rendered, and it is saved once it has not changed for `debounce`
+    seconds. The slides of a deck saved before are reused if their spec
+    keys match the measurements, and the others are removed.
+
+    A measurement which cannot be loaded, or whose slide cannot be built,
+    is logged and left out of the deck until it is rewritten.
+
+    Parameters
+    ----------
+        directory : str or os.PathLike
+            The directory to watch.
+        output : str or os.PathLike
+            The deck to update.
+        pattern : str
+            The glob pattern of the measurement files.
+        loader : callable
+            A function loading a presentation from a file.
+        settle : float
+            The seconds a file must stay unchanged before it is taken.
+        template : tlab_pptx.typing.FilePathOrBuffer, optional
+            A filepath of the template used when the deck is created.
+        cache : tlab_pptx.caching.RenderCache, optional
+            A cache of rendered figure images.
+        profile : str or tlab_pptx.profiles.RenderProfile
+            The render profile of the figures.
+        session : tlab_pptx.sessions.RendererSession, optional
+            A renderer session to render the figures with. `run` starts
+            one if omitted.
+        clock : callable
+            A monotonic clock in seconds.
+        debounce : float
+            The seconds the deck must stay unchanged before it is saved,
+            so that measurements landing one after another are saved
+            together. `flush` saves it at once.
+    """
+
+    def __init__(
+        self,
+        directory: common.FilePath,
+        output: common.FilePath,
+        pattern: str = "*.json",
+        loader: Loader = load_measurement,
+        settle: float = 1.0,
+        template: common.FilePath | None = None,
+        cache: caching.RenderCache | None = None,
+        profile: str | profiles.RenderProfile = profiles.ORIGINAL,
+        session: sessions.RendererSession | None = None,
+        clock: t.Callable[[], float] = time.monotonic,
+        debounce: float = 0.0
+    ) -> None:
+        self.directory = os.fspath(directory)
+        self.output = os.fspath(output)
+        self.pattern = pattern
+        self.loader = loader
+        self.settle = settle
+        self.template = template
+        self.cache = cache
+        self.profile = profiles.get_profile(profile)
+        self.session = session
+        self.debounce = debounce
+        self._clock = clock
+        self._pending: dict[str, _Pending] = {}
+        self._done: dict[str, tuple[int, int]] = {}
+        # The loaded measurements and their spec keys by their paths.
+        self._presentations: dict[
+            str,
+            tuple[abstract.AbstractPresentation, str | None]
+        ] = {}
+        self._events: list[WatchEvent] = []
+        # The open deck, the entries of the slides of the measurements with
+        # their keys, and the slides saved before which are not claimed yet
+        # by their keys.
+        self._prs: pptx.presentation.Presentation | None = None
+        self._slides: dict[str, tuple[t.Any, str | None]] = {}
+        self._existing: dict[str, list[t.Any]] = {}
+        # When the measurements not saved yet were first seen, and when the
+        # deck was last changed if it is not saved.
+        self._unsaved: dict[str, float] = {}
+        self._changed: float | None = None
+
+    def _scan(self) -> list[str]:
+        """Find the measurements which have settled."""
+        now = self._clock()
+        seen = set()
+        ready = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() \
+                        or not fnmatch.fnmatch(entry.name, self.pattern):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                path = entry.path
+                seen.add(path)
+                if self._done.get(path) == signature:
+                    continue
+                pending = self._pending.get(path)
+                if pending is None:
+                    self._pending[path] = _Pending(signature, now, now)
+                elif pending.signature != signature:
+                    pending.signature = signature
+                    pending.changed = now
+                elif now - pending.changed >= self.settle:
+                    ready.append(path)
+        for path in set(self._pending) - seen:
+            del self._pending[path]
+        return sorted(ready)
+
+    def poll(self) -> WatchEvent | None:
+        """Scan the directory once and update the deck with new measurements.
+
+        Returns
+        -------
+        tlab_pptx.watch.WatchEvent or None
+            The update, or None if no measurement has settled and the deck
+            was not saved.
+        """
+        ready = self._scan()
+        if not ready:
+            if self._changed is None \
+                    or self._clock() - self._changed < self.debounce:
+                return None
+            return self.flush()
+        with instrumentation.span("watch", measurements=len(ready)) as span:
+            loaded = []
+            errors = {}
+            dropped = []
+            for path in ready:
+                self._done[path] = self._pending[path].signature
+                try:
+                    presentation = self.loader(path)
+                    # Computing the key validates the figures, and it is kept
+                    # so that each update hashes only the new measurements.
+                    key = presentation.get_spec_key(self.profile)
+                except Exception as e:
+                    errors[path] = f"{type(e).__name__}: {e}"
+                    logger.warning(
+                        "Failed to load %s: %s",
+                        path,
+                        errors[path]
+                    )
+                    if self._presentations.pop(path, None) is not None:
+                        dropped.append(path)
+                else:
+                    self._presentations[path] = (presentation, key)
+                    loaded.append(path)
+            stats = None
+            if loaded or dropped:
+                stats = self._update(loaded, dropped, errors)
+                loaded = [path for path in loaded if path not in errors]
+            for path in loaded:
+                self._unsaved.setdefault(
+                    path,
+                    self._pending.pop(path).first_seen
+                )
+            for path in errors:
+                del self._pending[path]
+            latencies: tuple[float, ...] = ()
+            if self._changed is not None \
+                    and self._clock() - self._changed >= self.debounce:
+                latencies = self._save()
+            if latencies:
+                span.set(latency=max(latencies))
+        event = WatchEvent(tuple(loaded), stats, latencies, errors)
+        self._events.append(event)
+        return event
+
+    def flush(self) -> WatchEvent | None:
+        """Save the deck if it has changed since it was last saved.
+
+        Returns
+        -------
+        tlab_pptx.watch.WatchEvent or None
+            The save of the measurements added before, or None if the deck
+            has not changed.
+        """
+        if self._changed is None:
+            return None
+        event = WatchEvent((), None, self._save(), {})
+        self._events.append(event)
+        return event
+
+    def _open(self) -> pptx.presentation.Presentation:
+        """Open the deck, keeping the keys of the slides saved before."""
+        if self._prs is None:
+            prs = deck.open_deck(self.output, self.template)
+            for sld_id in prs.slides._sldIdLst.sldId_lst:
+                key = incremental.get_slide_key(
+                    prs.part.related_part(sld_id.rId).slide
+                )
+                if key is not None:
+                    self._existing.setdefault(key, []).append(sld_id)
+            # The fields embedded before no longer describe the slides.
+            metadata.embed(prs, None)
+            self._prs = prs
+        return self._prs
+
+    def _update(
+        self,
+        loaded: list[str],
+        dropped: list[str],
+        errors: dict[str, str]
+    ) -> incremental.UpdateStats | None:
+        """Add or replace the slides of the measurements in the open deck.
+
+        The measurements whose slides cannot be built are added to
+        `errors` and left out, and None is returned if the deck has not
+        changed.
+        """
+        prs = self._open()
+        sld_id_lst = prs.slides._sldIdLst
+        removed = [self._slides.pop(path)[0] for path in dropped]
+        rebuilt = 0
+        for path in loaded:
+            presentation, key = self._presentations[path]
+            old = self._slides.pop(path, None)
+            if old is not None:
+                if key is not None and old[1] == key:
+                    self._slides[path] = old
+                    continue
+                removed.append(old[0])
+            if key is not None and self._existing.get(key):
+                self._slides[path] = (self._existing[key].pop(0), key)
+                continue
+            start = len(sld_id_lst.sldId_lst)
+            try:
+                slide = presentation.add_slide(
+                    prs,
+                    cache=self.cache,
+                    profile=self.profile,
+                    session=self.session
+                )
+            except Exception as e:
+                errors[path] = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "Failed to add %s to %s: %s",
+                    path,
+                    self.output,
+                    errors[path]
+                )
+                del self._presentations[path]
+                # The slide may have been added before it failed.
+                _remove_slides(prs, sld_id_lst.sldId_lst[start:])
+                continue
+            if key is not None:
+                incremental.set_slide_key(slide, key)
+            self._slides[path] = (sld_id_lst.sldId_lst[-1], key)
+            rebuilt += 1
+        # The slides saved before which no measurement has claimed are
+        # removed once the measurements found first are added.
+        for sld_ids in self._existing.values():
+            removed.extend(sld_ids)
+        self._existing.clear()
+        if not rebuilt and not removed \
+                and all(path in errors for path in loaded):
+            return None
+        _remove_slides(prs, removed)
+        sld_id_lst[:] = [
+            self._slides[path][0] for path in self._presentations
+        ]
+        incremental.renumber_slides(prs)
+        self._changed = self._clock()
+        return incremental.UpdateStats(
+            reused=len(self._slides) - rebuilt,
+            rebuilt=rebuilt,
+            removed=len(removed)
+        )
+
+    def _save(self) -> tuple[float, ...]:
+        """Save the deck, returning the latencies of the measurements."""
+        assert self._prs is not None
+        try:
+            deck.replace_deck(self._prs, self.output)
+        except Exception as e:
+            logger.warning(
+                "Failed to save %s: %s",
+                self.output,
+                f"{type(e).__name__}: {e}"
+            )
+            return ()
+        end = self._clock()
+        latencies = tuple(
+            end - first_seen for first_seen in self._unsaved.values()
+        )
+        self._unsaved.clear()
+        self._changed = None
+        if latencies:
+            logger.info(
+                "Updated %s with %d measurements in %.3f s",
+                self.output,
+                len(latencies),
+                max(latencies)
+            )
+        return latencies
+
+    def run(
+        self,
+        interval: float = 0.5,
+        stop: threading.Event | None = None
+    ) -> None:
+        """Poll the directory until stopped.
+
+        The deck is saved before returning if it has changed.
+
+        Parameters
+        ----------
+            interval : float
+                The seconds between scans.
+            stop : threading.Event, optional
+                An event stopping the watcher when set. It runs until
+                interrupted if omitted.
+        """
+        stop = stop or threading.Event()
+        session = self.session
+        if session is None:
+            self.session = sessions.RendererSession()
+        try:
+            while not stop.is_set():
+                self.poll()
+                stop.wait(interval)
+        finally:
+            self.flush()
+            if session is None and self.session is not None:
+                self.session.close()
+                self.session = None
+
+    def stats(self) -> WatchStats:
+        """Get the statistics of the updates so far."""
+        latencies = [
+            latency for event in self._events for latency in event.latencies
+        ]
+        return WatchStats(
+            events=sum(event.stats is not None for event in self._events),
+            measurements=len(latencies),
+            failures=sum(len(event.errors) for event in self._events),
+            latency_mean=sum(latencies) / len(latencies)
+            if latencies else None,
+            latency_max=max(latencies) if latencies else None
+        )
+
+
+def _remove_slides(
+    prs: pptx.presentation.Presentation,
+    sld_ids: t.Sequence[t.Any]
+) -> None:
+    """Remove slides by their entries in the list of slides."""
+    sld_id_lst = prs.slides._sldIdLst
+    for sld_id in sld_ids:
+        sld_id_lst.remove(sld_id)
+        prs.part.drop_rel(sld_id.rId)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tlab_pptx.watch",
+        description="Append a slide to a deck for each measurement landing "
+                    "in a directory."
+    )
+    parser.add_argument("directory", help="the directory to watch")
+    parser.add_argument("output", help="the pptx file to update")
+    parser.add_argument(
+        "--pattern",
+        default="*.json",
+        help="the glob pattern of the measurement files"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=1.0,
+        help="the seconds a file must stay unchanged"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="the seconds between scans"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.0,
+        help="the seconds the deck must stay unchanged before it is saved"
+    )
+    parser.add_argument(
+        "--profile",
+        default=profiles.ORIGINAL.name,
+        help="the render profile"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    watcher = Watcher(
+        args.directory,
+        args.output,
+        pattern=args.pattern,
+        settle=args.settle,
+        profile=args.profile,
+        debounce=args.debounce
+    )
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    stats = watcher.stats()
+    print(
+        f"{stats.measurements} measurements in {stats.events} updates, "
+        f"{stats.failures} failed"
+    )
+    if stats.latency_mean is not None and stats.latency_max is not None:
+        print(
+            f"latency: mean {stats.latency_mean:.3f} s, "
+            f"max {stats.latency_max:.3f} s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())